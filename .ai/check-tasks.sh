@@ -1,5 +1,13 @@
 #!/bin/bash
 # Quick task detection for AI agents
+#
+# ./.ai/check-tasks.sh --wait [AGENT]   blocks until the task queue
+# (.ai/task_queue.py) has a task for AGENT (default $AI_AGENT), claims it
+# and prints it - instead of calling this script in a loop
+
+if [ "$1" = "--wait" ]; then
+    exec python3 "$(dirname "$0")/task_queue.py" wait-for-task ${2:+"$2"}
+fi
 
 # Source the status file
 if [ -f ".ai/STATUS" ]; then
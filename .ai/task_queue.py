@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Task Queue - Many Tasks, Atomic Claims, Blocking Waits
+===================================================================================
+
+PURPOSE:
+    .ai/STATUS holds one task, and agents find it by running check-tasks.sh
+    in a loop. This queue holds any number of tasks, hands each to exactly
+    one agent, and lets idle agents block until there is work - no polling,
+    so waiting costs nothing and a new task is picked up within
+    milliseconds.
+
+HOW IT WORKS:
+    1. Tasks live in .ai/tasks.db (SQLite) with the same fields as STATUS:
+       PRIORITY (1=Critical ... 4=Low), ASSIGNED_TO (ANY, OCC, TCC or a
+       name), TASK_FILE, TASK_SECTION, EFFORT_HOURS and SUMMARY
+    2. claim: one transaction picks the best task for an agent - assigned
+       to it or to ANY, lowest PRIORITY number first, then oldest - and
+       marks it IN_PROGRESS with a lease. Two agents can never get the
+       same task
+    3. Leases: an agent working on a task renews its lease (heartbeat). If
+       it stops (crash, closed terminal), the task can be claimed again
+       once the lease runs out
+    4. wait-for-task: the agent opens a unix socket, tries to claim, and if
+       there is nothing sleeps on the socket. Every change that makes
+       work available (add, release) sends each waiting socket a wake-up
+       byte. Waiters also wake when a lease runs out. Without unix sockets
+       (Windows) it checks every WAIT_POLL_INTERVAL seconds instead
+    5. .ai/STATUS is rewritten after every change to show the top task
+       (plus TASK_ID and PENDING_TASKS), so `source .ai/STATUS` and
+       check-tasks.sh keep working
+
+USAGE:
+    python3 .ai/task_queue.py add "Fix login bug" --priority 1 --assign TCC
+    python3 .ai/task_queue.py list
+    python3 .ai/task_queue.py wait-for-task TCC     # Blocks; prints the claimed task
+    python3 .ai/task_queue.py heartbeat 7 TCC       # Renew the lease while working
+    python3 .ai/task_queue.py done 7
+    python3 .ai/task_queue.py release 7             # Give it back (or unblock it)
+    python3 .ai/task_queue.py block 7 "waiting on API keys"
+    python3 .ai/task_queue.py import-status         # Queue the task in .ai/STATUS
+
+    claim and wait-for-task exit 0 with a task, 1 without; --json prints it
+    as JSON. The agent name defaults to $AI_AGENT.
+
+    From Python:
+        queue = TaskQueue()
+        task = queue.wait_for_task('TCC', timeout=600)
+        ...
+        queue.complete(task.id)
+===================================================================================
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+# The .ai directory this script lives in
+AI_DIR = Path(__file__).resolve().parent
+
+# Task states, as in .ai/STATUS (IDLE means "no tasks"; DONE tasks are kept
+# for the record)
+STATES = ('PENDING', 'IN_PROGRESS', 'BLOCKED', 'DONE')
+
+# How long a claim lasts without a heartbeat, in seconds
+DEFAULT_LEASE = 30 * 60
+
+# Waiting without unix sockets: check this often, in seconds
+WAIT_POLL_INTERVAL = 1.0
+
+# Wait this long (seconds) for another agent's transaction before failing
+BUSY_TIMEOUT = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id            INTEGER PRIMARY KEY,
+    state         TEXT NOT NULL,
+    priority      INTEGER NOT NULL,
+    assigned_to   TEXT NOT NULL,
+    summary       TEXT NOT NULL,
+    task_file     TEXT NOT NULL,
+    task_section  TEXT NOT NULL,
+    effort_hours  REAL NOT NULL,
+    claimed_by    TEXT,
+    lease_expires REAL,            -- Epoch seconds, while IN_PROGRESS
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    note          TEXT NOT NULL DEFAULT '',
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_state ON tasks (state, priority, id);
+"""
+
+Task = namedtuple('Task', [
+    'id', 'state', 'priority', 'assigned_to', 'summary', 'task_file', 'task_section',
+    'effort_hours', 'claimed_by', 'lease_expires', 'attempts', 'note',
+    'created_at', 'updated_at'])
+
+# Numbers the sockets of several waiters in one process
+_waiter_ids = itertools.count()
+
+# Tasks an agent may claim: pending, or in progress with an expired lease
+_CLAIMABLE = """
+    (state = 'PENDING' OR (state = 'IN_PROGRESS' AND lease_expires < :now))
+    AND upper(assigned_to) IN ('ANY', upper(:agent))
+"""
+
+
+def _iso(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def task_dict(task):
+    """A task as JSON-friendly dict (times as ISO 8601 UTC)."""
+    data = task._asdict()
+    for key in ('lease_expires', 'created_at', 'updated_at'):
+        data[key] = _iso(data[key])
+    return data
+
+
+class TaskQueue:
+    """The task queue of one .ai directory. Thread-safe; processes share it through SQLite."""
+
+    def __init__(self, directory=AI_DIR):
+        self.directory = Path(directory)
+        self.path = self.directory / 'tasks.db'
+        self.status_path = self.directory / 'STATUS'
+        self._lock = threading.Lock()
+        self._conn = None
+        # Waiting agents' sockets: in the temp dir, because unix socket
+        # paths are limited to ~100 bytes and project paths can be long
+        key = hashlib.sha1(str(self.path.resolve()).encode('utf-8')).hexdigest()[:12]
+        self.waiters_dir = Path(tempfile.gettempdir()) / f"ai-tq-{key}"
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _transaction(self, write=True):
+        """One transaction; other agents' writes wait for a write one (up to BUSY_TIMEOUT)."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT,
+                                             isolation_level=None, check_same_thread=False)
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.executescript(SCHEMA)
+            self._conn.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _select(self, conn, where='1', params=(), order='priority, id'):
+        rows = conn.execute(f'SELECT {", ".join(Task._fields)} FROM tasks '
+                            f'WHERE {where} ORDER BY {order}', params).fetchall()
+        return [Task(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def get(self, task_id):
+        with self._transaction(write=False) as conn:
+            found = self._select(conn, 'id = ?', (task_id,))
+        return found[0] if found else None
+
+    def tasks(self, states=('PENDING', 'IN_PROGRESS', 'BLOCKED')):
+        """Tasks in the given states, best first."""
+        marks = ', '.join('?' for _ in states)
+        with self._transaction(write=False) as conn:
+            return self._select(conn, f'state IN ({marks})', tuple(states))
+
+    def next_expiry(self):
+        """Epoch time the next lease runs out, or None."""
+        with self._transaction(write=False) as conn:
+            return conn.execute("SELECT min(lease_expires) FROM tasks "
+                                "WHERE state = 'IN_PROGRESS'").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Changes
+    # ------------------------------------------------------------------
+
+    def add(self, summary, priority=3, assigned_to='ANY', task_file='.ai/CURRENT_TASK.md',
+            task_section='', effort_hours=0):
+        """Queue a task; waiting agents wake up. Returns the Task."""
+        if priority not in (1, 2, 3, 4):
+            raise ValueError('priority must be 1 (critical) to 4 (low)')
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'INSERT INTO tasks (state, priority, assigned_to, summary, task_file,'
+                ' task_section, effort_hours, created_at, updated_at)'
+                " VALUES ('PENDING', ?, ?, ?, ?, ?, ?, ?, ?)",
+                (priority, assigned_to or 'ANY', summary, task_file, task_section,
+                 effort_hours, now, now))
+            task = self._select(conn, 'id = ?', (cursor.lastrowid,))[0]
+            self._write_status(conn)
+        self.notify()
+        return task
+
+    def claim(self, agent, lease=DEFAULT_LEASE):
+        """Atomically take the best task for agent; None if there is none."""
+        now = time.time()
+        with self._transaction() as conn:
+            found = self._select(conn, _CLAIMABLE, {'now': now, 'agent': agent},
+                                 order='priority, id LIMIT 1')
+            if not found:
+                return None
+            conn.execute("UPDATE tasks SET state = 'IN_PROGRESS', claimed_by = ?,"
+                         " lease_expires = ?, attempts = attempts + 1, updated_at = ?"
+                         " WHERE id = ?", (agent, now + lease, now, found[0].id))
+            task = self._select(conn, 'id = ?', (found[0].id,))[0]
+            self._write_status(conn)
+        return task
+
+    def heartbeat(self, task_id, agent, lease=DEFAULT_LEASE):
+        """Renew agent's lease on a task. False if the agent no longer holds it."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE id = ?"
+                " AND state = 'IN_PROGRESS' AND claimed_by = ?", (now + lease, now, task_id, agent))
+        return cursor.rowcount == 1
+
+    def complete(self, task_id, note=''):
+        """Mark a task DONE. False if there is no such open task."""
+        return self._set_state(task_id, 'DONE', note)
+
+    def block(self, task_id, note=''):
+        """Mark a task BLOCKED (not claimable until released)."""
+        return self._set_state(task_id, 'BLOCKED', note)
+
+    def release(self, task_id, note=''):
+        """Put a task back to PENDING (give it up, or unblock it); agents wake up."""
+        released = self._set_state(task_id, 'PENDING', note)
+        if released:
+            self.notify()
+        return released
+
+    def _set_state(self, task_id, state, note):
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = ?, claimed_by = NULL, lease_expires = NULL,"
+                " note = ?, updated_at = ? WHERE id = ? AND state != 'DONE'",
+                (state, note, now, task_id))
+            if cursor.rowcount:
+                self._write_status(conn)
+        return cursor.rowcount == 1
+
+    # ------------------------------------------------------------------
+    # Waiting
+    # ------------------------------------------------------------------
+
+    def wait_for_task(self, agent, timeout=None, lease=DEFAULT_LEASE):
+        """
+        Claim a task for agent, blocking until one is available.
+        Returns the Task, or None once timeout (seconds) has passed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._listening() as sock:
+            while True:
+                # The socket is open before this check, so a task added
+                # right after it still wakes us
+                task = self.claim(agent, lease)
+                if task is not None:
+                    return task
+                wait = WAIT_POLL_INTERVAL if sock is None else None
+                expiry = self.next_expiry()
+                if expiry is not None:
+                    until_expiry = max(expiry - time.time(), 0) + 0.01
+                    wait = until_expiry if wait is None else min(wait, until_expiry)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                if sock is None:
+                    time.sleep(wait)
+                    continue
+                sock.settimeout(wait)
+                try:
+                    sock.recv(64)
+                    sock.setblocking(False)
+                    while True:
+                        sock.recv(64)  # Several wake-ups at once count as one
+                except (socket.timeout, BlockingIOError):
+                    pass
+
+    @contextmanager
+    def _listening(self):
+        """A unix datagram socket writers can wake us through (None if unsupported)."""
+        if not hasattr(socket, 'AF_UNIX'):
+            yield None
+            return
+        self.waiters_dir.mkdir(mode=0o700, exist_ok=True)
+        path = self.waiters_dir / f"{os.getpid()}-{next(_waiter_ids)}.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            if path.exists():
+                path.unlink()
+            sock.bind(str(path))
+            yield sock
+        finally:
+            sock.close()
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def notify(self):
+        """Wake every waiting agent (they race to claim; losers wait again)."""
+        if not hasattr(socket, 'AF_UNIX') or not self.waiters_dir.is_dir():
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            for path in self.waiters_dir.glob('*.sock'):
+                try:
+                    sender.sendto(b'!', str(path))
+                except BlockingIOError:
+                    pass  # Its queue is full: it has wake-ups waiting already
+                except (ConnectionRefusedError, FileNotFoundError):
+                    try:
+                        path.unlink()  # Left behind by a killed waiter
+                    except FileNotFoundError:
+                        pass
+                except OSError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # .ai/STATUS mirror
+    # ------------------------------------------------------------------
+
+    def _write_status(self, conn):
+        """Rewrite .ai/STATUS to show the top task (comments and other keys kept)."""
+        open_tasks = self._select(conn, "state != 'DONE'")
+        pending = [t for t in open_tasks if t.state == 'PENDING']
+        order = {'PENDING': 0, 'IN_PROGRESS': 1, 'BLOCKED': 2}
+        top = min(open_tasks, key=lambda t: (order[t.state], t.priority, t.id), default=None)
+        values = {
+            'TASK_STATE': top.state if top else 'IDLE',
+            'TASK_FILE': top.task_file if top else '.ai/CURRENT_TASK.md',
+            'TASK_SECTION': top.task_section if top else '',
+            'PRIORITY': top.priority if top else 3,
+            'EFFORT_HOURS': f"{top.effort_hours:g}" if top else 0,
+            'ASSIGNED_TO': top.assigned_to if top else 'ANY',
+            'UPDATED_AT': _iso(time.time()),
+            'SUMMARY': top.summary if top else '',
+            'TASK_ID': top.id if top else 0,
+            'PENDING_TASKS': len(pending),
+        }
+        write_status(self.status_path, values)
+
+    def import_status(self):
+        """Queue the task described by .ai/STATUS, if it has one. Returns the Task or None."""
+        status = read_status(self.status_path)
+        if status.get('TASK_STATE') not in ('PENDING', 'IN_PROGRESS', 'BLOCKED'):
+            return None
+        try:
+            priority = min(max(int(status.get('PRIORITY', 3)), 1), 4)
+            effort = float(status.get('EFFORT_HOURS', 0) or 0)
+        except ValueError:
+            priority, effort = 3, 0
+        task = self.add(status.get('SUMMARY', ''), priority, status.get('ASSIGNED_TO', 'ANY'),
+                        status.get('TASK_FILE', '.ai/CURRENT_TASK.md'),
+                        status.get('TASK_SECTION', ''), effort)
+        if status['TASK_STATE'] == 'BLOCKED':
+            self.block(task.id)
+        return task
+
+
+def read_status(path):
+    """KEY=value pairs of a STATUS file (quotes removed)."""
+    values = {}
+    try:
+        lines = Path(path).read_text(encoding='utf-8').splitlines()
+    except FileNotFoundError:
+        return values
+    for line in lines:
+        key, sep, value = line.partition('=')
+        if sep and key.strip().isidentifier() and not line.lstrip().startswith('#'):
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                value = value[1:-1]
+            values[key.strip()] = value
+    return values
+
+
+def _shell_value(value):
+    if isinstance(value, int) or (isinstance(value, str) and value.replace('.', '', 1).isdigit()):
+        return str(value)
+    if isinstance(value, str) and value.isidentifier():
+        return value  # IDLE, PENDING, TCC, ...
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('$', '\\$').replace('`', '\\`')
+    return f'"{escaped}"'
+
+
+def write_status(path, values):
+    """Update KEY=value lines of a STATUS file in place (atomically), adding missing keys."""
+    path = Path(path)
+    try:
+        lines = path.read_text(encoding='utf-8').splitlines()
+    except FileNotFoundError:
+        lines = ['# AI Task Status - Machine Readable', '# Source this file or parse key=value pairs']
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        key = line.partition('=')[0].strip()
+        if '=' in line and key in remaining and not line.lstrip().startswith('#'):
+            lines[i] = f"{key}={_shell_value(remaining.pop(key))}"
+    if remaining:
+        lines.append('')
+        lines.append('# Task queue (.ai/task_queue.py)')
+        lines.extend(f"{key}={_shell_value(value)}" for key, value in remaining.items())
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    os.replace(tmp, path)
+
+
+# ============================================================================
+# Command line
+# ============================================================================
+
+def print_task(task, as_json=False):
+    if as_json:
+        print(json.dumps(task_dict(task)))
+        return
+    line = f"#{task.id} [{task.state}] P{task.priority} {task.assigned_to}: {task.summary}"
+    if task.claimed_by:
+        line += f" (claimed by {task.claimed_by}, lease until {_iso(task.lease_expires)})"
+    if task.note:
+        line += f" - {task.note}"
+    print(line)
+    if task.state == 'IN_PROGRESS' and not task.note:
+        print(f"   📋 {task.task_file}" + (f" → {task.task_section}" if task.task_section else ''))
+
+
+def main(argv=None):
+    agent_default = os.environ.get('AI_AGENT', 'ANY')
+    parser = argparse.ArgumentParser(description="AI task queue (replaces polling .ai/STATUS).")
+    parser.add_argument('--json', action='store_true', help='Print tasks as JSON')
+    sub = parser.add_subparsers(dest='action', required=True)
+
+    add = sub.add_parser('add', help='Queue a task')
+    add.add_argument('summary')
+    add.add_argument('--priority', type=int, default=3, choices=(1, 2, 3, 4))
+    add.add_argument('--assign', default='ANY', help='ANY, OCC, TCC or an agent name')
+    add.add_argument('--file', default='.ai/CURRENT_TASK.md', help='Detailed instructions')
+    add.add_argument('--section', default='')
+    add.add_argument('--effort', type=float, default=0, help='Estimated hours')
+
+    listing = sub.add_parser('list', help='Open tasks, best first')
+    listing.add_argument('--all', action='store_true', help='Include DONE tasks')
+
+    for name in ('claim', 'wait-for-task'):
+        claim = sub.add_parser(name, help='Take the best task for AGENT'
+                               + (' (blocks until there is one)' if name != 'claim' else ''))
+        claim.add_argument('agent', nargs='?', default=agent_default)
+        claim.add_argument('--lease', type=float, default=DEFAULT_LEASE, help='Seconds')
+        if name != 'claim':
+            claim.add_argument('--timeout', type=float, help='Give up after this many seconds')
+
+    heartbeat = sub.add_parser('heartbeat', help='Renew the lease on a claimed task')
+    heartbeat.add_argument('id', type=int)
+    heartbeat.add_argument('agent', nargs='?', default=agent_default)
+    heartbeat.add_argument('--lease', type=float, default=DEFAULT_LEASE)
+
+    for name, text in (('done', 'Mark a task done'), ('release', 'Back to PENDING'),
+                       ('block', 'Mark a task blocked')):
+        change = sub.add_parser(name, help=text)
+        change.add_argument('id', type=int)
+        change.add_argument('note', nargs='?', default='')
+
+    sub.add_parser('import-status', help='Queue the task currently in .ai/STATUS')
+    args = parser.parse_args(argv)
+
+    queue = TaskQueue()
+    try:
+        if args.action == 'add':
+            print_task(queue.add(args.summary, args.priority, args.assign, args.file,
+                                 args.section, args.effort), args.json)
+        elif args.action == 'list':
+            states = STATES if args.all else STATES[:3]
+            tasks = queue.tasks(states)
+            for task in tasks:
+                print_task(task, args.json)
+            if not tasks and not args.json:
+                print("✅ No open tasks")
+        elif args.action in ('claim', 'wait-for-task'):
+            if args.action == 'claim':
+                task = queue.claim(args.agent, args.lease)
+            else:
+                task = queue.wait_for_task(args.agent, args.timeout, args.lease)
+            if task is None:
+                if not args.json:
+                    print(f"✅ No task for {args.agent}")
+                return 1
+            print_task(task, args.json)
+        elif args.action == 'heartbeat':
+            if not queue.heartbeat(args.id, args.agent, args.lease):
+                print(f"❌ {args.agent} does not hold task #{args.id}", file=sys.stderr)
+                return 1
+        elif args.action == 'import-status':
+            task = queue.import_status()
+            if task is None:
+                print("✅ .ai/STATUS has no task to import")
+            else:
+                print_task(task, args.json)
+        else:
+            change = {'done': queue.complete, 'release': queue.release, 'block': queue.block}
+            if not change[args.action](args.id, args.note):
+                print(f"❌ No open task #{args.id}", file=sys.stderr)
+                return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
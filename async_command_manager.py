@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Async Web Interface
+===================================================================================
+
+PURPOSE:
+    The same web interface and API as web_command_manager.py, served by an
+    asyncio server (aiohttp) instead of a thread per request. One process
+    can hold thousands of open connections - including clients that
+    long-poll for changes - and a slow or network home directory stalls
+    only the requests that actually wait on it.
+
+USAGE:
+    Run: python3 async_command_manager.py [--port 5555] [--io-threads 16]
+    Then open browser to: http://localhost:5555
+
+    Long polling: send the ETag of your last GET /api/commands back as
+    If-None-Match together with ?wait=<seconds>. The reply comes as soon
+    as a command changes, or as an empty 304 when the wait runs out.
+
+    Namespaces (/api/<namespace>/commands, ...) work as in
+    web_command_manager.py; long polling is for the default commands only.
+
+HOW IT WORKS:
+    1. Routes, request parameters and JSON shapes are shared with
+       web_command_manager.py (list_commands, create_from_form, ...), so
+       both servers always answer the same way
+    2. Every filesystem call (directory scans, reads, crash-safe writes,
+       deletes) runs in a bounded thread pool; the event loop only
+       parses requests and writes responses
+    3. Directory scans are shared: concurrent requests wait for the scan
+       already in flight instead of starting their own, and changed files
+       are parsed in parallel
+    4. Long-polling clients and live-update streams (/api/commands/events)
+       sleep on an asyncio.Event that the command index sets whenever it
+       sees a change - no thread per waiting client, so there is no limit
+       on open pages
+
+REQUIREMENTS:
+    - Python 3.7+
+    - aiohttp (install with: pip3 install aiohttp)
+    - Flask (web_command_manager.py, whose helpers this server reuses)
+===================================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+import command_metrics
+from command_bulk import CONTENT_TYPES, FORMATS, BulkError, detect_format
+from command_events import KEEPALIVE, RETRY_MS
+from command_sync import BATCH_CONTENT_TYPE
+from command_tenants import NamespaceError, UnknownNamespace
+from web_command_manager import (
+    ASSETS, COMMAND_INDEX, DEFAULT_TENANT, EVENTS_KEEPALIVE_INTERVAL, EVENTS_RESCAN_INTERVAL,
+    NAMESPACES, SEARCH,
+    apply_sync_batch, create_from_form, import_status, index_etag, int_arg, list_commands,
+    match_phrase, matches_filter, namespace_stats, search_commands, sync_nodes)
+
+# Threads for blocking file I/O (scans, reads, writes). Bounded, so a burst
+# of clients queues up instead of starting thousands of threads.
+IO_THREADS = int(os.environ.get('AI_COMMANDS_IO_THREADS', '16'))
+
+# Threads for parsing changed command files during a scan (kept apart from
+# the I/O pool so a scan never waits on a pool it is itself running in)
+PARSE_THREADS = 4
+
+# Longest ?wait= a long-polling client may ask for, in seconds
+MAX_LONG_POLL = 60
+
+# While clients are long-polling, look for edits made outside this server
+# this often (in seconds)
+LONG_POLL_RESCAN_INTERVAL = 1.0
+
+# Largest request body accepted (bulk imports, sync batches)
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+
+
+class AsyncCommandServer:
+    """
+    Event-loop side of the command index: shared scans, bounded I/O and
+    change notifications for long-polling clients.
+
+    All methods must be called from the event loop, except index_changed(),
+    which the index calls from whatever thread did the refresh.
+    """
+
+    def __init__(self, index, io_threads=IO_THREADS):
+        self.index = index
+        self.io = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix='command-io')
+        self.parsers = ThreadPoolExecutor(max_workers=PARSE_THREADS, thread_name_prefix='command-parse')
+        self._io_threads = io_threads
+        self._io_slots = None       # Limits jobs queued for the I/O pool
+        self._loop = None
+        self._scan = None           # Refresh currently in flight, shared by callers
+        self._changed = None        # Event set (and replaced) on every index change
+        self._poll_waiters = 0
+        self._watcher = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        # Up to 4 jobs per I/O thread may queue in the pool; beyond that,
+        # requests wait on the event loop (costing nothing but a coroutine)
+        self._io_slots = asyncio.Semaphore(self._io_threads * 4)
+        self.index.executor = self.parsers
+        self.index.subscribe(self.index_changed)
+        self._watcher = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        self._watcher.cancel()
+        self.io.shutdown(wait=True)
+        self.parsers.shutdown(wait=True)
+
+    async def run_io(self, func, *args, **kwargs):
+        """Run a blocking function in the I/O pool without blocking the loop."""
+        async with self._io_slots:
+            return await self._loop.run_in_executor(self.io, lambda: func(*args, **kwargs))
+
+    async def refresh(self):
+        """Re-check the directory; callers arriving mid-scan share that scan."""
+        if self._scan is None:
+            self._scan = asyncio.ensure_future(self.run_io(self.index.refresh))
+            self._scan.add_done_callback(self._scan_done)
+        return await asyncio.shield(self._scan)
+
+    def _scan_done(self, task):
+        self._scan = None
+
+    async def snapshot(self):
+        """(fingerprint, changed_at, commands) after a shared refresh."""
+        await self.refresh()
+        return self.index.snapshot(refresh=False)
+
+    # ------------------------------------------------------------------
+    # Change notifications
+    # ------------------------------------------------------------------
+
+    def index_changed(self, index, changes):
+        """Index listener (any thread): wake every long-polling client."""
+        self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def change_event(self):
+        """The event the next index change will set. Grab it before looking."""
+        return self._changed
+
+    async def wait_for_change(self, event, timeout):
+        """Wait until `event` is set or `timeout` seconds pass."""
+        self._poll_waiters += 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._poll_waiters -= 1
+
+    async def _watch(self):
+        """Pick up outside edits for long-polling clients (only while any wait)."""
+        while True:
+            await asyncio.sleep(LONG_POLL_RESCAN_INTERVAL)
+            if self._poll_waiters:
+                try:
+                    await self.refresh()
+                except OSError:
+                    pass  # Directory briefly unreadable - try again next tick
+
+
+def etag_matches(request, etag):
+    """True if the request's If-None-Match names this ETag (or is *)."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate.strip('"') == etag:
+            return True
+    return False
+
+
+def is_fresh(request, etag, changed_at):
+    """Same rules as not_modified() in web_command_manager.py."""
+    if request.headers.get('If-None-Match'):
+        return etag_matches(request, etag)
+    since = request.if_modified_since
+    last_modified = datetime.fromtimestamp(int(changed_at), tz=timezone.utc)
+    return since is not None and since >= last_modified
+
+
+def with_cache_headers(response, etag, changed_at):
+    """Attach validators so the next poll can be a cheap conditional request."""
+    response.etag = etag
+    response.last_modified = int(changed_at)
+    # Cache, but always revalidate - the list can change at any time
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# ============================================================================
+# API ROUTES: Same paths and JSON as web_command_manager.py
+# ============================================================================
+
+routes = web.RouteTableDef()
+
+
+async def request_tenant(request, create=False):
+    """
+    The commands a request is about: the default ones, or those of the
+    namespace in its path (/api/{namespace}/...), loaded in the I/O pool
+    on first use - see tenant_for() in web_command_manager.py. It stays in
+    use until the handler returns (see release_tenants()), which for a
+    live-changes stream is when the stream closes.
+    """
+    namespace = request.match_info.get('namespace')
+    if namespace is None:
+        return DEFAULT_TENANT
+    load = asyncio.ensure_future(request.app['server'].run_io(NAMESPACES.get, namespace, create))
+    try:
+        tenant = await asyncio.shield(load)
+    except asyncio.CancelledError:
+        load.add_done_callback(release_loaded)  # Client went away mid-load
+        raise
+    except NamespaceError as e:
+        raise web.HTTPBadRequest(text=json.dumps({'success': False, 'error': str(e)}),
+                                 content_type='application/json')
+    except UnknownNamespace as e:
+        raise web.HTTPNotFound(text=json.dumps({'success': False, 'error': str(e)}),
+                               content_type='application/json')
+    request.setdefault('tenants', []).append(tenant)
+    return tenant
+
+
+def release_loaded(load):
+    """Release a tenant whose request was cancelled while it loaded."""
+    if not load.cancelled() and load.exception() is None:
+        NAMESPACES.release(load.result())
+
+
+@web.middleware
+async def release_tenants(request, handler):
+    """Let the namespaces a request used be evicted again once it's answered."""
+    try:
+        return await handler(request)
+    finally:
+        for tenant in request.pop('tenants', ()):
+            NAMESPACES.release(tenant)
+
+
+@routes.get('/')
+async def index(request):
+    """HOME PAGE: the same HTML interface as the Flask server."""
+    return asset_response(request, ASSETS.page_name)
+
+
+@routes.get('/static/{name}')
+async def static_asset(request):
+    """STYLES AND SCRIPT: see static_asset() in web_command_manager.py."""
+    return asset_response(request, request.match_info['name'])
+
+
+def asset_response(request, name):
+    """aiohttp response for one UI file (already in memory - no I/O)."""
+    status, headers, body = ASSETS.respond(name, request.headers.get('If-None-Match'),
+                                           request.headers.get('Accept-Encoding'))
+    return web.Response(body=body, status=status, headers=headers)
+
+
+@routes.get('/api/commands')
+@routes.get('/api/{namespace}/commands')
+async def get_commands(request):
+    """
+    GET ALL COMMANDS: see get_commands() in web_command_manager.py.
+
+    Extra query parameter:
+        wait: Seconds (max 60) to hold the request open while the client's
+              If-None-Match is still current, answering as soon as any
+              command changes. Without it, a current ETag gets 304 at once.
+              (Default commands only; namespaces answer at once.)
+    """
+    server = request.app['server']
+    tenant = await request_tenant(request)
+    if tenant is not DEFAULT_TENANT:
+        fingerprint, changed_at, commands = await server.run_io(tenant.index.snapshot)
+        return commands_response(request, fingerprint, changed_at, commands)
+    wait = max(0, min(int_arg(request.query, 'wait', 0), MAX_LONG_POLL))
+
+    event = server.change_event()
+    fingerprint, changed_at, commands = await server.snapshot()
+    etag = index_etag(fingerprint)
+    if wait and etag_matches(request, etag):
+        await server.wait_for_change(event, wait)
+        fingerprint, changed_at, commands = server.index.snapshot(refresh=False)
+    return commands_response(request, fingerprint, changed_at, commands)
+
+
+def commands_response(request, fingerprint, changed_at, commands):
+    """The listing for one index state, or 304 if the client has it."""
+    etag = index_etag(fingerprint)
+    if is_fresh(request, etag, changed_at):
+        return with_cache_headers(web.Response(status=304), etag, changed_at)
+
+    payload, status = list_commands(commands, request.query)
+    return with_cache_headers(web.json_response(payload, status=status), etag, changed_at)
+
+
+@routes.post('/api/commands')
+@routes.post('/api/{namespace}/commands')
+async def create_command(request):
+    """CREATE COMMAND: see create_command() in web_command_manager.py."""
+    server = request.app['server']
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    tenant = await request_tenant(request, create=True)
+    payload, status = await server.run_io(create_from_form, data, tenant)
+    return web.json_response(payload, status=status)
+
+
+@routes.post('/api/commands/bulk')
+@routes.post('/api/{namespace}/commands/bulk')
+async def bulk_import(request):
+    """BULK IMPORT: see bulk_import() in web_command_manager.py."""
+    server = request.app['server']
+    fmt = request.query.get('format') or detect_format(request.headers.get('Content-Type', ''))
+    if fmt not in FORMATS:
+        return web.json_response({'success': False, 'error': f'Unknown format: {fmt}'}, status=400)
+    partial = request.query.get('partial', '') in ('1', 'true', 'yes')
+    overwrite = request.query.get('overwrite', '') in ('1', 'true', 'yes')
+
+    tenant = await request_tenant(request, create=True)
+    data = await request.read()
+    try:
+        result = await server.run_io(tenant.store.import_bundle, data, fmt, partial=partial,
+                                     overwrite=overwrite)
+    except BulkError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    return web.json_response(result, status=import_status(result))
+
+
+@routes.get('/api/commands/export')
+@routes.get('/api/{namespace}/commands/export')
+async def bulk_export(request):
+    """BULK EXPORT: see bulk_export() in web_command_manager.py."""
+    server = request.app['server']
+    fmt = request.query.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return web.json_response({'success': False, 'error': f'Unknown format: {fmt}'}, status=400)
+    query = request.query.get('q', '').strip().lower()
+
+    tenant = await request_tenant(request)
+    if tenant is DEFAULT_TENANT:
+        _, _, commands = await server.snapshot()
+    else:
+        commands = await server.run_io(tenant.index.commands)
+    if query:
+        commands = [cmd for cmd in commands if matches_filter(cmd, query)]
+
+    extension = 'tar.gz' if fmt == 'tar' else fmt
+    body = await server.run_io(tenant.store.export_bundle, commands, fmt)
+    return web.Response(body=body, content_type=CONTENT_TYPES[fmt], headers={
+        'Content-Disposition': f'attachment; filename=commands.{extension}'})
+
+
+@routes.delete('/api/commands/{filename}')
+@routes.delete('/api/{namespace}/commands/{filename}')
+async def delete_command(request):
+    """DELETE COMMAND: see delete_command() in web_command_manager.py."""
+    server = request.app['server']
+    filename = request.match_info['filename']
+
+    tenant = await request_tenant(request)
+    if await server.run_io(tenant.store.delete, filename):
+        return web.json_response({'success': True})
+    return web.json_response({'success': False}, status=404)
+
+
+@routes.get('/api/commands/events')
+@routes.get('/api/{namespace}/commands/events')
+async def command_events(request):
+    """
+    LIVE CHANGES: see command_events() in web_command_manager.py.
+
+    Namespaces' indexes don't notify the event loop, so their streams look
+    for changes every EVENTS_RESCAN_INTERVAL instead of being woken.
+    """
+    server = request.app['server']
+    tenant = await request_tenant(request)
+    feed = tenant.feed
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    await response.prepare(request)
+    feed.open_stream()
+    try:
+        await response.write(f"retry: {RETRY_MS}\n\n".encode())
+        seq = feed.resume(request.headers.get('Last-Event-ID'))
+        idle = 0.0
+        while True:
+            event = server.change_event()
+            messages, seq = feed.messages(seq)
+            if messages:
+                idle = 0.0
+                await response.write(''.join(messages).encode())
+                continue
+            if tenant is DEFAULT_TENANT:
+                await server.wait_for_change(event, EVENTS_KEEPALIVE_INTERVAL)
+                if not event.is_set():
+                    await response.write(KEEPALIVE.encode())
+                continue
+            await asyncio.sleep(EVENTS_RESCAN_INTERVAL)
+            await server.run_io(tenant.index.refresh, EVENTS_RESCAN_INTERVAL)
+            idle += EVENTS_RESCAN_INTERVAL
+            if idle >= EVENTS_KEEPALIVE_INTERVAL:
+                idle = 0.0
+                await response.write(KEEPALIVE.encode())
+    except ConnectionError:
+        pass  # Browser went away
+    finally:
+        feed.close_stream()
+    return response
+
+
+@routes.get('/api/match')
+@routes.get('/api/{namespace}/match')
+async def match_command(request):
+    """MATCH PHRASE: see match_command() in web_command_manager.py."""
+    server = request.app['server']
+    tenant = await request_tenant(request)
+    # Lookups are in-memory, but may trigger the occasional rescan
+    payload, status = await server.run_io(match_phrase, request.query, tenant)
+    return web.json_response(payload, status=status)
+
+
+@routes.get('/metrics')
+async def metrics(request):
+    """METRICS: see metrics() in web_command_manager.py (same registry)."""
+    return web.Response(body=command_metrics.REGISTRY.render().encode('utf-8'),
+                        headers={'Content-Type': command_metrics.CONTENT_TYPE})
+
+
+@routes.get('/api/search')
+@routes.get('/api/{namespace}/search')
+async def search_command(request):
+    """SEARCH: see search_command() in web_command_manager.py."""
+    server = request.app['server']
+    tenant = await request_tenant(request)
+    # Scoring is in-memory, but snippets may read a few command files
+    payload, status = await server.run_io(search_commands, request.query, tenant)
+    return web.json_response(payload, status=status)
+
+
+@routes.get('/api/namespaces')
+async def list_namespaces(request):
+    """NAMESPACES: see list_namespaces() in web_command_manager.py."""
+    server = request.app['server']
+    return web.json_response(await server.run_io(namespace_stats))
+
+
+@routes.post('/api/sync/tree')
+@routes.post('/api/{namespace}/sync/tree')
+async def sync_tree(request):
+    """SYNC TREE: see sync_tree() in web_command_manager.py."""
+    server = request.app['server']
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    tenant = await request_tenant(request, create=True)
+    # Building the tree may rescan the directory and read the manifest
+    payload, status = await server.run_io(sync_nodes, data, tenant)
+    return web.json_response(payload, status=status)
+
+
+@routes.post('/api/sync/fetch')
+@routes.post('/api/{namespace}/sync/fetch')
+async def sync_fetch(request):
+    """SYNC FETCH: see sync_fetch() in web_command_manager.py."""
+    server = request.app['server']
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    tenant = await request_tenant(request)
+    try:
+        body = await server.run_io(tenant.sync.fetch,
+                                   data.get('files') if isinstance(data, dict) else None)
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    return web.Response(body=body, content_type=BATCH_CONTENT_TYPE)
+
+
+@routes.post('/api/sync/apply')
+@routes.post('/api/{namespace}/sync/apply')
+async def sync_apply(request):
+    """SYNC APPLY: see sync_apply() in web_command_manager.py."""
+    server = request.app['server']
+    tenant = await request_tenant(request, create=True)
+    data = await request.read()
+    payload, status = await server.run_io(apply_sync_batch, data, tenant)
+    return web.json_response(payload, status=status)
+
+
+# ============================================================================
+# INSTRUMENTATION: Request timings for /metrics
+# ============================================================================
+
+@web.middleware
+async def time_request(request, handler):
+    """
+    Time and count every request. Streams (live updates) are recorded
+    when their headers go out, in record_request(), so they count their
+    time to first byte rather than how long the page stayed open.
+    """
+    request['metrics_started'] = command_metrics.request_started()
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        record_request(request, e)
+        raise
+    except asyncio.CancelledError:
+        record_request(request, None, 499)  # Client went away (nginx's code for it)
+        raise
+    except Exception:
+        record_request(request, None, 500)
+        raise
+    record_request(request, response)
+    return response
+
+
+async def on_response_prepare(request, response):
+    record_request(request, response)
+
+
+def record_request(request, response, status=None):
+    """Record a request once - whichever of the hooks above sees it first."""
+    started = request.pop('metrics_started', None)
+    if started is not None:
+        command_metrics.request_finished(started, request.method, request_route(request),
+                                         response.status if status is None else status)
+
+
+def request_route(request):
+    """Route pattern of a request (/api/commands/{filename}), not its raw URL."""
+    resource = request.match_info.route.resource
+    return resource.canonical if resource is not None else 'unmatched'
+
+
+# ============================================================================
+# MAIN: Start the web server
+# ============================================================================
+
+def make_app(index=COMMAND_INDEX, io_threads=IO_THREADS):
+    """Build the aiohttp application (also handy for aiohttp's test client)."""
+    app = web.Application(client_max_size=MAX_UPLOAD_BYTES, middlewares=[time_request, release_tenants])
+    app['server'] = AsyncCommandServer(index, io_threads)
+    app.add_routes(routes)
+
+    async def on_startup(app):
+        await app['server'].start()
+
+    async def on_cleanup(app):
+        await app['server'].stop()
+
+    app.on_response_prepare.append(on_response_prepare)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def serve(host='0.0.0.0', port=5555, io_threads=IO_THREADS):
+    """Run the async server until Ctrl+C."""
+    print("\n🎯 AI Command Manager (async)")
+    print("=" * 50)
+    print(f"Open your browser to: http://localhost:{port}")
+    print(f"aiohttp: 1 process, {io_threads} file I/O threads")
+    print("=" * 50)
+    print("\nPress Ctrl+C to stop\n")
+    SEARCH.build_in_background()   # Command bodies are indexed while serving
+    web.run_app(make_app(io_threads=io_threads), host=host, port=port, print=None)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Command Manager - async web interface")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--io-threads', type=int, default=IO_THREADS,
+                        help='Threads for blocking file I/O')
+    args = parser.parse_args(argv)
+    return serve(args.host, args.port, max(1, args.io_threads))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
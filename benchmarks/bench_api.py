@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+Benchmark: Web API Throughput and Latency
+===================================================================================
+
+PURPOSE:
+    Measures the command manager's HTTP API on synthetic command libraries
+    of any size (see corpus.py), and saves the numbers as JSON so a change
+    can be compared with the commit before it.
+
+USAGE:
+    # In-process, through Flask's test client (handler cost only)
+    python3 benchmarks/bench_api.py --sizes 1000 10000 --output before.json
+
+    # Against a real server over HTTP, with 16 concurrent clients
+    python3 benchmarks/bench_api.py --client http --server waitress --concurrency 16
+
+    # Compare two runs; exits 1 if anything got more than 10% worse
+    python3 benchmarks/bench_api.py compare before.json after.json
+
+HOW IT WORKS:
+    1. For each size a fresh corpus is generated in a temp directory (same
+       --seed, same corpus) and the manager is started on it with
+       AI_COMMANDS_DIR. Start-up time is recorded (cold: no manifest yet)
+    2. Each operation is timed request by request:
+           index      GET /                     (the page)
+           list_page  GET /api/commands?limit=100&offset=...
+           list_all   GET /api/commands         (whole list; fewer requests)
+           list_304   GET /api/commands with If-None-Match
+           search     GET /api/search?q=...
+           create     POST /api/commands
+           delete     DELETE /api/commands/<created filename>
+    3. Per operation: requests, errors, throughput (requests/s) and
+       p50/p95/p99/max latency in milliseconds
+    4. The JSON also records the commit, Python version and settings
+
+    --client test runs one request at a time in a subprocess (each size
+    needs a fresh import of the manager). --client http starts
+    web_command_manager.py serve (any --server it supports) and drives it
+    from --concurrency threads with keep-alive connections. The server is
+    stopped (workers and all) however the run ends - Ctrl+C, SIGTERM or
+    `timeout` included.
+===================================================================================
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from command_frontmatter import command_filename  # noqa: E402
+from corpus import generate  # noqa: E402
+
+OPERATIONS = ('index', 'list_page', 'list_all', 'list_304', 'search', 'create', 'delete')
+
+# Status each operation should answer with; anything else counts as an error
+EXPECTED_STATUS = {'list_304': 304}
+
+# Seconds to wait for a server to start (parsing a 100k corpus takes a while)
+SERVER_START_TIMEOUT = 300
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def git_commit():
+    """(short commit hash, uncommitted changes?) of the tree being measured."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=ROOT, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+# ----------------------------------------------------------------------
+# Clients: send one request, return (status, response headers)
+# ----------------------------------------------------------------------
+
+class TestClient:
+    """Flask's test client: no sockets, just the request handlers."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self._client.open(path, method=method, json=body, headers=headers or {})
+        response.get_data()
+        return response.status_code, response.headers
+
+
+class HTTPClient:
+    """Keep-alive HTTP connections, one per thread."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status, response.headers
+            except (http.client.HTTPException, OSError):
+                # Server closed the keep-alive connection: reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+
+
+# ----------------------------------------------------------------------
+# Running operations
+# ----------------------------------------------------------------------
+
+def plan_requests(op, client, filenames, count, rng, created):
+    """The (method, path, body, headers) requests for one operation."""
+    if op == 'index':
+        return [('GET', '/', None, None)] * count
+    if op == 'list_page':
+        return [('GET', f'/api/commands?limit=100&offset={rng.randrange(max(len(filenames), 1))}',
+                 None, None) for _ in range(count)]
+    if op == 'list_all':
+        return [('GET', '/api/commands', None, None)] * max(10, count // 10)
+    if op == 'list_304':
+        _, headers = client.request('GET', '/api/commands')
+        return [('GET', '/api/commands', None, {'If-None-Match': headers['ETag']})] * count
+    if op == 'search':
+        words = [name.split('-')[0] for name in rng.sample(filenames, min(count, len(filenames)))]
+        queries = [word if i % 2 else word[:4] for i, word in enumerate(words)]  # Half as prefixes
+        return [('GET', f'/api/search?q={rng.choice(queries)}', None, None) for _ in range(count)]
+    if op == 'create':
+        requests = []
+        for i in range(count):
+            phrase = f"bench command {i} {rng.randrange(10 ** 9)}"
+            created.append(command_filename(phrase))
+            requests.append(('POST', '/api/commands',
+                             {'phrase': phrase, 'action': './bench.sh', 'description': 'Benchmark'}, None))
+        return requests
+    if op == 'delete':
+        return [('DELETE', f'/api/commands/{name}', None, None) for name in created]
+    raise ValueError(op)
+
+
+def run_operation(client, requests, concurrency, expected):
+    """Send requests from `concurrency` threads; return the latency statistics."""
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    pending = iter(requests)
+
+    def worker():
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                return
+            method, path, body, headers = item
+            start = time.perf_counter()
+            try:
+                status, _ = client.request(method, path, body, headers)
+            except (http.client.HTTPException, OSError):
+                status = None
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                samples.append(elapsed)
+                if status != expected:
+                    errors[0] += 1
+
+    # Daemon threads: an interrupted run exits instead of waiting for them
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+    if not samples:
+        return {'requests': 0}
+    return {
+        'requests': len(samples),
+        'errors': errors[0],
+        'throughput_rps': round(len(samples) / duration, 1),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def run_operations(client, directory, requests, concurrency, seed):
+    rng = random.Random(seed)
+    filenames = sorted(p.stem for p in Path(directory).glob('*.md'))
+    created, results = [], {}
+    for op in OPERATIONS:
+        plan = plan_requests(op, client, filenames, requests, rng, created)
+        results[op] = run_operation(client, plan, concurrency, EXPECTED_STATUS.get(op, 200))
+    return results
+
+
+# ----------------------------------------------------------------------
+# One corpus size
+# ----------------------------------------------------------------------
+
+def worker_main(args):
+    """--client test, in a subprocess: import the manager on the corpus and measure."""
+    os.environ['AI_COMMANDS_DIR'] = str(args.dir)
+    start = time.perf_counter()
+    import web_command_manager
+    startup_s = time.perf_counter() - start
+    web_command_manager.SEARCH.search('warm up')  # Wait for the background index build
+    client = TestClient(web_command_manager.app)
+    operations = run_operations(client, args.dir, args.requests, 1, args.seed)
+    print(json.dumps({'startup_s': round(startup_s, 3), 'operations': operations}))
+    return 0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def stop_server(server):
+    """SIGTERM the server's process group; SIGKILL it if it's still there after 10 s."""
+    for sig, wait in ((signal.SIGTERM, 10), (signal.SIGKILL, None)):
+        try:
+            os.killpg(server.pid, sig)
+        except ProcessLookupError:
+            pass
+        try:
+            server.wait(timeout=wait)
+            return
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def exit_on_signals():
+    """
+    Turn SIGTERM and SIGHUP (`timeout`, a CI job being cancelled, a closed
+    terminal) into SystemExit, so `finally` blocks still stop the servers.
+    """
+    def handler(signum, frame):
+        raise SystemExit(128 + signum)
+
+    for name in ('SIGTERM', 'SIGHUP'):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handler)
+
+
+def run_http(args, directory):
+    """Start a real server on the corpus and load it over HTTP."""
+    port = free_port()
+    env = dict(os.environ, AI_COMMANDS_DIR=str(directory))
+    command = [sys.executable, str(ROOT / 'web_command_manager.py'), 'serve',
+               '--host', '127.0.0.1', '--port', str(port), '--server', args.server,
+               '--threads', str(args.threads)]
+    if args.workers:
+        command += ['--workers', str(args.workers)]
+    start = time.perf_counter()
+    # The server's log goes to a file, read only if it fails to start: a
+    # pipe nobody reads fills up (~64 KB of access log) and blocks it.
+    # Its own process group, so stopping it stops its workers too
+    log = tempfile.TemporaryFile()
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=log,
+                              start_new_session=True)
+    try:
+        client = HTTPClient('127.0.0.1', port)
+        while True:
+            if server.poll() is not None:
+                log.seek(0)
+                raise RuntimeError(f"server exited: {log.read().decode(errors='replace')}")
+            try:
+                if client.request('GET', '/api/commands?limit=1')[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.perf_counter() - start > SERVER_START_TIMEOUT:
+                raise RuntimeError('server did not start')
+            time.sleep(0.05)
+        startup_s = time.perf_counter() - start
+        client.request('GET', '/api/search?q=warm')  # Build the search index outside the timing
+        operations = run_operations(client, directory, args.requests, args.concurrency, args.seed)
+    finally:
+        stop_server(server)
+        log.close()
+    return {'startup_s': round(startup_s, 3), 'operations': operations}
+
+
+def run_test_client(args, directory):
+    command = [sys.executable, __file__, 'worker', '--dir', str(directory),
+               '--requests', str(args.requests), '--seed', str(args.seed)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_size(args, size):
+    with tempfile.TemporaryDirectory(prefix=f'commands-{size}-') as tmp:
+        start = time.perf_counter()
+        generate(tmp, size, args.body_bytes, args.aliases, args.seed)
+        corpus_s = time.perf_counter() - start
+        result = run_http(args, tmp) if args.client == 'http' else run_test_client(args, tmp)
+    return {'commands': size, 'corpus_s': round(corpus_s, 3), **result}
+
+
+# ----------------------------------------------------------------------
+# Comparing runs
+# ----------------------------------------------------------------------
+
+def compare(base_path, new_path, threshold):
+    """Print the change per size and operation; return 1 if anything regressed."""
+    base = json.loads(Path(base_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    base_runs = {run['commands']: run for run in base['runs']}
+    print(f"{base.get('commit')} -> {new.get('commit')}  (regression: > {threshold:.0%} worse)")
+    settings = ('client', 'server', 'concurrency', 'requests', 'body_bytes', 'aliases', 'seed')
+    differ = [key for key in settings if base.get(key) != new.get(key)]
+    if differ:
+        print(f"Warning: runs used different settings ({', '.join(differ)}); "
+              "the numbers are not directly comparable")
+    print(f"{'commands':>8}  {'operation':<10} {'p50 ms':>16} {'p99 ms':>16} {'req/s':>18}")
+    regressed = False
+
+    def change(old, value, higher_is_better=False):
+        nonlocal regressed
+        if not old:
+            return f"{value:>8}"
+        delta = (value - old) / old
+        worse = -delta if higher_is_better else delta
+        flag = '!' if worse > threshold else ' '
+        regressed = regressed or worse > threshold
+        return f"{value:>8} {delta:+6.0%}{flag}"
+
+    for run in new['runs']:
+        old_run = base_runs.get(run['commands'])
+        if old_run is None:
+            continue
+        for op, stats in run['operations'].items():
+            old = old_run['operations'].get(op)
+            if not old or not stats.get('requests') or not old.get('requests'):
+                continue
+            print(f"{run['commands']:>8}  {op:<10} {change(old['p50_ms'], stats['p50_ms'])}"
+                  f" {change(old['p99_ms'], stats['p99_ms'])}"
+                  f" {change(old['throughput_rps'], stats['throughput_rps'], True)}")
+    return 1 if regressed else 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        parser = argparse.ArgumentParser(prog='bench_api.py compare',
+                                         description='Compare two benchmark JSON files')
+        parser.add_argument('base')
+        parser.add_argument('new')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help='Relative slowdown that counts as a regression (default 0.10)')
+        args = parser.parse_args(sys.argv[2:])
+        return compare(args.base, args.new, args.threshold)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        parser = argparse.ArgumentParser(prog='bench_api.py worker')
+        parser.add_argument('--dir', type=Path, required=True)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+        return worker_main(parser.parse_args(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3].strip())
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per operation')
+    parser.add_argument('--client', choices=('test', 'http'), default='test')
+    parser.add_argument('--server', choices=('auto', 'gunicorn', 'waitress', 'flask', 'aiohttp'),
+                        default='auto', help='Server for --client http')
+    parser.add_argument('--workers', type=int, help='Server worker processes (gunicorn)')
+    parser.add_argument('--threads', type=int, default=8, help='Server threads per worker')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Concurrent clients for --client http')
+    parser.add_argument('--body-bytes', type=int, nargs=2, default=[100, 2000], metavar=('MIN', 'MAX'))
+    parser.add_argument('--aliases', type=int, nargs=2, default=[1, 4], metavar=('MIN', 'MAX'))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, help='Write the JSON here instead of stdout')
+    args = parser.parse_args()
+    exit_on_signals()
+
+    commit, dirty = git_commit()
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'client': args.client,
+        'server': args.server if args.client == 'http' else None,
+        'concurrency': args.concurrency if args.client == 'http' else 1,
+        'requests': args.requests,
+        'body_bytes': args.body_bytes,
+        'aliases': args.aliases,
+        'seed': args.seed,
+        'runs': [],
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size} commands...", file=sys.stderr)
+        report['runs'].append(run_size(args, size))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n')
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
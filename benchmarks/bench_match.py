@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+Benchmark: Phrase Matcher Lookup Latency
+===================================================================================
+
+PURPOSE:
+    Measures how long PhraseMatcher lookups take as the number of aliases
+    grows, to check that fuzzy matching stays fast without brute force.
+
+USAGE:
+    python3 benchmarks/bench_match.py
+    python3 benchmarks/bench_match.py --sizes 1000 10000 --queries 2000 --json
+
+HOW IT WORKS:
+    1. Builds a matcher from N synthetic aliases (2-4 words each)
+    2. Runs queries that are real aliases with one or two typos
+       (dropped, doubled or swapped letters - like voice transcription slips)
+    3. Reports p50/p99 latency per lookup mode, in milliseconds, and how
+       often fuzzy matching ranks the intended alias first (top1)
+===================================================================================
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from command_matcher import PhraseMatcher  # noqa: E402
+
+# English letter frequencies, so synthetic words share trigrams about as
+# often as real ones do
+LETTERS = 'etaoinshrdlcumwfgypbvkjxqz'
+LETTER_WEIGHTS = [12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8,
+                  2.4, 2.4, 2.2, 2.0, 2.0, 1.9, 1.5, 1.0, 0.8, 0.15, 0.15, 0.1, 0.07]
+
+
+def make_vocabulary(rng, size=8000):
+    """Pseudo-words of 3-9 letters."""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(LETTERS, LETTER_WEIGHTS, k=rng.randint(3, 9))))
+    return sorted(words)
+
+
+def make_aliases(rng, vocabulary, count):
+    aliases = set()
+    while len(aliases) < count:
+        aliases.add(' '.join(rng.sample(vocabulary, rng.randint(2, 4))))
+    return sorted(aliases)
+
+
+def add_typos(rng, phrase, typos):
+    chars = list(phrase)
+    for _ in range(typos):
+        i = rng.randrange(len(chars) - 1)
+        action = rng.choice(('drop', 'double', 'swap'))
+        if action == 'drop':
+            del chars[i]
+        elif action == 'double':
+            chars.insert(i, chars[i])
+        else:
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return ''.join(chars)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_lookups(lookup, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        lookup(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': round(percentile(samples, 50), 4),
+        'p99_ms': round(percentile(samples, 99), 4),
+    }
+
+
+def run(size, queries, seed):
+    rng = random.Random(seed)
+    aliases = make_aliases(rng, make_vocabulary(rng), size)
+
+    matcher = PhraseMatcher()
+    start = time.perf_counter()
+    # Three aliases per command, like a typical "phrase + 2 extra phrases" form
+    for i in range(0, len(aliases), 3):
+        matcher.add(f"cmd-{i}", aliases[i:i + 3])
+    build_s = time.perf_counter() - start
+
+    picked = [rng.choice(aliases) for _ in range(queries)]
+    typo_queries = [add_typos(rng, q, rng.randint(1, 2)) for q in picked]
+    sentences = [f"ok please {q} now" for q in picked]
+    matcher.contains('warm up')  # Build Aho-Corasick links outside the timing
+
+    fuzzy = time_lookups(matcher.fuzzy, typo_queries)
+    # How often the intended alias is the top fuzzy hit
+    hits = sum(1 for q, typo in zip(picked, typo_queries)
+               if [m.alias for m in matcher.fuzzy(typo, limit=1)] == [q])
+    fuzzy['top1'] = round(hits / len(picked), 3)
+
+    return {
+        'aliases': size,
+        'build_s': round(build_s, 3),
+        'exact': time_lookups(matcher.exact, picked),
+        'contains': time_lookups(matcher.contains, sentences),
+        'fuzzy': fuzzy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3].strip())
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = [run(size, args.queries, args.seed) for size in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'aliases':>8}  {'build':>7}  {'mode':<9} {'p50 ms':>8} {'p99 ms':>8}  top1")
+    for r in results:
+        for mode in ('exact', 'contains', 'fuzzy'):
+            print(f"{r['aliases']:>8}  {r['build_s']:>6}s  {mode:<9} "
+                  f"{r[mode]['p50_ms']:>8} {r[mode]['p99_ms']:>8}  {r[mode].get('top1', '')}")
+
+
+if __name__ == '__main__':
+    main()
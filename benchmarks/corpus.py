@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+Benchmark Helper: Synthetic Command Corpus Generator
+===================================================================================
+
+PURPOSE:
+    Fills a commands directory with N realistic-looking command files, so
+    the command manager can be benchmarked at 1k, 10k or 100k commands
+    without anybody's real command library.
+
+USAGE:
+    python3 benchmarks/corpus.py /tmp/commands-10k --count 10000
+    python3 benchmarks/corpus.py /tmp/commands-big --count 100000 --body-bytes 200 20000
+
+    from corpus import generate
+    generate(directory, 10000, seed=42)
+
+HOW IT WORKS:
+    1. Phrases are 2-4 pseudo-words; each command gets 1-4 aliases
+       (--aliases), like the "phrase + extra phrases" form
+    2. Bodies are shell-ish lines and prose of random length
+       (--body-bytes MIN MAX), so long-body costs show up
+    3. Files are written with render_command(), byte-for-byte what the
+       web manager and the GUI write
+    4. The same --seed always gives the same corpus, so runs on different
+       commits are comparable
+===================================================================================
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from command_frontmatter import command_filename, render_command  # noqa: E402
+
+SYLLABLES = ('ka', 'ro', 'te', 'mi', 'su', 'dan', 'lo', 'ver', 'chi', 'ne',
+             'pa', 'tor', 'gu', 'ly', 'shi', 'ben', 'qua', 'zi', 'mo', 'ret')
+
+# Body lines: a mix of commands and instructions, like real command files
+BODY_LINES = (
+    './{word}_{word}.sh --{word}',
+    'git {word} && ./run_{word}.sh',
+    'npm run {word}:{word}',
+    'Check the {word} logs and report any {word} errors',
+    'Run all {word} tests and summarize the results',
+    'Open {word}/{word}.md and update the {word} section',
+    'python3 scripts/{word}.py --target {word}',
+)
+
+
+def make_words(rng, size=5000):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_body(rng, words, size):
+    lines, length = [], 0
+    while length < size:
+        line = rng.choice(BODY_LINES).format_map(_Words(rng, words))
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)
+
+
+class _Words(dict):
+    """format_map() helper: every {word} is a new random word."""
+
+    def __init__(self, rng, words):
+        super().__init__()
+        self._rng, self._words = rng, words
+
+    def __missing__(self, key):
+        return self._rng.choice(self._words)
+
+
+def generate(directory, count, body_bytes=(100, 2000), aliases=(1, 4), seed=42):
+    """
+    Write `count` command files into directory (created if needed).
+
+    Returns the list of filenames written (without .md), in creation order.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    words = make_words(rng)
+    filenames, taken = [], set()
+    while len(filenames) < count:
+        phrase = ' '.join(rng.sample(words, rng.randint(2, 4)))
+        filename = command_filename(phrase)
+        if filename in taken:
+            continue
+        taken.add(filename)
+        extra = [' '.join(rng.sample(words, rng.randint(2, 3)))
+                 for _ in range(rng.randint(*aliases) - 1)]
+        description = f"{rng.choice(words).capitalize()} the {rng.choice(words)} {rng.choice(words)}"
+        body = make_body(rng, words, rng.randint(*body_bytes))
+        content = render_command(description, [phrase] + extra, body)
+        (directory / f"{filename}.md").write_text(content, encoding='utf-8')
+        filenames.append(filename)
+    return filenames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3].strip())
+    parser.add_argument('directory', type=Path)
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--body-bytes', type=int, nargs=2, default=[100, 2000],
+                        metavar=('MIN', 'MAX'))
+    parser.add_argument('--aliases', type=int, nargs=2, default=[1, 4], metavar=('MIN', 'MAX'))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.directory, args.count, args.body_bytes, args.aliases, args.seed)
+    print(f"Wrote {args.count} commands to {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
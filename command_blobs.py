@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Shared Action Bodies (Content-Addressed Blobs)
+===================================================================================
+
+PURPOSE:
+    Many commands run the same action under different phrasings (dozens of
+    ways to say "run the verification script"). In deduplicated mode each
+    distinct action body is stored once, named by its SHA-256, and command
+    files only carry a reference to it - so the commands directory, its
+    backups and anything that scans it shrink with the duplication.
+
+HOW IT WORKS:
+    1. Bodies live in a hidden .blobs/ directory inside the commands
+       directory (so a backup of the directory includes them):
+           .blobs/3f/3fa9c0...e1     <- the body text, UTF-8
+    2. A deduplicated command file has a body_ref line and no body:
+           ---
+           description: Verify framework test
+           aliases: ["shit's ready", "check it"]
+           body_ref: sha256:3fa9c0...e1
+           ---
+    3. Writing a blob that already exists is free (same name = same
+       content); blobs are never changed, only added or collected
+    4. read_body() in command_frontmatter.py resolves references, so
+       search, export and the GUI see the same action either way. Blobs are
+       immutable, so recently read ones are cached in memory
+    5. Deleting a command leaves its blob; `gc` removes blobs no command
+       refers to (ignoring very new ones a writer may be about to use)
+
+    Claude reads command files directly and does not follow body_ref, so
+    only use this mode for directories served through the command manager.
+    `unpack` turns every file back into a plain, self-contained one.
+
+USAGE:
+    Turn it on for the managers:  AI_COMMANDS_DEDUP=1 python3 web_command_manager.py
+
+    python3 command_blobs.py stats    # Files, distinct bodies, bytes saved
+    python3 command_blobs.py pack     # Deduplicate existing files
+    python3 command_blobs.py unpack   # Back to plain files
+    python3 command_blobs.py gc       # Remove unreferenced blobs (--grace SECONDS)
+    (each takes --dir DIR; the default is the usual commands directory)
+===================================================================================
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from command_metrics import DISK_READ_BYTES
+from command_storage import CommandExists, atomic_write
+
+# Blob directory, inside the commands directory. Hidden, and its files
+# don't end in .md, so nothing mistakes it for commands.
+BLOB_DIR = '.blobs'
+
+# Prefix of every reference (leaves room for another hash later)
+REF_PREFIX = 'sha256:'
+
+_REF = re.compile(r'sha256:([0-9a-f]{64})\Z')
+
+# gc never removes blobs younger than this (seconds): a writer stores the
+# blob just before the command file that refers to it
+GC_GRACE_SECONDS = 3600
+
+# Distinct bodies kept in memory by read_blob()
+BLOB_CACHE_SIZE = 1024
+
+
+class MissingBlob(FileNotFoundError):
+    """A command refers to a body that is not in the blob directory."""
+
+
+def body_ref(body):
+    """The reference ("sha256:<hex>") of an action body."""
+    return REF_PREFIX + hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def _blob_file(directory, ref):
+    match = _REF.match(ref)
+    if match is None:
+        raise ValueError(f"not a body reference: {ref!r}")
+    digest = match.group(1)
+    # Plain strings: this runs once per command when search indexes bodies
+    return os.path.join(directory, BLOB_DIR, digest[:2], digest)
+
+
+def blob_path(directory, ref):
+    """Where the blob for ref lives under a commands directory."""
+    return Path(_blob_file(directory, ref))
+
+
+def read_blob(directory, ref):
+    """The body text for ref. Raises MissingBlob if it isn't there (or ref is malformed)."""
+    try:
+        path = _blob_file(directory, ref)
+    except ValueError:
+        raise MissingBlob(ref) from None
+    return _read_blob(path)
+
+
+@lru_cache(maxsize=BLOB_CACHE_SIZE)
+def _read_blob(path):
+    # Safe to cache by path: a blob's name is the hash of its content
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        raise MissingBlob(path) from None
+    DISK_READ_BYTES.inc(len(data))
+    return data.decode('utf-8', 'replace')
+
+
+class BlobStore:
+    """The blob directory of one commands directory. Thread-safe."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.root = self.directory / BLOB_DIR
+
+    def put(self, body):
+        """Store a body (if it isn't stored yet); returns its reference."""
+        ref = body_ref(body)
+        path = blob_path(self.directory, ref)
+        try:
+            # Reused: make it new again, so a gc running now (which may have
+            # seen it unreferenced) leaves it alone for the grace period
+            os.utime(path)
+            return ref
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # Always fsync'd: a command file must never refer to a
+            # blob that a crash could lose
+            atomic_write(path, body, overwrite=False)
+        except CommandExists:
+            pass  # Stored by someone else meanwhile - same content
+        return ref
+
+    def refs(self):
+        """Every stored (reference, size in bytes, mtime)."""
+        if not self.root.is_dir():
+            return
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir():
+                continue
+            with os.scandir(prefix.path) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.startswith('.'):
+                        stat = entry.stat()
+                        yield REF_PREFIX + entry.name, stat.st_size, stat.st_mtime
+
+    def collect(self, referenced, grace=GC_GRACE_SECONDS):
+        """
+        Delete blobs not in `referenced` (older than grace seconds).
+        Returns (blobs deleted, bytes freed).
+        """
+        referenced = set(referenced)
+        cutoff = time.time() - grace
+        deleted = freed = 0
+        for ref, size, mtime in list(self.refs()):
+            if ref in referenced or mtime > cutoff:
+                continue
+            path = blob_path(self.directory, ref)
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue  # Reused by a writer since the scan (see put())
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            deleted += 1
+            freed += size
+        for prefix in os.scandir(self.root) if deleted else ():
+            try:
+                os.rmdir(prefix.path)  # Only succeeds once a prefix is empty
+            except OSError:
+                pass
+        return deleted, freed
+
+
+# ----------------------------------------------------------------------
+# Command line: stats / pack / unpack / gc for a whole directory
+# ----------------------------------------------------------------------
+
+def main(argv=None):
+    # Imported here: command_frontmatter imports this module
+    from command_frontmatter import frontmatter_body_ref, pack_command, unpack_command
+    from command_store import COMMANDS_DIR, CommandStore
+
+    parser = argparse.ArgumentParser(description="Manage deduplicated command bodies.")
+    parser.add_argument('action', choices=('stats', 'pack', 'unpack', 'gc'))
+    parser.add_argument('--dir', type=Path, default=COMMANDS_DIR,
+                        help=f"commands directory (default: {COMMANDS_DIR})")
+    parser.add_argument('--grace', type=float, default=GC_GRACE_SECONDS,
+                        help="gc: keep unreferenced bodies younger than this many seconds")
+    args = parser.parse_args(argv)
+
+    blobs = BlobStore(args.dir)
+    files = sorted(args.dir.glob('*.md'))
+    texts = {}
+    for path in files:
+        try:
+            texts[path.stem] = path.read_text(encoding='utf-8', errors='replace')
+        except FileNotFoundError:
+            continue
+    refs = {stem: frontmatter_body_ref(text) for stem, text in texts.items()}
+
+    if args.action == 'stats':
+        stored = {ref: size for ref, size, _ in blobs.refs()}
+        packed = [ref for ref in refs.values() if ref]
+        file_bytes = sum(len(text.encode('utf-8')) for text in texts.values())
+        blob_bytes = sum(stored.values())
+        inline = sum(stored.get(ref, 0) for ref in packed)
+        print(f"{len(texts)} commands, {len(packed)} deduplicated")
+        print(f"{len(stored)} stored bodies, {len(set(packed))} in use")
+        print(f"{file_bytes + blob_bytes} bytes on disk; "
+              f"{file_bytes + inline} bytes if every file were self-contained")
+        return 0
+
+    if args.action == 'gc':
+        deleted, freed = blobs.collect((ref for ref in refs.values() if ref), args.grace)
+        print(f"Removed {deleted} unreferenced bodies ({freed} bytes)")
+        return 0
+
+    # pack / unpack go through the store, so running managers see the change
+    store = CommandStore(args.dir, dedup=False)
+    try:
+        changed = []
+        for stem, text in texts.items():
+            if args.action == 'pack':
+                new = pack_command(text, blobs)
+            else:
+                new = unpack_command(text, args.dir)
+            if new != text:
+                changed.append((stem, new))
+        store.write_many(changed)
+    except MissingBlob as e:
+        print(f"❌ Missing body {e}; nothing was changed", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(f"{'Packed' if args.action == 'pack' else 'Unpacked'} {len(changed)} commands")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
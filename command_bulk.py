@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Bulk Import / Export
+===================================================================================
+
+PURPOSE:
+    Moves whole command sets in and out of the commands directory in one go,
+    e.g. to onboard a team with hundreds of ready-made commands.
+
+FORMATS:
+    ndjson - one JSON object per line, in the same shape the web form sends:
+             {"phrase": "shit's ready", "action": "./verify_test.sh",
+              "description": "Verify framework test", "aliases": "check it"}
+             (aliases may also be a list). Exports add "filename".
+    json   - a JSON array of the same objects
+    tar    - a .tar / .tar.gz bundle of <filename>.md command files
+             (exports are always .tar.gz)
+    zip    - a .zip bundle of <filename>.md command files
+
+HOW IT WORKS:
+    1. parse_*() turns the upload into a list of BulkItems
+    2. validate_items() checks the whole batch before anything is written
+       (missing fields, bad filenames, duplicates within the batch)
+    3. write_items() writes every file in one pass through CommandStorage
+       (crash-safe writes); the command index is then updated once for
+       the whole batch
+    4. Commands that already exist are left alone and reported per item
+       (status 409), like a single create - unless overwrite is asked for,
+       in which case they are replaced and reported as updated
+===================================================================================
+"""
+
+import io
+import json
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+
+from command_frontmatter import (
+    command_filename, read_body, render_command, split_aliases, unpack_command)
+from command_storage import CommandExists
+
+FORMATS = ('ndjson', 'json', 'tar', 'zip')
+
+# Content types for each export format (tar exports are gzip-compressed)
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'tar': 'application/gzip',
+    'zip': 'application/zip',
+}
+
+
+class BulkError(ValueError):
+    """The upload as a whole could not be read (bad archive, bad JSON...)."""
+
+
+class BulkItem:
+    """One command in a batch: where it came from, and what will be written."""
+
+    __slots__ = ('index', 'filename', 'content', 'error', 'status')
+
+    def __init__(self, index, filename=None, content=None, error=None):
+        self.index = index        # Position in the upload (line / member number)
+        self.filename = filename  # Target filename without .md
+        self.content = content    # Full file contents to write
+        self.error = error        # Why this item can't be imported, or None
+        self.status = None        # HTTP-style outcome: 201 created, 200 updated, 409 exists
+
+    def result(self, written):
+        """Per-item report entry. written: filenames actually written."""
+        entry = {'index': self.index, 'filename': self.filename,
+                 'success': self.error is None and self.filename in written}
+        if self.error:
+            entry['error'] = self.error
+        elif not entry['success']:
+            entry['error'] = 'Not imported: other items in the batch are invalid'
+        entry['status'] = self.status or (201 if entry['success'] else 400)
+        return entry
+
+
+# ============================================================================
+# Reading uploads
+# ============================================================================
+
+def detect_format(content_type='', name=''):
+    """Guess the bundle format from a Content-Type header or file name."""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    name = (name or '').lower()
+    if 'zip' in content_type or name.endswith('.zip'):
+        return 'zip'
+    if 'tar' in content_type or 'gzip' in content_type or name.endswith(('.tar', '.tar.gz', '.tgz')):
+        return 'tar'
+    if 'ndjson' in content_type or 'jsonlines' in content_type or name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if content_type == 'application/json' or name.endswith('.json'):
+        return 'json'
+    return 'ndjson'
+
+
+def item_from_fields(index, fields):
+    """Build a BulkItem from one form-shaped JSON object."""
+    if not isinstance(fields, dict):
+        return BulkItem(index, error='Expected a JSON object')
+    phrase = str(fields.get('phrase') or '').strip()
+    action = str(fields.get('action') or '').strip()
+    if not phrase:
+        return BulkItem(index, error='Missing phrase')
+    if not action:
+        return BulkItem(index, filename=command_filename(phrase), error='Missing action')
+    desc = str(fields.get('description') or '').strip()
+    phrases = split_aliases(phrase, fields.get('aliases') or '')
+    filename = str(fields.get('filename') or '') or command_filename(phrase)
+    return BulkItem(index, filename, render_command(desc, phrases, action))
+
+
+def parse_records(data, fmt):
+    """Parse an ndjson or json upload into BulkItems."""
+    try:
+        text = data.decode('utf-8') if isinstance(data, bytes) else data
+    except UnicodeDecodeError as e:
+        raise BulkError(f'Upload is not UTF-8 text: {e}')
+
+    if fmt == 'json':
+        try:
+            records = json.loads(text)
+        except ValueError as e:
+            raise BulkError(f'Invalid JSON: {e}')
+        if not isinstance(records, list):
+            raise BulkError('Expected a JSON array of commands')
+        return [item_from_fields(i, r) for i, r in enumerate(records)]
+
+    items = []
+    for i, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            items.append(BulkItem(i, error=f'Invalid JSON on line {i + 1}: {e}'))
+            continue
+        items.append(item_from_fields(i, record))
+    return items
+
+
+def parse_archive(data, fmt):
+    """Parse a tar or zip bundle of .md command files into BulkItems."""
+    members = []
+    try:
+        if fmt == 'zip':
+            with zipfile.ZipFile(io.BytesIO(data)) as bundle:
+                for info in bundle.infolist():
+                    if not info.is_dir():
+                        members.append((info.filename, bundle.read(info)))
+        else:
+            with tarfile.open(fileobj=io.BytesIO(data), mode='r:*') as bundle:
+                for info in bundle.getmembers():
+                    if info.isfile():
+                        members.append((info.name, bundle.extractfile(info).read()))
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        raise BulkError(f'Could not read {fmt} bundle: {e}')
+
+    items = []
+    for i, (name, raw) in enumerate(members):
+        base = Path(name).name
+        if not base.endswith('.md'):
+            continue  # READMEs, metadata files etc. in the bundle
+        try:
+            content = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            items.append(BulkItem(i, base[:-3], error='File is not UTF-8 text'))
+            continue
+        items.append(BulkItem(i, base[:-3], content))
+    return items
+
+
+def parse_upload(data, fmt):
+    """Parse an upload in any of FORMATS into BulkItems."""
+    if fmt in ('tar', 'zip'):
+        return parse_archive(data, fmt)
+    if fmt in ('ndjson', 'json'):
+        return parse_records(data, fmt)
+    raise BulkError(f'Unknown format: {fmt}')
+
+
+# ============================================================================
+# Validating and writing
+# ============================================================================
+
+def validate_items(items):
+    """
+    Check a whole batch before anything is written.
+
+    Sets item.error for bad filenames and for duplicates within the batch
+    (the first occurrence wins). Returns True if every item is valid.
+    """
+    seen = set()
+    for item in items:
+        if item.error:
+            continue
+        if not item.filename or item.filename != command_filename(item.filename):
+            item.error = f'Invalid filename: {item.filename!r}'
+        elif item.filename in seen:
+            item.error = f'Duplicate filename in batch: {item.filename}'
+        else:
+            seen.add(item.filename)
+    return all(item.error is None for item in items)
+
+
+def write_items(items, storage, overwrite=False):
+    """
+    Write every valid item through a CommandStorage in one batch (atomic
+    file writes; a single journal fsync when the journal is enabled).
+
+    Items whose command already exists get status 409 and are skipped,
+    unless overwrite is True (they are then replaced, with status 200).
+    Returns the filenames written. If the batch fails to write, every item
+    gets the error.
+    """
+    valid = [item for item in items if not item.error]
+    while True:
+        for item in valid:
+            if storage.exists(item.filename):
+                item.status = 200 if overwrite else 409
+                if not overwrite:
+                    item.error = 'Command already exists (use overwrite to replace it)'
+            else:
+                item.status = 201
+        valid = [item for item in valid if not item.error]
+        try:
+            storage.write_many([(item.filename, item.content) for item in valid],
+                               overwrite=overwrite)
+        except CommandExists:
+            continue  # Created by someone else since the check: look again
+        except OSError as e:
+            for item in valid:
+                item.error = f'Write failed: {e}'
+                item.status = None
+            return []
+        return [item.filename for item in valid]
+
+
+def report(items, written):
+    """Summary + per-item results, as returned by the API and the CLI."""
+    written = set(written)
+    updated = sum(1 for item in items if item.filename in written and item.status == 200)
+    return {
+        'success': len(written) == len(items),
+        'created': len(written) - updated,
+        'updated': updated,
+        'failed': len(items) - len(written),
+        'results': [item.result(written) for item in items],
+    }
+
+
+# ============================================================================
+# Exporting
+# ============================================================================
+
+def export_records(directory, commands):
+    """One form-shaped dict per command (bodies included), for ndjson/json."""
+    directory = Path(directory)
+    for cmd in commands:
+        path = directory / f"{cmd.filename}.md"
+        try:
+            action = read_body(path)
+        except FileNotFoundError:
+            continue  # Deleted while exporting
+        aliases = list(cmd.aliases[1:]) if cmd.aliases else []
+        yield {
+            'filename': cmd.filename,
+            'phrase': cmd.phrase,
+            'description': cmd.description,
+            'aliases': aliases,
+            'action': action,
+        }
+
+
+def export_bundle(directory, commands, fmt):
+    """Build an export of the given commands as bytes in one of FORMATS."""
+    directory = Path(directory)
+    if fmt == 'ndjson':
+        lines = (json.dumps(r) for r in export_records(directory, commands))
+        return ''.join(f"{line}\n" for line in lines).encode('utf-8')
+    if fmt == 'json':
+        return json.dumps(list(export_records(directory, commands)), indent=2).encode('utf-8')
+
+    buffer = io.BytesIO()
+    if fmt == 'zip':
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as bundle:
+            for name, data, mtime in export_files(directory, commands):
+                info = zipfile.ZipInfo(name, time.localtime(mtime)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                bundle.writestr(info, data)
+    elif fmt == 'tar':
+        with tarfile.open(fileobj=buffer, mode='w:gz') as bundle:
+            for name, data, mtime in export_files(directory, commands):
+                info = tarfile.TarInfo(name)
+                info.size, info.mtime, info.mode = len(data), int(mtime), 0o644
+                bundle.addfile(info, io.BytesIO(data))
+    else:
+        raise BulkError(f'Unknown format: {fmt}')
+    return buffer.getvalue()
+
+
+def export_files(directory, commands):
+    """
+    (name, bytes, mtime) of each command file for the archive formats -
+    self-contained, so a shared body (command_blobs.py) is put back inline.
+    """
+    for cmd in commands:
+        path = directory / f"{cmd.filename}.md"
+        try:
+            mtime = path.stat().st_mtime
+            data = path.read_bytes()
+            if b'\nbody_ref:' in data:
+                data = unpack_command(data.decode('utf-8', 'replace'), directory).encode('utf-8')
+        except FileNotFoundError:
+            continue  # Deleted while exporting
+        yield path.name, data, mtime
+
+
+def import_bundle(data, fmt, storage, index=None, partial=False, overwrite=False):
+    """
+    Validate and import a whole upload. Used by the API and the CLI.
+
+    With partial=False (the default) nothing is written unless every item
+    is valid. Existing commands are only replaced with overwrite=True (see
+    write_items()). The command index, if given, is updated once at the end.
+    """
+    items = parse_upload(data, fmt)
+    if not validate_items(items) and not partial:
+        return report(items, [])
+    written = write_items(items, storage, overwrite=overwrite)
+    if index is not None and written:
+        index.refresh_files(written)
+    return report(items, written)
+
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Command Change Feed
+===================================================================================
+
+PURPOSE:
+    Pushes command changes to every open browser as they happen (Server-Sent
+    Events on GET /api/commands/events), so pages patch just the commands
+    that changed instead of refetching the whole list - and see each
+    other's changes without reloading.
+
+HOW IT WORKS:
+    1. The feed subscribes to the command index. Every refresh that changed
+       something becomes one numbered "change" event:
+           {"added": [...], "updated": [...], "removed": ["filename", ...],
+            "etag": "..."}
+       (added/updated hold commands in the GET /api/commands shape, with
+       aliases; etag is the ETag the full list has after the change)
+    2. The last EVENT_HISTORY events are kept, so a browser that reconnects
+       with Last-Event-ID gets exactly the events it missed
+    3. A new browser - or one whose Last-Event-ID is too old or came from
+       another server process - gets a "sync" event with the current ETag
+       instead, and reloads the list if its copy is out of date
+
+USAGE:
+    feed = ChangeFeed()
+    feed.attach(COMMAND_INDEX)
+    messages, seq = feed.messages(feed.resume(last_event_id))
+===================================================================================
+"""
+
+import json
+import threading
+import uuid
+from collections import deque
+
+from command_frontmatter import FIELDS
+
+# Change events kept for clients that reconnect (older gaps mean a resync)
+EVENT_HISTORY = 256
+
+# Sent every so often on an idle stream so proxies and browsers keep it open
+KEEPALIVE = ': keepalive\n\n'
+
+# Ask browsers to reconnect this soon (milliseconds) if the stream drops
+RETRY_MS = 3000
+
+
+def format_event(event, data, event_id=None):
+    """One Server-Sent Events message. data is JSON-encoded on a single line."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class ChangeFeed:
+    """
+    Numbered history of command index changes, shared by every open stream.
+
+    Thread-safe. Streams on threaded servers block in wait(); async servers
+    get woken by their own index listener and just call messages().
+    """
+
+    def __init__(self, history=EVENT_HISTORY):
+        # Event ids are "<token>-<n>". The token is new for every process,
+        # so an id from another server worker (or before a restart) is
+        # recognized as foreign and answered with a sync
+        self.token = uuid.uuid4().hex[:8]
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=history)  # (seq, payload), oldest first
+        self._seq = 0
+        self._index = None
+        self.streams = 0  # Streams currently open (see open_stream)
+
+    def attach(self, index):
+        """Publish every change of a CommandIndex from now on."""
+        self._index = index
+        index.subscribe(self.publish)
+
+    def etag(self):
+        """Current ETag of the full command list (same as index_etag())."""
+        return f"{self._index.fingerprint:016x}" if self._index is not None else ''
+
+    def publish(self, index, changes):
+        """Index listener: record one change event and wake waiting streams."""
+        payload = {'added': [], 'updated': [], 'removed': list(changes.removed)}
+        for kind in ('added', 'updated'):
+            for stem in getattr(changes, kind):
+                cmd = index.get(stem)
+                if cmd is None:
+                    payload['removed'].append(stem)  # Gone again already
+                else:
+                    payload[kind].append(cmd.to_dict(FIELDS))
+        payload['etag'] = self.etag()
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, payload))
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Reading the feed
+    # ------------------------------------------------------------------
+
+    def resume(self, last_event_id):
+        """Sequence number a reconnecting client has seen, or None to resync."""
+        token, _, seq = (last_event_id or '').partition('-')
+        if token != self.token or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def messages(self, seq):
+        """
+        SSE messages for a client that has seen every event up to `seq`,
+        and the sequence number to continue from.
+
+        seq=None, or a seq that has dropped out of the history, gives a
+        single "sync" message instead.
+        """
+        with self._cond:
+            if seq is not None and not (self._seq - len(self._events) <= seq <= self._seq):
+                seq = None
+            if seq is None:
+                return [format_event('sync', {'etag': self.etag()}, self._event_id(self._seq))], self._seq
+            return [format_event('change', payload, self._event_id(n))
+                    for n, payload in self._events if n > seq], self._seq
+
+    def wait(self, seq, timeout):
+        """Block until there is an event after `seq`, or timeout seconds pass."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq != seq, timeout)
+
+    def _event_id(self, seq):
+        return f"{self.token}-{seq}"
+
+    # ------------------------------------------------------------------
+    # Counting open streams
+    # ------------------------------------------------------------------
+
+    def open_stream(self, limit=None):
+        """Count a new stream; False (and not counted) if `limit` are open."""
+        with self._cond:
+            if limit is not None and self.streams >= limit:
+                return False
+            self.streams += 1
+            return True
+
+    def close_stream(self):
+        with self._cond:
+            self.streams -= 1
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Frontmatter Reader
+===================================================================================
+
+PURPOSE:
+    Reads the YAML-style frontmatter at the top of a command file without
+    reading the rest of the file. Command bodies can be long embedded
+    scripts, so listing commands should never pay for them.
+
+FILE FORMAT:
+    ---
+    description: Verify framework test
+    aliases: ["shit's ready", "check it"]
+    ---
+
+    ./verify_test.sh        <- body: never read by this module
+
+The same module also builds command files (render_command) so every writer
+produces exactly the format this reader expects.
+
+HOW IT WORKS:
+    1. Open the file and read the first line - if it isn't "---" there is
+       no frontmatter, so stop immediately and use defaults
+    2. Read line by line until the closing "---"
+    3. Only "description:" and "aliases:" lines inside that block count;
+       the same words in the body are ignored
+    4. Return a typed Command record
+
+A file may keep its body elsewhere: a "body_ref:" line in the frontmatter
+points to a shared body in the blob directory (see command_blobs.py).
+read_body() and read_command() resolve it, so callers never need to care.
+===================================================================================
+"""
+
+import json
+from pathlib import Path
+
+from command_blobs import read_blob
+from command_metrics import DISK_READ_BYTES
+
+# Frontmatter delimiter line
+DELIMITER = '---'
+
+# Safety net for files whose frontmatter is never closed: stop after this
+# many lines instead of reading a huge body looking for "---"
+MAX_FRONTMATTER_LINES = 100
+
+DEFAULT_DESCRIPTION = "Custom command"
+
+# Fields a Command can be serialized with, and the ones served by default
+FIELDS = ('filename', 'phrase', 'description', 'aliases')
+DEFAULT_FIELDS = ('filename', 'phrase', 'description')
+
+
+class Command:
+    """
+    One command, as described by its frontmatter.
+
+    Attributes:
+        filename: File name without the .md extension (e.g. "shits-ready")
+        phrase: Main phrase - the first alias, or the filename with spaces
+        description: One-line description
+        aliases: Every phrase that triggers the command, main phrase first
+    """
+
+    __slots__ = ('filename', 'phrase', 'description', 'aliases')
+
+    def __init__(self, filename, phrase, description, aliases=()):
+        self.filename = filename
+        self.phrase = phrase
+        self.description = description
+        self.aliases = tuple(aliases)
+
+    def to_dict(self, fields=None):
+        """
+        The JSON shape served by GET /api/commands.
+
+        fields: optional subset of FIELDS to include (default: filename,
+        phrase and description)
+        """
+        if fields is None:
+            fields = DEFAULT_FIELDS
+        return {f: list(self.aliases) if f == 'aliases' else getattr(self, f)
+                for f in fields}
+
+    def __eq__(self, other):
+        if not isinstance(other, Command):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __repr__(self):
+        return f"Command(filename={self.filename!r}, phrase={self.phrase!r})"
+
+
+def parse_aliases(value):
+    """
+    Parse an aliases value (a JSON array of strings).
+
+    Returns a tuple of phrases, or None if the value is not a valid array.
+    """
+    try:
+        aliases = json.loads(value)
+    except ValueError:
+        return None
+    if not isinstance(aliases, list):
+        return None
+    return tuple(str(a) for a in aliases)
+
+
+def read_frontmatter(filepath):
+    """
+    Read just the frontmatter of a command file and return a Command.
+
+    Raises FileNotFoundError if the file does not exist.
+    """
+    filepath = Path(filepath)
+    desc = DEFAULT_DESCRIPTION
+    aliases = ()
+
+    # Binary mode so a body that isn't valid UTF-8 can never break listing -
+    # only the frontmatter lines we actually use get decoded
+    with open(filepath, 'rb') as f:
+        first = f.readline().decode('utf-8', 'replace').lstrip('\ufeff').strip()
+        if first == DELIMITER:
+            for _ in range(MAX_FRONTMATTER_LINES):
+                raw = f.readline()
+                if not raw:
+                    break  # End of file - frontmatter never closed
+                line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+                if line.strip() == DELIMITER:
+                    break  # Closing delimiter - don't read the body
+                if line.startswith('description:'):
+                    desc = line.split(':', 1)[1].strip()
+                elif line.startswith('aliases:'):
+                    parsed = parse_aliases(line.split(':', 1)[1].strip())
+                    if parsed is not None:
+                        aliases = parsed
+        DISK_READ_BYTES.inc(f.tell())
+
+    phrase = aliases[0] if aliases else filepath.stem.replace('-', ' ')
+    return Command(filepath.stem, phrase, desc, aliases)
+
+
+def split_frontmatter(text):
+    """
+    Split a command file's text into (frontmatter lines, body).
+
+    The frontmatter lines exclude both delimiters; it is None for files
+    without frontmatter, which are all body.
+    """
+    lines = text.split('\n')
+    if lines and lines[0].lstrip('\ufeff').strip() == DELIMITER:
+        for i, line in enumerate(lines[1:MAX_FRONTMATTER_LINES + 1], 1):
+            if line.strip() == DELIMITER:
+                return lines[1:i], '\n'.join(lines[i + 1:]).strip('\n')
+    return None, text.strip('\n')
+
+
+def _body_ref(header):
+    for line in header or ():
+        if line.startswith('body_ref:'):
+            return line.split(':', 1)[1].strip()
+    return None
+
+
+def frontmatter_body_ref(text):
+    """The body_ref of a command file's text, or None if its body is inline."""
+    return _body_ref(split_frontmatter(text)[0])
+
+
+def read_body(filepath):
+    """
+    Return the body of a command file - everything after the frontmatter,
+    or the shared body its body_ref points to.
+
+    Files without frontmatter are all body. Raises FileNotFoundError if the
+    file (or the body it refers to) does not exist.
+    """
+    filepath = Path(filepath)
+    with open(filepath, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+        DISK_READ_BYTES.inc(f.buffer.tell())
+    header, body = split_frontmatter(text)
+    ref = _body_ref(header)
+    if ref and not body:
+        return read_blob(filepath.parent, ref)
+    return body
+
+
+def read_command(filepath):
+    """Full text of a command file, with a shared body put back inline."""
+    filepath = Path(filepath)
+    with open(filepath, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+        DISK_READ_BYTES.inc(f.buffer.tell())
+    return unpack_command(text, filepath.parent)
+
+
+def pack_command(text, blobs):
+    """
+    Move a command file's body into the blob store (a command_blobs.BlobStore)
+    and return the text with a body_ref instead. Files without frontmatter
+    or body, and files already packed, are returned unchanged.
+    """
+    header, body = split_frontmatter(text.replace('\r\n', '\n'))
+    if header is None or not body or _body_ref(header):
+        return text
+    ref = blobs.put(body)
+    return '\n'.join([DELIMITER] + header + [f'body_ref: {ref}', DELIMITER]) + '\n'
+
+
+def unpack_command(text, directory):
+    """
+    The self-contained form of a command file's text: its body_ref line
+    replaced by the body it points to. Raises command_blobs.MissingBlob.
+    """
+    header, body = split_frontmatter(text)
+    ref = _body_ref(header)
+    if not ref or body:
+        return text
+    header = [line for line in header if not line.startswith('body_ref:')]
+    body = read_blob(directory, ref)
+    return '\n'.join([DELIMITER] + header + [DELIMITER, '', body]) + '\n'
+
+
+def command_filename(phrase):
+    """
+    Turn a phrase into a command filename (without .md):
+    lowercase, apostrophes removed, spaces to hyphens, and only letters,
+    numbers and hyphens kept. "Shit's ready" -> "shits-ready"
+    """
+    filename = phrase.lower().replace("'", "").replace(" ", "-")
+    return ''.join(c for c in filename if c.isalnum() or c == '-')
+
+
+def split_aliases(phrase, aliases):
+    """
+    Build the full phrase list: main phrase first, then the extra aliases.
+
+    aliases may be a comma separated string (as typed in the forms) or a list.
+    """
+    if isinstance(aliases, str):
+        aliases = aliases.split(',')
+    all_phrases = [phrase]
+    for alias in aliases or ():
+        alias = str(alias).strip()
+        if alias and alias not in all_phrases:
+            all_phrases.append(alias)
+    return all_phrases
+
+
+def render_command(description, phrases, action):
+    """
+    Build the contents of a command file in YAML frontmatter + markdown
+    format. This is the format Claude expects.
+    """
+    # A newline would end the frontmatter field early
+    description = ' '.join((description or DEFAULT_DESCRIPTION).split())
+    return f"""---
+description: {description}
+aliases: {json.dumps(phrases)}
+---
+
+{action}
+"""
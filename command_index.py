@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - In-Memory Command Index
+===================================================================================
+
+PURPOSE:
+    Keeps the parsed contents of every command file in memory so listing
+    commands does not have to open and parse every .md file on each request.
+
+HOW IT WORKS:
+    1. The first refresh() parses every .md file in the commands directory
+       (frontmatter only - long command bodies are never read)
+    2. For each file we remember a "stamp": its modification time and size
+    3. Later refreshes only stat() the files (cheap - no file is opened)
+    4. Only files whose stamp changed are parsed again; deleted files are
+       dropped and new files are added
+    5. Every change bumps a generation counter and updates a fingerprint
+       of all stamps, so callers can tell whether anything changed since
+       they last looked - the fingerprint even across processes
+    6. Files that exist but can't be read (permissions, I/O errors) are
+       left out and counted in command_metrics.PARSE_FAILURES; they are
+       tried again on the next refresh
+
+USAGE:
+    index = CommandIndex(COMMANDS_DIR)
+    index.refresh()          # Build once at startup
+    index.commands()         # Re-check stamps and answer from memory
+    index.refresh_file(name) # Cheap update after writing/deleting one file
+    index.refresh_files(names) # Same, for a whole batch
+    index.seed(entries)      # Start from a saved manifest (command_manifest.py)
+
+    With an executor (e.g. a ThreadPoolExecutor), changed files are parsed
+    in parallel and outside the lock, so a slow or network disk doesn't
+    hold up readers while a large batch of edits is picked up.
+===================================================================================
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from command_frontmatter import read_frontmatter
+from command_metrics import (
+    FILES_PARSED, FILES_SCANNED, INDEX_CACHE, INDEX_SCANS, LISTENER_FAILURES, PARSE_FAILURES)
+
+log = logging.getLogger(__name__)
+
+# Result of a refresh: names of command files that appeared, changed or vanished
+IndexChanges = namedtuple('IndexChanges', ['added', 'updated', 'removed'])
+
+
+def _stamp(stat_result):
+    """Cheap change detector for a file: (modification time, size)."""
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def _stamp_hash(stem, stamp):
+    """64-bit hash of one file's stamp (stable across processes, unlike hash())."""
+    key = f"{stem}\0{stamp[0]}\0{stamp[1]}".encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+
+class CommandIndex:
+    """
+    Process-wide cache of parsed command files, keyed by filename stem.
+
+    Safe to share between request threads: all reads and updates of the
+    cached state happen under one lock.
+    """
+
+    def __init__(self, directory, parser=read_frontmatter, executor=None):
+        self.directory = Path(directory)
+        self._parser = parser
+        self.executor = executor  # Optional: parse changed files in parallel
+        self._lock = threading.Lock()
+        self._stamps = {}    # stem -> (mtime_ns, size)
+        self._records = {}   # stem -> parsed record
+        self._ordered = None  # Sorted list of records, rebuilt lazily
+        self._listeners = []
+        self._last_scan = 0.0
+        self.generation = 0
+        self.changed_at = time.time()  # Wall-clock time of the last change
+        # XOR of every file's stamp hash: two indexes over the same directory
+        # state have the same fingerprint, even in different processes
+        self.fingerprint = 0
+
+    def subscribe(self, listener):
+        """
+        Call listener(index, changes) after every refresh that changed something.
+
+        Used by lookup structures built on top of the index (e.g. the phrase
+        matcher) so they can update only the affected commands. A listener
+        that raises is logged and counted; the others are still called.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, changes):
+        if changes.added or changes.updated or changes.removed:
+            for listener in list(self._listeners):
+                try:
+                    listener(self, changes)
+                except Exception:
+                    LISTENER_FAILURES.inc()
+                    log.exception("Index listener %r failed on %s", listener, changes)
+        return changes
+
+    def _scan(self):
+        """Stat every .md file in the directory without opening any of them."""
+        stamps = {}
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return stamps
+        with entries:
+            for entry in entries:
+                if not entry.name.endswith('.md'):
+                    continue
+                try:
+                    if entry.is_file():
+                        stamps[entry.name[:-3]] = _stamp(entry.stat())
+                except FileNotFoundError:
+                    # Deleted between listing and stat - treat as gone
+                    continue
+        return stamps
+
+    def _apply(self, stem, stamp):
+        """Parse one file into the cache. Returns False if it vanished."""
+        record = self._parse(stem)
+        if record is None:
+            self._forget(stem)
+            return False
+        self._store(stem, stamp, record)
+        return True
+
+    def seed(self, entries):
+        """
+        Fill an empty index from saved (stem, stamp, record) entries, e.g.
+        the on-disk manifest, without parsing any file or notifying anyone.
+
+        The next refresh() verifies every stamp against the directory, so
+        entries for files edited or deleted since are simply re-parsed or
+        dropped. Returns False (and does nothing) if the index isn't empty.
+        """
+        with self._lock:
+            if self._stamps:
+                return False
+            for stem, stamp, record in entries:
+                self._store(stem, tuple(stamp), record)
+            self._ordered = None
+            return True
+
+    def _store(self, stem, stamp, record):
+        self._records[stem] = record
+        old = self._stamps.get(stem)
+        if old is not None:
+            self.fingerprint ^= _stamp_hash(stem, old)
+        self._stamps[stem] = stamp
+        self.fingerprint ^= _stamp_hash(stem, stamp)
+
+    def _parse(self, stem):
+        """Parse one file without touching the cache; None if it vanished or is unreadable."""
+        FILES_PARSED.inc()
+        try:
+            return self._parser(self.directory / f"{stem}.md")
+        except FileNotFoundError:
+            return None
+        except OSError:
+            PARSE_FAILURES.inc()
+            return None
+
+    def _parse_many(self, stems, progress=None, cancel=None):
+        """
+        Parse files outside the lock - in parallel if there is an executor.
+
+        Calls progress(done, total) after each file and stops early, with
+        whatever was parsed so far, once the cancel event is set.
+        """
+        if self.executor is not None and len(stems) > 1:
+            results = self.executor.map(self._parse, stems)
+        else:
+            results = map(self._parse, stems)
+        parsed = {}
+        try:
+            for stem, record in zip(stems, results):
+                parsed[stem] = record
+                if progress is not None:
+                    progress(len(parsed), len(stems))
+                if cancel is not None and cancel.is_set():
+                    break
+        finally:
+            close = getattr(results, 'close', None)
+            if close is not None:
+                close()  # Cancels parses still queued in the executor
+        return parsed
+
+    def _forget(self, stem):
+        self._records.pop(stem, None)
+        old = self._stamps.pop(stem, None)
+        if old is not None:
+            self.fingerprint ^= _stamp_hash(stem, old)
+
+    def _changed(self, changes):
+        if changes.added or changes.updated or changes.removed:
+            self.generation += 1
+            self.changed_at = time.time()
+            self._ordered = None
+        return changes
+
+    def refresh(self, max_age=None, progress=None, cancel=None):
+        """
+        Bring the index in line with the directory.
+
+        Only files whose (mtime, size) stamp differs from the cached one are
+        parsed again. Returns an IndexChanges tuple of affected filenames.
+
+        With max_age (seconds), the directory is only rescanned if the last
+        scan is older than that - for hot lookup paths that can tolerate
+        slightly stale results for edits made outside this process.
+
+        For long scans (e.g. from a GUI), progress(done, total) is called
+        as changed files are parsed, and setting the threading.Event
+        `cancel` stops parsing early. Files not parsed yet keep their old
+        record and are picked up by the next refresh.
+        """
+        now = time.monotonic()
+        if max_age is not None and now - self._last_scan < max_age:
+            return IndexChanges([], [], [])
+        self._last_scan = now
+        current = self._scan()
+        INDEX_SCANS.inc()
+        FILES_SCANNED.observe(len(current))
+        changes = self._update_from_scan(current, progress, cancel)
+        return self._notify(changes)
+
+    def _update_from_scan(self, current, progress=None, cancel=None):
+        with self._lock:
+            stale = [stem for stem, stamp in current.items()
+                     if self._stamps.get(stem) != stamp]
+        INDEX_CACHE.inc(len(current) - len(stale), labels=('hit',))
+        INDEX_CACHE.inc(len(stale), labels=('miss',))
+        parsed = self._parse_many(stale, progress, cancel)
+        with self._lock:
+            added, updated, removed = [], [], []
+            for stem in parsed:
+                known = self._stamps.get(stem)
+                if known == current[stem]:
+                    continue  # A concurrent refresh already stored this version
+                if parsed[stem] is None:
+                    # Deleted between the scan and the parse
+                    if known is not None:
+                        self._forget(stem)
+                        removed.append(stem)
+                    continue
+                self._store(stem, current[stem], parsed[stem])
+                (updated if known is not None else added).append(stem)
+            gone = [stem for stem in self._stamps if stem not in current]
+            for stem in gone:
+                self._forget(stem)
+            removed.extend(gone)
+            return self._changed(IndexChanges(added, updated, removed))
+
+    def refresh_file(self, stem):
+        """
+        Re-check a single command file, e.g. right after writing or deleting it.
+
+        Much cheaper than refresh() because it touches only one file.
+        """
+        return self._notify(self._update_file(stem))
+
+    def refresh_files(self, stems):
+        """
+        Re-check a batch of command files (e.g. after a bulk import) and
+        notify listeners once for the whole batch.
+        """
+        added, updated, removed = [], [], []
+        for stem in stems:
+            changes = self._update_file(stem)
+            added.extend(changes.added)
+            updated.extend(changes.updated)
+            removed.extend(changes.removed)
+        return self._notify(IndexChanges(added, updated, removed))
+
+    def _update_file(self, stem):
+        path = self.directory / f"{stem}.md"
+        with self._lock:
+            known = stem in self._stamps
+            try:
+                stamp = _stamp(path.stat())
+            except FileNotFoundError:
+                self._forget(stem)
+                removed = [stem] if known else []
+                return self._changed(IndexChanges([], [], removed))
+            if self._stamps.get(stem) == stamp:
+                INDEX_CACHE.inc(labels=('hit',))
+                return IndexChanges([], [], [])
+            INDEX_CACHE.inc(labels=('miss',))
+            if not self._apply(stem, stamp):
+                return self._changed(IndexChanges([], [], [stem] if known else []))
+            if known:
+                return self._changed(IndexChanges([], [stem], []))
+            return self._changed(IndexChanges([stem], [], []))
+
+    def commands(self, refresh=True):
+        """
+        Return every cached Command record, sorted by filename.
+
+        With refresh=True (the default) stamps are re-checked first so edits
+        made outside this process are picked up.
+        """
+        return list(self.snapshot(refresh)[2])
+
+    def snapshot(self, refresh=True):
+        """
+        Return (fingerprint, changed_at, commands) taken atomically.
+
+        commands is a sorted tuple of Command records that callers must not
+        modify; the fingerprint identifies which version of the directory
+        they are looking at (e.g. for HTTP ETags) and is the same in every
+        process looking at the same files.
+        """
+        if refresh:
+            self.refresh()
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = tuple(self._records[stem] for stem in sorted(self._records))
+            return self.fingerprint, self.changed_at, self._ordered
+
+    def get(self, stem):
+        """Return the cached Command for one file, or None."""
+        with self._lock:
+            return self._records.get(stem)
+
+    def entry(self, stem):
+        """
+        Return (stamp, Command) for one file - the record together with the
+        (mtime_ns, size) it was parsed at - or None.
+        """
+        with self._lock:
+            if stem not in self._records:
+                return None
+            return self._stamps[stem], self._records[stem]
+
+    def stamps(self):
+        """Return {stem: (mtime_ns, size)} for every cached file (a copy)."""
+        with self._lock:
+            return {stem: self._stamps[stem] for stem in self._records}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
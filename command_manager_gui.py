@@ -2,13 +2,45 @@
 """
 AI Framework Command Manager - GUI
 Create and manage custom Claude commands without touching code.
+
+Directory scans and file reads run on a worker thread; their results are
+handed back to the Tk main loop through a queue (polled with root.after)
+and the list is filled in batches, so the window never freezes - even on
+a slow or network-mounted commands directory.
+
+Commands added, edited or deleted elsewhere (web manager, new-command.sh,
+add-phrase.sh, an editor) show up by themselves: a directory watcher
+reports just the changed files, and only those rows are updated.
+
+The search box finds commands by phrase, description or action (ranked
+full-text search, see command_search.py); clear it to see every command.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import os
-import json
-from pathlib import Path
+import queue
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+from command_search import CommandSearch
+from command_storage import CommandExists
+from command_store import CommandStore
+
+# How often the main loop checks for finished background work (ms)
+POLL_MS = 50
+
+# How often the main loop looks for changes the index queued from other
+# threads (watcher, scans) - they never touch Tk themselves (ms)
+CHANGE_POLL_MS = 200
+
+# Listbox rows inserted per main-loop tick while filling the list
+ROW_BATCH = 500
+
+# Search once typing pauses for this long (ms), and show this many results
+SEARCH_DELAY_MS = 200
+SEARCH_LIMIT = 200
 
 class CommandManagerGUI:
     def __init__(self, root):
@@ -16,12 +48,50 @@ class CommandManagerGUI:
         self.root.title("AI Framework Command Manager")
         self.root.geometry("900x700")
 
-        # Command directory
-        self.commands_dir = Path.home() / "AI-Collaboration-Management" / ".claude" / "commands"
-        self.commands_dir.mkdir(parents=True, exist_ok=True)
+        # Commands on disk (shared with the web manager, see command_store.py).
+        # Parsed commands are kept between refreshes: a rescan only re-reads
+        # files that changed since the last one
+        self.store = CommandStore()
+        self.index = self.store.index
+
+        # Commands shown in the listbox, sorted by filename
+        self.commands = []
+        self.filenames = []  # Same order, for bisect
+        self.loaded = False  # True once the first scan filled the list
+
+        # Background work: scans and file reads run here, results come
+        # back through self.results and are handled in poll_results()
+        self.worker = ThreadPoolExecutor(max_workers=2, thread_name_prefix='command-gui')
+        self.results = queue.Queue()
+        self.jobs = 0                 # Background jobs not handled yet
+        self.polling = False
+        self.scan_cancel = None       # Event of the scan in progress
+        self.scan_progress = (0, 0)   # (files parsed, files to parse)
+        self.pending_rows = []        # Rows still to insert into the listbox
+
+        # Changes the index reports (from any thread) and the filenames
+        # whose rows still need updating
+        self.changes = queue.Queue()
+        self.dirty = set()
+        self.change_timer = None
+
+        # Full-text search. While a query is active the listbox shows its
+        # results instead of the full list (which is still kept up to date)
+        self.search = CommandSearch()
+        self.search_query = None
+        self.search_hits = []
+        self.search_timer = None
 
         # Create UI
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Watch the directory for changes made elsewhere (started before the
+        # first scan so nothing slips through in between)
+        self.search.attach(self.index)
+        self.store.subscribe(self.on_index_changed)
+        self.store.watch()
+        self.watch_changes()
         self.refresh_command_list()
 
     def create_widgets(self):
@@ -71,22 +141,39 @@ class CommandManagerGUI:
         list_frame = ttk.LabelFrame(main_frame, text="Existing Commands", padding="10")
         list_frame.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5)
 
+        # Search box (phrases, descriptions and actions)
+        search_frame = ttk.Frame(list_frame)
+        search_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        search_frame.columnconfigure(1, weight=1)
+        ttk.Label(search_frame, text="Search:").grid(row=0, column=0, padx=(0, 5))
+        self.search_entry = ttk.Entry(search_frame)
+        self.search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        self.search_entry.bind('<KeyRelease>', self.on_search_typed)
+
         # Command listbox
         self.command_listbox = tk.Listbox(list_frame, width=40, height=20)
-        self.command_listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.command_listbox.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         self.command_listbox.bind('<<ListboxSelect>>', self.on_command_select)
 
         # Buttons for existing commands
         btn_frame = ttk.Frame(list_frame)
-        btn_frame.grid(row=1, column=0, pady=10)
+        btn_frame.grid(row=2, column=0, pady=10)
 
         ttk.Button(btn_frame, text="View Details", command=self.view_command).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Delete", command=self.delete_command).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Refresh", command=self.refresh_command_list).pack(side=tk.LEFT, padx=5)
 
-        # Status bar
-        self.status_label = ttk.Label(main_frame, text="Ready", relief=tk.SUNKEN)
-        self.status_label.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        # Status bar, with scan progress and a button to stop a long scan
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        status_frame.columnconfigure(0, weight=1)
+        self.status_label = ttk.Label(status_frame, text="Ready", relief=tk.SUNKEN)
+        self.status_label.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.progress = ttk.Progressbar(status_frame, length=150, mode='determinate')
+        self.progress.grid(row=0, column=1, padx=5)
+        self.cancel_btn = ttk.Button(status_frame, text="Cancel", command=self.cancel_scan,
+                                     state=tk.DISABLED)
+        self.cancel_btn.grid(row=0, column=2)
 
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
@@ -120,31 +207,18 @@ class CommandManagerGUI:
             messagebox.showerror("Error", "Please enter what the command should do")
             return
 
-        # Parse aliases
-        all_phrases = [phrase]
-        if aliases:
-            all_phrases.extend([a.strip() for a in aliases.split(',') if a.strip()])
-
-        # Generate filename
-        filename = phrase.lower().replace("'", "").replace(" ", "-")
-        filename = ''.join(c for c in filename if c.isalnum() or c == '-')
-        filepath = self.commands_dir / f"{filename}.md"
-
-        # Create command file
-        content = f"""---
-description: {desc or 'Custom command'}
-aliases: {json.dumps(all_phrases)}
----
-
-{action}
-"""
-
+        # Create command file (its row appears on the next poll)
         try:
-            filepath.write_text(content)
+            try:
+                self.store.create(phrase, action, desc or None, aliases)
+            except CommandExists:
+                if not messagebox.askyesno("Command Exists",
+                                           f"A command for '{phrase}' already exists.\n\nReplace it?"):
+                    return
+                self.store.create(phrase, action, desc or None, aliases, overwrite=True)
             messagebox.showinfo("Success",
                 f"Command created!\n\nYou can now say:\n'{phrase}'\n\nAnd Claude will execute it.")
             self.status_label.config(text=f"Created: {phrase}")
-            self.refresh_command_list()
             self.clear_form()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to create command:\n{e}")
@@ -155,31 +229,263 @@ aliases: {json.dumps(all_phrases)}
         self.desc_entry.delete(0, tk.END)
         self.aliases_entry.delete(0, tk.END)
 
+    # ------------------------------------------------------------------
+    # Background work
+    # ------------------------------------------------------------------
+
+    def run_in_background(self, func, *args):
+        """Run func on the worker thread; its result is handled in poll_results()."""
+        self.jobs += 1
+        self.worker.submit(self._run_job, func, args)
+        self.start_polling()
+
+    def start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_MS, self.poll_results)
+
+    def _run_job(self, func, args):
+        # Worker thread: never touch Tk here, only the queue
+        try:
+            self.results.put(func(*args))
+        except Exception as e:
+            self.results.put(('error', e))
+
+    def poll_results(self):
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.jobs -= 1
+            handler = getattr(self, f"on_{result[0]}")
+            handler(*result[1:])
+        while True:
+            try:
+                changes = self.changes.get_nowait()
+            except queue.Empty:
+                break
+            self.dirty.update(changes.added, changes.updated, changes.removed)
+
+        if self.scan_cancel is not None:
+            done, total = self.scan_progress
+            self.progress.config(maximum=max(total, 1), value=done)
+            if total:
+                self.status_label.config(text=f"Reading commands... {done}/{total}")
+
+        filling = self.pending_rows and self.search_query is None
+        if filling:
+            # Fill the list a batch at a time so the window stays responsive
+            batch, self.pending_rows = self.pending_rows[:ROW_BATCH], self.pending_rows[ROW_BATCH:]
+            self.command_listbox.insert(tk.END, *batch)
+        elif self.loaded and self.dirty:
+            self.apply_changes()
+
+        if self.jobs or filling or (self.loaded and self.dirty):
+            self.root.after(POLL_MS, self.poll_results)
+        else:
+            self.polling = False
+
+    def on_error(self, error):
+        self.status_label.config(text=f"Error: {error}")
+        messagebox.showerror("Error", str(error))
+
+    def on_close(self):
+        if self.change_timer is not None:
+            self.root.after_cancel(self.change_timer)
+        self.store.close()
+        self.cancel_scan()
+        self.worker.shutdown(wait=False)
+        self.root.destroy()
+
+    # ------------------------------------------------------------------
+    # Command list
+    # ------------------------------------------------------------------
+
     def refresh_command_list(self):
-        self.command_listbox.delete(0, tk.END)
+        # A new scan supersedes one still running
+        if self.scan_cancel is not None:
+            self.scan_cancel.set()
+        cancel = self.scan_cancel = threading.Event()
+        self.scan_progress = (0, 0)
+        self.progress.config(value=0)
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.status_label.config(text="Scanning commands...")
+        self.run_in_background(self._scan, cancel)
+
+    def _scan(self, cancel):
+        # Worker thread. Only files changed since the last scan are parsed
+        # (frontmatter only - bodies are not read)
+        self.index.refresh(progress=self._scan_progressed, cancel=cancel)
+        return ('scanned', cancel, self.index.commands(refresh=False))
+
+    def _scan_progressed(self, done, total):
+        # Worker thread: just record it; poll_results() draws it
+        self.scan_progress = (done, total)
+
+    def cancel_scan(self):
+        if self.scan_cancel is not None:
+            self.scan_cancel.set()
+            self.cancel_btn.config(state=tk.DISABLED)
+
+    def on_scanned(self, cancel, commands):
+        if cancel is not self.scan_cancel:
+            return  # Superseded by a newer scan
+        self.scan_cancel = None
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.progress.config(value=0)
+
+        if not self.loaded:
+            # First scan: fill the whole list. Later scans only report
+            # changes, which update single rows like the watcher's do
+            self.loaded = True
+            self.commands = list(commands)
+            self.filenames = [cmd.filename for cmd in commands]
+            self.pending_rows = [self.row_label(cmd) for cmd in commands]
+        if cancel.is_set():
+            self.status_label.config(
+                text=f"Scan cancelled - showing {len(commands)} commands (may be out of date)")
+        else:
+            self.status_label.config(text=f"Found {len(commands)} commands")
+
+    def on_index_changed(self, index, changes):
+        # Watcher or worker thread: never touch Tk here, only the queue
+        # (watch_changes() picks it up on the main thread)
+        self.changes.put(changes)
+
+    def watch_changes(self):
+        # Main thread, every CHANGE_POLL_MS: start handling queued changes
+        if not self.changes.empty():
+            self.start_polling()
+        self.change_timer = self.root.after(CHANGE_POLL_MS, self.watch_changes)
+
+    def apply_changes(self):
+        """Update only the rows of changed commands, keeping the selection."""
+        listing = self.search_query is None  # Else the listbox shows search results
+        selected = self.selected_filename()
+        changed = 0
+        for filename in sorted(self.dirty):
+            cmd = self.index.get(filename)
+            i = bisect_left(self.filenames, filename)
+            if i < len(self.filenames) and self.filenames[i] == filename:
+                if cmd == self.commands[i]:
+                    continue
+                if listing:
+                    self.command_listbox.delete(i)
+                del self.commands[i]
+                del self.filenames[i]
+            changed += 1
+            if cmd is not None:
+                self.commands.insert(i, cmd)
+                self.filenames.insert(i, filename)
+                if listing:
+                    self.command_listbox.insert(i, self.row_label(cmd))
+        self.dirty.clear()
+        if not changed:
+            return
+        if not listing:
+            self.run_search()  # The results may have changed too
+            return
 
-        # List all command files
-        for filepath in sorted(self.commands_dir.glob("*.md")):
-            self.command_listbox.insert(tk.END, filepath.stem)
+        self.command_listbox.selection_clear(0, tk.END)
+        if selected:
+            i = bisect_left(self.filenames, selected)
+            if i < len(self.filenames) and self.filenames[i] == selected:
+                self.command_listbox.selection_set(i)
+                self.command_listbox.activate(i)
+        self.status_label.config(text=f"{len(self.commands)} commands (updated)")
 
-        self.status_label.config(text=f"Found {self.command_listbox.size()} commands")
+    @staticmethod
+    def row_label(cmd):
+        return f'"{cmd.phrase}" - {cmd.description}'
 
-    def on_command_select(self, event):
+    def selected_filename(self):
         selection = self.command_listbox.curselection()
-        if selection:
-            self.status_label.config(text=f"Selected: {self.command_listbox.get(selection[0])}")
+        if not selection:
+            return None
+        if self.search_query is not None:
+            return self.search_hits[selection[0]].filename
+        return self.commands[selection[0]].filename
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def on_search_typed(self, event):
+        # Wait for a pause in typing instead of searching on every key
+        if self.search_timer is not None:
+            self.root.after_cancel(self.search_timer)
+        self.search_timer = self.root.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self.search_timer = None
+        query = self.search_entry.get()
+        if not query.strip():
+            if self.search_query is not None:
+                self.show_all()
+            return
+        self.search_query = query
+        self.status_label.config(text=f"Searching: {query.strip()}")
+        self.run_in_background(self._search, query)
+
+    def _search(self, query):
+        # Worker thread (the first search also reads every command's body)
+        total, hits = self.search.search(query, limit=SEARCH_LIMIT)
+        return ('searched', query, total, hits)
+
+    def on_searched(self, query, total, hits):
+        if query != self.search_query:
+            return  # The query changed while this one ran
+        self.search_hits = hits
+        self.command_listbox.delete(0, tk.END)
+        self.command_listbox.insert(tk.END, *[self.hit_label(hit) for hit in hits])
+        shown = f" (top {len(hits)})" if total > len(hits) else ""
+        self.status_label.config(text=f"{total} matches for '{query.strip()}'{shown}")
+
+    def show_all(self):
+        """Leave search results and show the full command list again."""
+        self.search_query = None
+        self.search_hits = []
+        self.command_listbox.delete(0, tk.END)
+        self.pending_rows = [self.row_label(cmd) for cmd in self.commands]
+        self.status_label.config(text=f"{len(self.commands)} commands")
+        self.start_polling()
+
+    def hit_label(self, hit):
+        """Search result row: phrase, then the snippet with matches in «»."""
+        cmd = self.index.get(hit.filename)
+        text, end = [], 0
+        for start, stop in hit.highlights:
+            text.append(hit.snippet[end:start] + '«' + hit.snippet[start:stop] + '»')
+            end = stop
+        text.append(hit.snippet[end:])
+        phrase = cmd.phrase if cmd else hit.filename
+        return f'"{phrase}" - {"".join(text)}'
+
+    def on_command_select(self, event):
+        filename = self.selected_filename()
+        if filename:
+            self.status_label.config(text=f"Selected: {filename}")
 
     def view_command(self):
-        selection = self.command_listbox.curselection()
-        if not selection:
+        filename = self.selected_filename()
+        if not filename:
             messagebox.showwarning("Warning", "Please select a command first")
             return
 
-        filename = self.command_listbox.get(selection[0])
-        filepath = self.commands_dir / f"{filename}.md"
+        # Read on the worker thread, then display in on_viewed()
+        self.status_label.config(text=f"Opening: {filename}")
+        self.run_in_background(self._read_command, filename)
 
-        # Read and display
-        content = filepath.read_text()
+    def _read_command(self, filename):
+        # Worker thread
+        try:
+            return ('viewed', filename, self.store.read(filename))
+        except FileNotFoundError:
+            return ('error', f"Command '{filename}' no longer exists")
+
+    def on_viewed(self, filename, content):
+        self.status_label.config(text=f"Selected: {filename}")
 
         # Show in new window
         viewer = tk.Toplevel(self.root)
@@ -194,19 +500,15 @@ aliases: {json.dumps(all_phrases)}
         ttk.Button(viewer, text="Close", command=viewer.destroy).pack(pady=10)
 
     def delete_command(self):
-        selection = self.command_listbox.curselection()
-        if not selection:
+        filename = self.selected_filename()
+        if not filename:
             messagebox.showwarning("Warning", "Please select a command first")
             return
 
-        filename = self.command_listbox.get(selection[0])
-
         if messagebox.askyesno("Confirm Delete",
                               f"Delete command '{filename}'?"):
-            filepath = self.commands_dir / f"{filename}.md"
-            filepath.unlink()
+            self.store.delete(filename)  # Its row goes on the next poll
             self.status_label.config(text=f"Deleted: {filename}")
-            self.refresh_command_list()
 
 
 if __name__ == "__main__":
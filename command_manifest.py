@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - On-Disk Command Manifest
+===================================================================================
+
+PURPOSE:
+    Lets a freshly started manager (web server worker, desktop GUI, shell
+    script) load the whole command catalogue with one sequential read
+    instead of opening and parsing every .md file - so start-up stays fast
+    however many commands there are.
+
+HOW IT WORKS:
+    1. A small SQLite database, .commands-manifest.db, lives in the commands
+       directory (hidden, and not a .md file, so it is never mistaken for a
+       command). One row per command:
+           filename, phrase, description, aliases, mtime_ns, size, hash
+       (hash is a blake2b of the whole file, for tools that compare
+       command sets without reading them)
+    2. On start-up the command index is seeded from the manifest, then
+       verified the usual way: every file is stat()ed (not opened), and
+       only files whose mtime/size differ from their row - edited by hand,
+       new, or deleted - are parsed again
+    3. The manifest follows the index: every change it reports is written
+       back in one transaction, so the next start finds it up to date
+    4. It is only a cache. If it is missing, from an older version or
+       corrupt, it is rebuilt from the .md files; if another process holds
+       it locked, the update is skipped and its stale rows are re-parsed
+       next time
+    5. A connection is only used by the process that opened it: a worker
+       forked from a preloading server (gunicorn) opens its own
+
+USAGE:
+    manifest = CommandManifest(COMMANDS_DIR)
+    manifest.attach(index)      # Before the index's first refresh()
+    index.refresh()             # Parses only what changed since last time
+
+    From a shell (verifies the manifest first, prints filename<TAB>phrase<TAB>description):
+    python3 command_manifest.py [--dir DIR] [--json]
+===================================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+from command_frontmatter import Command
+from command_metrics import DISK_READ_BYTES
+
+# Manifest file name, inside the commands directory (like the write journal)
+MANIFEST_NAME = '.commands-manifest.db'
+
+# Bump when the table layout changes: older manifests are rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    filename    TEXT PRIMARY KEY,
+    phrase      TEXT NOT NULL,
+    description TEXT NOT NULL,
+    aliases     TEXT NOT NULL,      -- JSON array
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    hash        TEXT                -- blake2b of the file, NULL if unreadable
+) WITHOUT ROWID
+"""
+
+# Wait this long (seconds) for another process's write before giving up
+BUSY_TIMEOUT = 2.0
+
+# Connections inherited across fork(): never used or closed in the child
+# (closing one could drop the parent's locks or checkpoint its WAL)
+_INHERITED = []
+
+
+def file_hash(path):
+    """blake2b (128 bit) of a file's bytes, or None if it can't be read."""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+            DISK_READ_BYTES.inc(f.tell())
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class CommandManifest:
+    """
+    SQLite copy of a CommandIndex, kept in step with it.
+
+    Thread-safe: one connection, used under a lock. Several processes may
+    share the file (SQLite's WAL mode lets readers and a writer overlap).
+    """
+
+    def __init__(self, directory, path=None):
+        self.directory = Path(directory)
+        self.path = Path(path) if path is not None else self.directory / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None   # Process that opened _conn
+
+    # ------------------------------------------------------------------
+    # Connection and self-healing
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        if self._conn is not None and self._pid != os.getpid():
+            # Opened before this process was forked: SQLite connections must
+            # not be carried across fork(), so open a new one
+            self._drop()
+        if self._conn is None:
+            try:
+                self._conn = self._open()
+            except sqlite3.DatabaseError:
+                # Not a database (or damaged beyond use): start over
+                self._remove_files()
+                self._conn = self._open()
+            self._pid = os.getpid()
+        return self._conn
+
+    def _open(self):
+        conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT,
+                               isolation_level=None, check_same_thread=False)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')  # It's a cache: skip most fsyncs
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.execute('DROP TABLE IF EXISTS commands')
+                conn.execute(SCHEMA)
+                conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _remove_files(self):
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.unlink(f"{self.path}{suffix}")
+            except FileNotFoundError:
+                pass
+
+    def _drop(self):
+        """Close the connection - or, if another process opened it, just let go of it."""
+        if self._conn is not None:
+            if self._pid == os.getpid():
+                self._conn.close()
+            else:
+                _INHERITED.append(self._conn)
+            self._conn = None
+
+    def _reset(self):
+        """Throw the manifest away; it is rebuilt as the index changes."""
+        self._drop()
+        self._remove_files()
+
+    def close(self):
+        with self._lock:
+            self._drop()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Every row as (filename, (mtime_ns, size), Command) - one sequential read."""
+        with self._lock:
+            try:
+                rows = self._connect().execute(
+                    'SELECT filename, phrase, description, aliases, mtime_ns, size'
+                    ' FROM commands').fetchall()
+            except sqlite3.OperationalError:
+                return []  # Locked by another process: parse the files instead
+            except sqlite3.DatabaseError:
+                self._reset()
+                return []
+        entries = []
+        for filename, phrase, description, aliases, mtime_ns, size in rows:
+            try:
+                aliases = tuple(json.loads(aliases))
+            except ValueError:
+                continue  # Bad row: the file is simply parsed again
+            entries.append((filename, (mtime_ns, size),
+                            Command(filename, phrase, description, aliases)))
+        return entries
+
+    def hashes(self):
+        """{filename: ((mtime_ns, size), hash)} for every row - see command_sync.py."""
+        with self._lock:
+            try:
+                rows = self._connect().execute(
+                    'SELECT filename, mtime_ns, size, hash FROM commands').fetchall()
+            except sqlite3.OperationalError:
+                return {}
+            except sqlite3.DatabaseError:
+                self._reset()
+                return {}
+        return {filename: ((mtime_ns, size), digest) for filename, mtime_ns, size, digest in rows}
+
+    # ------------------------------------------------------------------
+    # Following the index
+    # ------------------------------------------------------------------
+
+    def attach(self, index):
+        """
+        Seed an empty index from the manifest, then record its changes.
+
+        Call before the index's first refresh(): that refresh then verifies
+        the seeded entries instead of parsing every file.
+        """
+        index.seed(self.load())
+        index.subscribe(self.update)
+
+    def update(self, index, changes):
+        """Index listener: write one refresh's changes in one transaction."""
+        rows, gone = [], list(changes.removed)
+        for stem in list(changes.added) + list(changes.updated):
+            entry = index.entry(stem)
+            if entry is None:
+                gone.append(stem)  # Removed again already
+                continue
+            (mtime_ns, size), cmd = entry
+            rows.append((stem, cmd.phrase, cmd.description, json.dumps(list(cmd.aliases)),
+                         mtime_ns, size, file_hash(index.directory / f"{stem}.md")))
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    conn.executemany('INSERT OR REPLACE INTO commands VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+                    conn.executemany('DELETE FROM commands WHERE filename = ?', [(s,) for s in gone])
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                conn.execute('COMMIT')
+            except sqlite3.OperationalError:
+                pass  # Busy: these rows stay stale and are re-parsed next start
+            except sqlite3.DatabaseError:
+                self._reset()
+
+
+def main(argv=None):
+    """Print the catalogue from the manifest, after verifying it against the files."""
+    from command_store import COMMANDS_DIR, CommandStore  # command_store imports this module
+
+    parser = argparse.ArgumentParser(description="List commands from the manifest.")
+    parser.add_argument('--dir', type=Path, default=COMMANDS_DIR,
+                        help=f"commands directory (default: {COMMANDS_DIR})")
+    parser.add_argument('--json', action='store_true', help="one JSON object per line")
+    args = parser.parse_args(argv)
+
+    store = CommandStore(args.dir)
+    try:
+        for cmd in store.commands():
+            if args.json:
+                print(json.dumps(cmd.to_dict()))
+            else:
+                print(f"{cmd.filename}\t{cmd.phrase}\t{cmd.description}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
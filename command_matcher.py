@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Phrase Matcher
+===================================================================================
+
+PURPOSE:
+    Resolves a spoken phrase (e.g. "ok shit's ready now") to the command
+    whose aliases it matches, without loading and comparing every command
+    file on each lookup.
+
+HOW IT WORKS:
+    Every alias is normalized (lowercase, apostrophes dropped, punctuation
+    collapsed to single spaces) and stored in three structures:
+
+    1. EXACT   - a dict from normalized alias to command filenames.
+                 "Shit's ready!" and "shits ready" hit the same entry.
+    2. PREFIX  - a sorted list of aliases searched with bisect, for
+                 "what starts with what I've said so far" lookups.
+    3. CONTAINS - a word-level Aho-Corasick automaton, which finds every
+                 alias that appears inside a longer sentence in a single
+                 pass over the sentence's words.
+
+    4. FUZZY   - an inverted trigram index (3-letter chunk -> aliases),
+                 for transcription near-misses like "shits reddy". Only
+                 aliases sharing enough rare trigrams with the query are
+                 scored, so lookups never compare against every alias.
+
+    Adding or removing a command only touches that command's aliases. The
+    Aho-Corasick failure links are recomputed lazily, once, on the first
+    "contains" lookup after a batch of changes.
+
+USAGE:
+    matcher = PhraseMatcher()
+    matcher.attach(COMMAND_INDEX)   # Follow the command index
+    matcher.match("please run shit's ready")
+    matcher.fuzzy("shits reddy")
+===================================================================================
+"""
+
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter, deque, namedtuple
+
+# One lookup result. kind is 'exact', 'contains', 'prefix' or 'fuzzy';
+# score is 1.0 except for fuzzy matches (trigram similarity, 0-1)
+Match = namedtuple('Match', ['filename', 'alias', 'kind', 'score'], defaults=(1.0,))
+
+# Fuzzy matches scoring below this are not worth showing
+DEFAULT_MIN_SCORE = 0.4
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_phrase(text):
+    """
+    Normalize a phrase for matching.
+
+    Same idea as the filename rules in create_command(): lowercase and drop
+    apostrophes, then turn any other punctuation into single spaces.
+    """
+    text = text.lower().replace("'", "").replace("\u2019", "")
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def trigrams(norm):
+    """Set of 3-character chunks of a normalized phrase, padded at the ends."""
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    """Levenshtein distance: single-character inserts, deletes and swaps."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class _Node:
+    """Aho-Corasick state: word transitions plus the aliases ending here."""
+
+    __slots__ = ('children', 'fail', 'output', 'dict_link', 'depth')
+
+    def __init__(self, depth=0):
+        self.children = {}
+        self.fail = None
+        self.output = {}       # filename -> original alias text
+        self.dict_link = None  # Nearest state on the fail chain with output
+        self.depth = depth     # Number of words from the root
+
+
+class PhraseMatcher:
+    """
+    Compiled phrase-to-command lookup tables.
+
+    Thread-safe: lookups and updates are serialized by one lock, and every
+    lookup is a handful of dict/bisect operations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aliases = {}   # filename -> {normalized alias: original alias}
+        self._exact = {}     # normalized alias -> {filename: original alias}
+        self._sorted = []    # Sorted normalized aliases (prefix lookups)
+        self._root = _Node()
+        self._links_dirty = False
+        self._dead_states = 0  # Output entries removed since the last rebuild
+        self._grams = {}       # trigram -> set of alias ids (fuzzy lookups)
+        self._alias_ids = {}   # normalized alias -> alias id
+        self._id_alias = []    # alias id -> normalized alias (None if free)
+        self._gram_counts = []  # alias id -> number of distinct trigrams
+        self._free_ids = []
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add(self, filename, aliases):
+        """Register (or replace) the aliases of one command."""
+        with self._lock:
+            self._remove(filename)
+            table = {}
+            for alias in aliases:
+                norm = normalize_phrase(alias)
+                if norm and norm not in table:
+                    table[norm] = alias
+            if not table:
+                return
+            self._aliases[filename] = table
+            for norm, alias in table.items():
+                owners = self._exact.get(norm)
+                if owners is None:
+                    owners = self._exact[norm] = {}
+                    insort(self._sorted, norm)
+                    self._index_grams(norm)
+                owners[filename] = alias
+                self._insert_state(norm.split(' ')).output[filename] = alias
+            self._links_dirty = True
+
+    def remove(self, filename):
+        """Forget every alias of one command."""
+        with self._lock:
+            self._remove(filename)
+
+    def _remove(self, filename):
+        table = self._aliases.pop(filename, None)
+        if not table:
+            return
+        for norm in table:
+            owners = self._exact[norm]
+            del owners[filename]
+            if not owners:
+                del self._exact[norm]
+                del self._sorted[bisect_left(self._sorted, norm)]
+                self._unindex_grams(norm)
+            state = self._find_state(norm.split(' '))
+            if state is not None:
+                state.output.pop(filename, None)
+                self._dead_states += 1
+        self._links_dirty = True
+
+    def _index_grams(self, norm):
+        grams = trigrams(norm)
+        if self._free_ids:
+            alias_id = self._free_ids.pop()
+            self._id_alias[alias_id] = norm
+            self._gram_counts[alias_id] = len(grams)
+        else:
+            alias_id = len(self._id_alias)
+            self._id_alias.append(norm)
+            self._gram_counts.append(len(grams))
+        self._alias_ids[norm] = alias_id
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(alias_id)
+
+    def _unindex_grams(self, norm):
+        alias_id = self._alias_ids.pop(norm)
+        for gram in trigrams(norm):
+            postings = self._grams[gram]
+            postings.discard(alias_id)
+            if not postings:
+                del self._grams[gram]
+        self._id_alias[alias_id] = None
+        self._free_ids.append(alias_id)
+
+    def _insert_state(self, words):
+        node = self._root
+        for word in words:
+            child = node.children.get(word)
+            if child is None:
+                child = node.children[word] = _Node(node.depth + 1)
+            node = child
+        return node
+
+    def _find_state(self, words):
+        node = self._root
+        for word in words:
+            node = node.children.get(word)
+            if node is None:
+                return None
+        return node
+
+    def _build_links(self):
+        """Recompute failure and dictionary links with one BFS."""
+        if self._dead_states > max(1000, len(self._exact)):
+            # Many removals left empty branches behind - rebuild the trie
+            self._root = _Node()
+            for norm, owners in self._exact.items():
+                self._insert_state(norm.split(' ')).output.update(owners)
+            self._dead_states = 0
+
+        root = self._root
+        root.fail = root.dict_link = None
+        queue = deque()
+        for child in root.children.values():
+            child.fail = root
+            child.dict_link = None
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for word, child in node.children.items():
+                fail = node.fail
+                while fail is not root and word not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children.get(word, root)
+                child.dict_link = child.fail if child.fail.output else child.fail.dict_link
+                queue.append(child)
+        self._links_dirty = False
+
+    # ------------------------------------------------------------------
+    # Following a CommandIndex
+    # ------------------------------------------------------------------
+
+    def attach(self, index):
+        """Load every command from a CommandIndex and follow its changes."""
+        for cmd in index.commands(refresh=False):
+            self.add(cmd.filename, cmd.aliases or (cmd.phrase,))
+        index.subscribe(self.apply_changes)
+
+    def apply_changes(self, index, changes):
+        """Index listener: update only the commands that changed."""
+        for stem in changes.removed:
+            self.remove(stem)
+        for stem in list(changes.added) + list(changes.updated):
+            cmd = index.get(stem)
+            if cmd is None:
+                self.remove(stem)
+            else:
+                self.add(cmd.filename, cmd.aliases or (cmd.phrase,))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def exact(self, phrase):
+        """Commands with an alias equal to the phrase (after normalizing)."""
+        norm = normalize_phrase(phrase)
+        with self._lock:
+            owners = self._exact.get(norm, {})
+            return [Match(f, a, 'exact') for f, a in owners.items()]
+
+    def prefix(self, phrase, limit=10):
+        """Commands with an alias that starts with the phrase."""
+        norm = normalize_phrase(phrase)
+        results = []
+        if not norm:
+            return results
+        with self._lock:
+            i = bisect_left(self._sorted, norm)
+            while i < len(self._sorted) and len(results) < limit:
+                alias = self._sorted[i]
+                if not alias.startswith(norm):
+                    break
+                for filename, original in self._exact[alias].items():
+                    results.append(Match(filename, original, 'prefix'))
+                i += 1
+        return results[:limit]
+
+    def contains(self, sentence, limit=10):
+        """
+        Commands with an alias that appears, word for word, in the sentence.
+
+        Longer aliases come first: "run all tests" beats "tests".
+        """
+        words = normalize_phrase(sentence).split()
+        found = {}
+        with self._lock:
+            if self._links_dirty:
+                self._build_links()
+            root = node = self._root
+            for word in words:
+                while node is not root and word not in node.children:
+                    node = node.fail
+                node = node.children.get(word, root)
+                hit = node if node.output else node.dict_link
+                while hit is not None:
+                    for filename, alias in hit.output.items():
+                        if found.get(filename, (0,))[0] < hit.depth:
+                            found[filename] = (hit.depth, alias)
+                    hit = hit.dict_link
+        ranked = sorted(found.items(), key=lambda item: (-item[1][0], item[0]))
+        return [Match(f, alias, 'contains') for f, (_, alias) in ranked[:limit]]
+
+    def fuzzy(self, phrase, limit=10, min_score=DEFAULT_MIN_SCORE):
+        """
+        Commands with an alias that looks like the phrase, best first.
+
+        Similarity is the Dice coefficient of the two trigram sets
+        (2 * shared / total), ties broken by edit distance. An alias can
+        only reach min_score if it shares at least `need` trigrams with the
+        query, so it must contain one of the (len(query) - need + 1) rarest
+        query trigrams. Only those short posting lists are read to collect
+        candidates; shared trigrams are then counted for candidates only.
+        """
+        norm = normalize_phrase(phrase)
+        if not norm:
+            return []
+        min_score = min(max(min_score, 0.01), 1.0)
+        query = trigrams(norm)
+        need = max(1, math.ceil(min_score * len(query) / (2 - min_score)))
+        with self._lock:
+            postings = sorted((self._grams.get(g, ()) for g in query), key=len)
+            candidates = set().union(*postings[:len(query) - need + 1])
+
+            # Count shared trigrams for the candidates only
+            shared = Counter()
+            for ids in postings:
+                if len(ids) > len(candidates):
+                    shared.update(candidates.intersection(ids))
+                else:
+                    shared.update(i for i in ids if i in candidates)
+
+            scored = []
+            for alias_id, overlap in shared.items():
+                score = 2 * overlap / (len(query) + self._gram_counts[alias_id])
+                if score >= min_score:
+                    scored.append((score, self._id_alias[alias_id]))
+            scored.sort(reverse=True)
+            # Edit distance is slower, so only use it to order the top few
+            top = scored[:limit * 2]
+            top.sort(key=lambda item: (-round(item[0], 2), edit_distance(norm, item[1])))
+
+            results, seen = [], set()
+            for score, alias in top:
+                for filename, original in self._exact[alias].items():
+                    if filename not in seen:
+                        seen.add(filename)
+                        results.append(Match(filename, original, 'fuzzy', round(score, 3)))
+        return results[:limit]
+
+    def match(self, phrase, limit=10):
+        """
+        Best matches for a phrase: exact hits, then aliases contained in the
+        phrase, then aliases the phrase is a prefix of. Each command appears
+        at most once, under its best kind of match.
+        """
+        results, seen = [], set()
+        for lookup in (self.exact(phrase),
+                       self.contains(phrase, limit),
+                       self.prefix(phrase, limit)):
+            for m in lookup:
+                if m.filename not in seen:
+                    seen.add(m.filename)
+                    results.append(m)
+        return results[:limit]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._exact)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Metrics
+===================================================================================
+
+PURPOSE:
+    Counters, gauges and latency histograms for the command manager, served
+    in Prometheus text format at GET /metrics, so a manager running behind
+    a proxy can be watched and graphed: request rates and latencies per
+    route, requests in flight, files scanned per listing, parse failures,
+    index cache hit rate and disk bytes read and written.
+
+HOW IT WORKS:
+    1. Metrics are plain module-level objects in one process-wide registry;
+       updating one takes a lock and a dict lookup, so they are cheap
+       enough for hot paths (every directory scan, every file read)
+    2. The modules that touch the disk (command_frontmatter,
+       command_storage, command_index, command_manifest) update the
+       storage metrics themselves; the web servers time each request
+    3. render() writes everything in the Prometheus text exposition
+       format (version 0.0.4) - no prometheus_client needed
+    4. Every process has its own numbers: under gunicorn each worker
+       answers /metrics for itself, like any per-process exporter
+
+    Optionally, requests slower than a threshold are profiled: see
+    RequestProfiler (AI_COMMANDS_PROFILE_MS / AI_COMMANDS_PROFILE_DIR).
+
+USAGE:
+    from command_metrics import DISK_READ_BYTES, REGISTRY
+    DISK_READ_BYTES.inc(len(data))
+    REGISTRY.render()                   # Text for GET /metrics
+
+    curl http://localhost:5555/metrics
+===================================================================================
+"""
+
+import cProfile
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+# Content-Type of the Prometheus text format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Files-per-scan buckets (command library sizes)
+FILES_BUCKETS = (10, 100, 1000, 10000, 100000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    """One named metric, optionally split by label values."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}   # label values tuple -> value
+        if not self.labelnames:
+            self._values[()] = self._zero()  # Unlabelled metrics show up as 0 from the start
+
+    def _zero(self):
+        return 0
+
+    def _key(self, labels):
+        labels = tuple(str(value) for value in labels)
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+        return labels
+
+    def value(self, labels=()):
+        """Current value of one series (0 if it was never touched)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        """(name suffix, label values, extra labels, value) for every series."""
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield '', labels, (), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(self.labelnames, labels, extra)} "
+                         f"{_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """A number that only goes up (requests served, bytes read, ...)."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, labels=()):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A number that goes up and down. With function=, its value is read
+    from that callable whenever the metrics are rendered.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def inc(self, amount=1, labels=()):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, labels=()):
+        self.inc(-amount, labels)
+
+    def set(self, value, labels=()):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.function is not None:
+            yield '', (), (), self.function()
+            return
+        yield from super().samples()
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        super().__init__(name, documentation, labels)
+
+    def _zero(self):
+        return [[0] * len(self.buckets), 0, 0]
+
+    def observe(self, value, labels=()):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = self._zero()
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, ([*series[0]], series[1], series[2]))
+                           for labels, series in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield '_bucket', labels, (('le', _format_value(float(bound))),), cumulative
+            yield '_sum', labels, (), total
+            yield '_count', labels, (), count
+
+
+class Registry:
+    """The metrics one process exposes, in registration order."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self):
+        """Every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(metric.render() + '\n' for metric in metrics)
+
+
+# Process-wide registry served at /metrics
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labels=()):
+    return REGISTRY.register(Counter(name, documentation, labels))
+
+
+def gauge(name, documentation, labels=(), function=None):
+    return REGISTRY.register(Gauge(name, documentation, labels, function))
+
+
+def histogram(name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labels, buckets))
+
+
+# ----------------------------------------------------------------------
+# The command manager's metrics
+# ----------------------------------------------------------------------
+
+HTTP_REQUESTS = counter('ai_commands_http_requests_total',
+                        'HTTP requests answered, by method, route and status.',
+                        ('method', 'route', 'status'))
+HTTP_LATENCY = histogram('ai_commands_http_request_duration_seconds',
+                         'Time to answer an HTTP request (to the start of the body for streams).',
+                         ('route',))
+HTTP_IN_FLIGHT = gauge('ai_commands_http_requests_in_flight',
+                       'HTTP requests being answered right now.')
+
+INDEX_SCANS = counter('ai_commands_index_scans_total',
+                      'Directory scans (stat of every command file) by the command index.')
+FILES_SCANNED = histogram('ai_commands_index_files_scanned',
+                          'Command files stat()ed per directory scan.', buckets=FILES_BUCKETS)
+INDEX_CACHE = counter('ai_commands_index_cache_total',
+                      'Files checked by the command index: hit = cached record still valid, '
+                      'miss = file parsed again.', ('result',))
+FILES_PARSED = counter('ai_commands_files_parsed_total',
+                       'Command files parsed (frontmatter read).')
+PARSE_FAILURES = counter('ai_commands_parse_failures_total',
+                         'Command files that could not be read (left out of the listing).')
+LISTENER_FAILURES = counter('ai_commands_index_listener_failures_total',
+                            'Errors raised by index listeners (matcher, search, change feed) '
+                            'while taking in a refresh.')
+
+DISK_READ_BYTES = counter('ai_commands_disk_read_bytes_total',
+                          'Bytes read from command files and the manifest hash pass.')
+DISK_WRITTEN_BYTES = counter('ai_commands_disk_written_bytes_total',
+                             'Bytes written to command files and the write journal.')
+
+NAMESPACE_LOADS = counter('ai_commands_namespace_loads_total',
+                          'Namespaces loaded into memory (first use, or again after eviction).')
+NAMESPACE_EVICTIONS = counter('ai_commands_namespace_evictions_total',
+                              'Namespaces dropped from memory to stay within the budget.')
+
+
+# ----------------------------------------------------------------------
+# Per-request timing and optional profiling (shared by both servers)
+# ----------------------------------------------------------------------
+
+def request_started():
+    """Count a request in flight; returns the start time for request_finished()."""
+    HTTP_IN_FLIGHT.inc()
+    return time.perf_counter()
+
+
+def request_finished(started, method, route, status):
+    """Record one answered request; returns its duration in seconds."""
+    elapsed = time.perf_counter() - started
+    HTTP_IN_FLIGHT.dec()
+    HTTP_REQUESTS.inc(labels=(method, route, status))
+    HTTP_LATENCY.observe(elapsed, labels=(route,))
+    return elapsed
+
+
+class RequestProfiler:
+    """
+    Profiles every request with cProfile and keeps the profiles of slow ones.
+
+    Requests taking at least threshold_ms are written to directory as
+    <time>-<METHOD>-<route>-<ms>ms.prof (open with `python3 -m pstats` or
+    snakeviz); the rest are thrown away. Profiling slows every request
+    down, so it is off unless AI_COMMANDS_PROFILE_MS is set.
+
+    Only for servers with a thread per request: on an event loop a
+    profile would mix every request that ran meanwhile.
+    """
+
+    def __init__(self, threshold_ms, directory):
+        self.threshold = threshold_ms / 1000.0
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_environment(cls):
+        """A profiler configured from the environment, or None if it is off."""
+        threshold = os.environ.get('AI_COMMANDS_PROFILE_MS')
+        if not threshold:
+            return None
+        directory = os.environ.get('AI_COMMANDS_PROFILE_DIR') or 'command-profiles'
+        return cls(float(threshold), directory)
+
+    def start(self):
+        """Start profiling this thread; returns the profile (None if one is already running)."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None  # Another profiler is active (Python 3.12+ allows one per process)
+        return profile
+
+    def finish(self, profile, elapsed, method, route):
+        """Stop profiling; keep the profile if the request was slow. Returns its path or None."""
+        if profile is None:
+            return None
+        profile.disable()
+        if elapsed < self.threshold:
+            return None
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', route).strip('-') or 'root'
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = self.directory / f"{stamp}-{method}-{slug}-{elapsed * 1000:.0f}ms.prof"
+        profile.dump_stats(str(path))
+        return path
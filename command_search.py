@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Full-Text Command Search
+===================================================================================
+
+PURPOSE:
+    Finds commands by anything they contain - a phrase, a word from the
+    description, or what the action does ("verify_test.sh") - ranked best
+    first, with a highlighted snippet showing why each one matched.
+
+HOW IT WORKS:
+    1. Every command is split into lowercase words from three fields:
+           phrase      - its aliases and filename   (weight 3)
+           description                              (weight 2)
+           body        - the action                 (weight 1)
+       "verify_test.sh" becomes the words verify, test and sh.
+    2. An inverted index maps each word to the commands containing it and
+       how often (weighted by field). A query only looks at the posting
+       lists of its own words, never at every command.
+    3. Results are ranked with BM25: rare words count more than common
+       ones, repeated words count more (with diminishing returns), and
+       matches in short commands count more than in long ones.
+    4. PREFIX queries: "verif*" - or the last word while typing - also
+       matches every word starting with it (found by bisect in the sorted
+       vocabulary).
+    5. The index follows the command index: creating, editing or deleting
+       a command re-indexes only that command. Bodies are read once, on
+       the first search, so start-up doesn't pay for it.
+    6. FORK-SAFE: a process forked while another thread was indexing (a
+       gunicorn worker, say) gets fresh locks and, if the index was half
+       built, starts it over - instead of waiting forever for a lock whose
+       holder didn't come along.
+
+USAGE:
+    search = CommandSearch()
+    search.attach(COMMAND_INDEX)
+    search.build_in_background()  # Optional: otherwise the first search builds it
+    total, hits = search.search("runs verify_test.sh", limit=20)
+    for hit in hits: hit.filename, hit.score, hit.snippet, hit.highlights
+===================================================================================
+"""
+
+import heapq
+import math
+import os
+import re
+import threading
+import weakref
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from functools import lru_cache
+from operator import itemgetter
+
+from command_frontmatter import read_body
+
+# Field weights: a word in a command's phrase says more than one in its body
+FIELD_WEIGHTS = {'phrase': 3.0, 'description': 2.0, 'body': 1.0}
+
+# BM25 tuning (the usual defaults): k1 = how fast repeats stop counting,
+# B = how much long commands are penalized
+K1 = 1.2
+B = 0.75
+
+# A prefix matches at most this many vocabulary words ("a*" shouldn't
+# score the whole dictionary)
+MAX_PREFIX_TERMS = 64
+
+# Snippets are about this many characters long
+SNIPPET_CHARS = 160
+
+# Word counts of this many recent bodies are kept, so commands sharing an
+# action (see command_blobs.py) only have it tokenized once
+BODY_CACHE_SIZE = 256
+
+# One search result. highlights are (start, end) offsets into snippet;
+# field is the field the snippet was taken from
+Hit = namedtuple('Hit', ['filename', 'score', 'field', 'snippet', 'highlights'])
+
+# Words: letters and digits, with apostrophes inside ("shit's") kept
+_WORD = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+
+# The same, for text that is already normalized (apostrophes dropped)
+_NORMALIZED_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize_word(word):
+    """Lowercase and drop apostrophes: "Shit's" -> "shits" (like normalize_phrase())."""
+    return word.lower().replace("'", "").replace("’", "")
+
+
+def tokenize(text):
+    """The normalized words of a text, in order."""
+    return _NORMALIZED_WORD.findall(normalize_word(text or ''))
+
+
+@lru_cache(maxsize=BODY_CACHE_SIZE)
+def body_counts(body):
+    """Word -> count for a command body (cached; callers must not modify it)."""
+    return Counter(tokenize(body))
+
+
+def parse_query(query, prefix_last=True):
+    """
+    Query terms as (word, is_prefix) pairs.
+
+    "verif*" is a prefix term; with prefix_last, so is the last word when
+    the query doesn't end in a space (the user is still typing it).
+    """
+    terms = []
+    for part in query.split():
+        words = tokenize(part)
+        for i, word in enumerate(words):
+            terms.append((word, part.endswith('*') and i == len(words) - 1))
+    if terms and prefix_last and query and not query[-1].isspace():
+        terms[-1] = (terms[-1][0], True)
+    # The same word twice adds nothing
+    seen, unique = set(), []
+    for term in terms:
+        if term not in seen:
+            seen.add(term)
+            unique.append(term)
+    return unique
+
+
+def command_fields(cmd, body):
+    """(field, text) pairs of one command, as indexed (body first: the longest)."""
+    phrases = ' '.join(cmd.aliases or (cmd.phrase,))
+    return (('body', body),
+            ('phrase', f"{phrases} {cmd.filename.replace('-', ' ')}"),
+            ('description', cmd.description))
+
+
+def snippet(text, words, prefixes, width=SNIPPET_CHARS):
+    """
+    Cut a window of text around its first matching word.
+
+    Returns (snippet, highlights, number of distinct words matched), with
+    highlights as (start, end) offsets of every matching word in snippet.
+    """
+    text = ' '.join(text.split())
+    spans, matched = [], set()
+    for m in _WORD.finditer(text):
+        word = normalize_word(m.group(0))
+        hit = word if word in words else next((p for p in prefixes if word.startswith(p)), None)
+        if hit is not None:
+            spans.append((m.start(), m.end()))
+            matched.add(hit)
+    start = 0
+    if len(text) > width and spans:
+        start = max(0, min(spans[0][0] - width // 4, len(text) - width))
+    end = min(len(text), start + width)
+    # Don't cut words in half
+    if start > 0:
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < spans[0][0] else start
+    if end < len(text):
+        space = text.rfind(' ', start, end)
+        end = space if space > start else end
+    cut = text[start:end]
+    lead = '…' if start > 0 else ''
+    tail = '…' if end < len(text) else ''
+    shift = len(lead) - start
+    highlights = [(s + shift, e + shift) for s, e in spans if s >= start and e <= end]
+    return lead + cut + tail, highlights, len(matched)
+
+
+# Every CommandSearch, for the after-fork hook at the end of this module
+_INSTANCES = weakref.WeakSet()
+
+
+class CommandSearch:
+    """
+    Inverted index over every command's phrase, description and body.
+
+    Thread-safe. Queries hold a lock only while scoring in memory; file
+    reads (bodies for indexing and snippets) happen outside it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()         # The structures below
+        self._update_lock = threading.Lock()  # One indexing pass at a time
+        self._index = None
+        self._background = False  # build_in_background() was asked for
+        self._clear()
+        _INSTANCES.add(self)
+
+    def _clear(self):
+        self._built = False
+        self._ids = {}          # filename -> doc id
+        self._filenames = []    # doc id -> filename (None if free)
+        self._free_ids = []
+        self._doc_terms = []    # doc id -> {word: weighted count}
+        self._lengths = []      # doc id -> weighted number of words
+        self._total_length = 0.0
+        self._postings = {}     # word -> {doc id: weighted count}
+        self._vocabulary = []   # Sorted words, for prefix lookups
+        self._norms = None      # doc id -> BM25 length normalization (cached)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def attach(self, index):
+        """Follow a CommandIndex; everything is indexed on the first search."""
+        self._index = index
+        index.subscribe(self.apply_changes)
+
+    def build_in_background(self):
+        """Index everything now, on a background thread, so the first search doesn't wait."""
+        self._background = True
+        threading.Thread(target=self._ensure_built, name='command-search-build', daemon=True).start()
+
+    def build(self):
+        """Index everything now, on this thread (e.g. before forking workers)."""
+        self._ensure_built()
+
+    def _after_fork(self):
+        # Only the forking thread exists in the child: a lock another thread
+        # held stays held for good, and what it was indexing is half done
+        torn = self._lock.locked() or self._update_lock.locked()
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        if torn:
+            self._clear()
+        if self._background and not self._built:
+            self.build_in_background()
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        with self._update_lock:
+            if self._built:
+                return
+            for cmd in self._index.commands(refresh=False):
+                self._reindex(cmd.filename)
+            with self._lock:
+                # Sorted once at the end: inserting every new word in order
+                # would be quadratic in the size of the vocabulary
+                self._vocabulary = sorted(self._postings)
+                self._built = True
+
+    def apply_changes(self, index, changes):
+        """Index listener: re-index only the commands that changed."""
+        with self._update_lock:
+            if not self._built:
+                return  # The first search indexes everything as it is then
+            for stem in list(changes.removed) + list(changes.added) + list(changes.updated):
+                self._reindex(stem)
+
+    def _reindex(self, filename):
+        """Index a command as the command index has it now (or drop it)."""
+        cmd = self._index.get(filename)
+        terms = None
+        if cmd is not None:
+            try:
+                body = read_body(self._index.directory / f"{filename}.md")
+            except OSError:
+                body = ''
+            terms = {}
+            for field, text in command_fields(cmd, body):
+                weight = FIELD_WEIGHTS[field]
+                counts = body_counts(text) if field == 'body' else Counter(tokenize(text))
+                if not terms and weight == 1.0:
+                    terms = dict(counts)  # Fast path for the (long) body
+                    continue
+                for word, count in counts.items():
+                    terms[word] = terms.get(word, 0) + count * weight
+        with self._lock:
+            self._remove(filename)
+            if terms:
+                self._add(filename, terms)
+
+    def _add(self, filename, terms):
+        if self._free_ids:
+            doc = self._free_ids.pop()
+            self._filenames[doc] = filename
+            self._doc_terms[doc] = terms
+            self._lengths[doc] = sum(terms.values())
+        else:
+            doc = len(self._filenames)
+            self._filenames.append(filename)
+            self._doc_terms.append(terms)
+            self._lengths.append(sum(terms.values()))
+        self._ids[filename] = doc
+        self._total_length += self._lengths[doc]
+        self._norms = None
+        for word, count in terms.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                if self._built:
+                    insort(self._vocabulary, word)
+            postings[doc] = count
+
+    def _remove(self, filename):
+        doc = self._ids.pop(filename, None)
+        if doc is None:
+            return
+        for word in self._doc_terms[doc]:
+            postings = self._postings[word]
+            del postings[doc]
+            if not postings:
+                del self._postings[word]
+                if self._built:
+                    del self._vocabulary[bisect_left(self._vocabulary, word)]
+        self._total_length -= self._lengths[doc]
+        self._norms = None
+        self._filenames[doc] = None
+        self._doc_terms[doc] = None
+        self._lengths[doc] = 0
+        self._free_ids.append(doc)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _doc_norms(self):
+        """k1 * (1 - b + b * length / average length) for every doc id."""
+        if self._norms is None:
+            average = self._total_length / len(self._ids)
+            self._norms = [K1 * (1 - B + B * length / average) for length in self._lengths]
+        return self._norms
+
+    def _expand(self, word, is_prefix):
+        if not is_prefix:
+            return [word] if word in self._postings else []
+        i = bisect_left(self._vocabulary, word)
+        words = []
+        while i < len(self._vocabulary) and len(words) < MAX_PREFIX_TERMS:
+            if not self._vocabulary[i].startswith(word):
+                break
+            words.append(self._vocabulary[i])
+            i += 1
+        return words
+
+    def search(self, query, limit=20, offset=0, prefix_last=True):
+        """
+        Rank commands for a query. Returns (total matches, [Hit, ...]).
+
+        A command matches if it contains any query word; commands with more
+        (and rarer) query words rank higher. A prefix term counts once per
+        command, with its best-scoring expansion.
+        """
+        terms = parse_query(query, prefix_last)
+        if not terms or limit <= 0:
+            return 0, []
+        self._ensure_built()
+
+        with self._lock:
+            count = len(self._ids)
+            if not count:
+                return 0, []
+            norms = self._doc_norms()
+            scores = {}
+            words, prefixes = set(), set()
+            for word, is_prefix in terms:
+                (prefixes if is_prefix else words).add(word)
+                expanded = self._expand(word, is_prefix)
+                # One word: add straight into the totals. Several (a prefix):
+                # keep each command's best expansion, then add that
+                single = len(expanded) == 1
+                best = scores if single else {}
+                for term in expanded:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    weight = idf * (K1 + 1)
+                    get = best.get
+                    if single:
+                        for doc, tf in postings.items():
+                            best[doc] = get(doc, 0.0) + weight * tf / (tf + norms[doc])
+                    else:
+                        for doc, tf in postings.items():
+                            score = weight * tf / (tf + norms[doc])
+                            if score > get(doc, 0.0):
+                                best[doc] = score
+                if not single:
+                    for doc, score in best.items():
+                        scores[doc] = scores.get(doc, 0.0) + score
+            top = heapq.nlargest(offset + limit, scores.items(), key=itemgetter(1))[offset:]
+            ranked = [(self._filenames[doc], score) for doc, score in top]
+
+        hits = [self._hit(filename, score, words, prefixes) for filename, score in ranked]
+        return len(scores), [hit for hit in hits if hit is not None]
+
+    def _hit(self, filename, score, words, prefixes):
+        """Build the snippet for one result (reads its body if needed)."""
+        cmd = self._index.get(filename)
+        if cmd is None:
+            return None  # Deleted since it was scored
+        best = None
+        for field, text in (('phrase', ', '.join(cmd.aliases or (cmd.phrase,))),
+                            ('description', cmd.description)):
+            found = snippet(text, words, prefixes)
+            if best is None or found[2] > best[1][2]:
+                best = (field, found)
+        # The body is only read when the phrase and description don't show
+        # every query word
+        if best[1][2] < len(words) + len(prefixes):
+            try:
+                body = read_body(self._index.directory / f"{filename}.md")
+            except OSError:
+                body = ''
+            found = snippet(body, words, prefixes)
+            if found[2] > best[1][2]:
+                best = ('body', found)
+        field, (text, highlights, _) = best
+        return Hit(filename, round(score, 4), field, text, highlights)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+
+def _after_fork_in_child():
+    for search in list(_INSTANCES):
+        search._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
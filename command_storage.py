@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Crash-Safe Command Storage
+===================================================================================
+
+PURPOSE:
+    Writes and deletes command files so that nobody - a concurrent reader,
+    another writer, or the next start after a crash - ever sees a half
+    written .md file, and two people saving the same phrase at the same
+    time can't silently overwrite each other.
+
+HOW IT WORKS:
+    1. ATOMIC WRITES: new contents go to a hidden temp file in the same
+       directory, are fsync'ed, then renamed over the real file. A rename
+       is atomic, so readers see either the old file or the new one.
+    2. NO SILENT OVERWRITES: creating a command that already exists fails
+       with CommandExists unless overwrite=True. The check-and-create is a
+       single hard link, so it is atomic even across processes.
+    3. PER-FILENAME LOCKS: writers to the same filename take turns;
+       writers to different filenames never wait for each other.
+    4. OPTIONAL JOURNAL (group commit): instead of one fsync per file,
+       every change is appended to an append-only journal and many
+       concurrent changes share a single fsync of that journal. Files are
+       then renamed into place without their own fsync. A crash is
+       repaired on the next start by replaying the journal. The journal is
+       checkpointed (files flushed, journal emptied) once it grows large.
+
+USAGE:
+    storage = CommandStorage(COMMANDS_DIR)                # fsync per write
+    storage = CommandStorage(COMMANDS_DIR, journal=True)  # group commit
+    storage.write("shits-ready", content)                 # CommandExists?
+    storage.write("shits-ready", content, overwrite=True)
+    storage.delete("shits-ready")
+===================================================================================
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from command_metrics import DISK_WRITTEN_BYTES
+
+# Journal file name, inside the commands directory. It doesn't end in .md
+# so the command index never mistakes it for a command.
+JOURNAL_NAME = '.commands-journal'
+
+# Checkpoint (flush files, empty the journal) after this many bytes
+JOURNAL_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+
+class CommandExists(FileExistsError):
+    """A command with this filename already exists and overwrite was False."""
+
+
+def _fsync_directory(directory):
+    """Make a rename/unlink in this directory durable (no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _sync_filesystem(directory):
+    """
+    Flush every dirty file on the filesystem holding `directory`.
+
+    One syncfs() call (Linux) instead of an fsync per file; falls back to
+    os.sync() elsewhere.
+    """
+    libc_name = ctypes.util.find_library('c')
+    syncfs = getattr(ctypes.CDLL(libc_name), 'syncfs', None) if libc_name else None
+    if syncfs is None:
+        os.sync()
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        syncfs(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_temp(path, data, fsync):
+    """Write data to a hidden temp file next to path; return the temp path."""
+    fd, tmp = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            DISK_WRITTEN_BYTES.inc(len(data))
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp
+
+
+def atomic_write(path, data, overwrite=True, fsync=True):
+    """
+    Atomically replace (or create) a file with `data` (str or bytes).
+
+    With overwrite=False, raises CommandExists if the file already exists;
+    the existence check and the create happen in one atomic link() call.
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    tmp = _write_temp(path, data, fsync)
+    try:
+        if overwrite:
+            os.replace(tmp, path)
+            tmp = None
+        else:
+            try:
+                os.link(tmp, path)
+            except FileExistsError:
+                raise CommandExists(str(path))
+    finally:
+        if tmp is not None:
+            os.unlink(tmp)
+    if fsync:
+        _fsync_directory(path.parent)
+
+
+def _identity(path):
+    """(device, inode) of a file: tells our file from one put there since."""
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino)
+
+
+class FilenameLocks:
+    """One lock per filename, created on demand and dropped when unused."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}  # filename -> [lock, number of holders/waiters]
+
+    @contextmanager
+    def hold(self, filename):
+        with self._guard:
+            entry = self._locks.setdefault(filename, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[filename]
+
+
+class WriteJournal:
+    """
+    Append-only log of pending changes with group commit.
+
+    Each record is one JSON line: {"op": "write"|"delete", "name": ...,
+    "data": ...}. commit() makes every record appended so far durable with
+    a single fsync; threads that arrive while an fsync is running wait for
+    the next one instead of issuing their own.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'ab')
+        self._cond = threading.Condition()
+        self._appended = 0   # Sequence number of the last appended record
+        self._durable = 0    # Sequence number known to be on disk
+        self._flushing = False
+
+    def append(self, op, name, data=None):
+        """Append one record; returns its sequence number for commit()."""
+        record = {'op': op, 'name': name}
+        if data is not None:
+            record['data'] = data
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        with self._cond:
+            self._file.write(line)
+            DISK_WRITTEN_BYTES.inc(len(line))
+            self._appended += 1
+            return self._appended
+
+    def commit(self, seq):
+        """Block until record `seq` (and everything before it) is durable."""
+        with self._cond:
+            while self._durable < seq:
+                if self._flushing:
+                    # Someone else is fsyncing - ride along with the next one
+                    self._cond.wait()
+                    continue
+                self._flushing = True
+                target = self._appended
+                self._file.flush()
+                self._cond.release()
+                try:
+                    os.fsync(self._file.fileno())
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                self._durable = max(self._durable, target)
+                self._cond.notify_all()
+
+    def size(self):
+        with self._cond:
+            return self._file.tell()
+
+    def records(self):
+        """Every complete record in the journal file (a torn last line is skipped)."""
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # Crash mid-append: this change was never acknowledged
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    break
+
+    def truncate(self):
+        """Empty the journal (after every change in it is safely on disk)."""
+        with self._cond:
+            self._file.flush()
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._cond:
+            self._file.close()
+
+
+class CommandStorage:
+    """
+    Writes and deletes command files in one directory, crash-safely.
+
+    Filenames are given without the .md extension, like everywhere else in
+    the command manager.
+    """
+
+    def __init__(self, directory, journal=False, encode=None):
+        self.directory = Path(directory)
+        # Optional content -> content hook run on every write before it is
+        # journaled or written (e.g. moving bodies into shared blobs)
+        self.encode = encode
+        self._locks = FilenameLocks()
+        self._journal = None
+        # Writers in flight vs. a checkpoint: the journal may only be emptied
+        # once every change appended to it has also been applied
+        self._state = threading.Condition()
+        self._inflight = 0
+        self._checkpointing = False
+        if journal:
+            self._journal = WriteJournal(self.directory / JOURNAL_NAME)
+            self.recover()
+
+    @property
+    def journaled(self):
+        return self._journal is not None
+
+    def path(self, filename):
+        return self.directory / f"{filename}.md"
+
+    def exists(self, filename):
+        return self.path(filename).exists()
+
+    @contextmanager
+    def _changing(self, filenames):
+        """Hold the locks for these filenames and count as an in-flight writer."""
+        with self._state:
+            while self._checkpointing:
+                self._state.wait()
+            self._inflight += 1
+        try:
+            with ExitStack() as stack:
+                # Always lock in sorted order so two batches can't deadlock
+                for filename in sorted(set(filenames)):
+                    stack.enter_context(self._locks.hold(filename))
+                yield
+        finally:
+            with self._state:
+                self._inflight -= 1
+                self._state.notify_all()
+
+    # ------------------------------------------------------------------
+    # Changes
+    # ------------------------------------------------------------------
+
+    def write(self, filename, content, overwrite=True):
+        """
+        Write one command file. Raises CommandExists if it exists and
+        overwrite is False.
+        """
+        self.write_many([(filename, content)], overwrite=overwrite)
+
+    def write_many(self, items, overwrite=True):
+        """
+        Write many (filename, content) pairs.
+
+        Without the journal each file is written atomically with its own
+        fsync. With the journal, the whole batch shares one fsync (and
+        concurrent batches may share it too). With overwrite=False nothing
+        is written if any of the files already exists - including one
+        created by another process midway through the batch.
+        """
+        items = list(items)
+        if not items:
+            return
+        if self.encode is not None:
+            items = [(filename, self.encode(content)) for filename, content in items]
+        with self._changing(f for f, _ in items):
+            if not overwrite:
+                for filename, _ in items:
+                    if self.exists(filename):
+                        raise CommandExists(str(self.path(filename)))
+
+            if self._journal is None:
+                created = []   # (filename, identity) of files this batch created
+                try:
+                    for filename, content in items:
+                        atomic_write(self.path(filename), content, overwrite=overwrite)
+                        if not overwrite:
+                            created.append((filename, _identity(self.path(filename))))
+                except OSError:
+                    # E.g. another process created one of them since the check:
+                    # take back what this batch created, so it writes all or nothing
+                    self._remove_created(created)
+                    raise
+                return
+
+            for filename, content in items:
+                seq = self._journal.append('write', filename, content)
+            self._journal.commit(seq)
+            for filename, content in items:
+                atomic_write(self.path(filename), content, fsync=False)
+        self._maybe_checkpoint()
+
+    def delete(self, filename):
+        """Delete one command file. Returns False if it didn't exist."""
+        return bool(self.delete_many([filename]))
+
+    def delete_many(self, filenames):
+        """Delete many command files. Returns the filenames that existed."""
+        filenames = list(filenames)
+        with self._changing(filenames):
+            existing = [f for f in filenames if self.exists(f)]
+            if not existing:
+                return []
+            if self._journal is None:
+                for filename in existing:
+                    self._apply_delete(filename)
+                _fsync_directory(self.directory)
+                return existing
+
+            for filename in existing:
+                seq = self._journal.append('delete', filename)
+            self._journal.commit(seq)
+            for filename in existing:
+                self._apply_delete(filename)
+        self._maybe_checkpoint()
+        return existing
+
+    # ------------------------------------------------------------------
+    # Journal maintenance
+    # ------------------------------------------------------------------
+
+    def _remove_created(self, created):
+        for filename, identity in created:
+            try:
+                if _identity(self.path(filename)) == identity:
+                    self.path(filename).unlink()
+            except FileNotFoundError:
+                pass
+        if created:
+            _fsync_directory(self.directory)
+
+    def _apply_delete(self, filename):
+        try:
+            self.path(filename).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _maybe_checkpoint(self):
+        if self._journal.size() >= JOURNAL_CHECKPOINT_BYTES:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Flush every applied change to disk, then empty the journal."""
+        if self._journal is None:
+            return
+        with self._state:
+            while self._checkpointing:
+                self._state.wait()
+            self._checkpointing = True
+            while self._inflight:
+                self._state.wait()
+        try:
+            _sync_filesystem(self.directory)
+            self._journal.truncate()
+        finally:
+            with self._state:
+                self._checkpointing = False
+                self._state.notify_all()
+
+    def recover(self):
+        """
+        Replay the journal after a crash so every acknowledged change is on
+        disk, then empty it. Returns the number of records replayed.
+        """
+        if self._journal is None:
+            return 0
+        count = 0
+        for record in self._journal.records():
+            if record['op'] == 'write':
+                atomic_write(self.path(record['name']), record['data'], fsync=False)
+            elif record['op'] == 'delete':
+                self._apply_delete(record['name'])
+            count += 1
+        if count:
+            self.checkpoint()
+        return count
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Command Store
+===================================================================================
+
+PURPOSE:
+    The one place that knows how commands are kept on disk. The web manager
+    (web_command_manager.py, async_command_manager.py) and the desktop GUI
+    (command_manager_gui.py) both build on it, so the commands directory,
+    filename rules, file format, caching and crash-safe writes are defined
+    once - and any speed-up made here helps every front end.
+
+HOW IT WORKS:
+    A CommandStore ties together the pieces that already exist:
+        command_frontmatter - the Command record, file format, filename rules
+        command_storage     - atomic writes/deletes (optional group commit)
+        command_index       - parsed commands cached in memory by mtime/size
+        command_manifest    - on-disk copy of the index, so a fresh process
+                              doesn't have to parse every file
+        command_blobs       - optional: identical action bodies stored once
+        command_watcher     - optional live updates for outside edits
+        command_bulk        - batch import/export bundles
+    Every change made through the store updates the index for just the
+    files it touched, in one notification per call.
+
+USAGE:
+    store = CommandStore()                      # ~/AI-Collaboration-Management/.claude/commands
+    store.create("shit's ready", "./verify_test.sh", aliases="check it")
+    store.commands()                            # Sorted Command records, from memory
+    store.write_many([(filename, content), ...])  # One index update for the batch
+    store.delete_many(["shits-ready", ...])
+    store.watch()                               # Follow edits made elsewhere
+    store.close()
+
+    Set AI_COMMANDS_DIR to use another commands directory, and
+    AI_COMMANDS_DEDUP=1 to store each distinct action body only once
+    (see command_blobs.py - Claude itself can't read such files).
+===================================================================================
+"""
+
+import os
+from pathlib import Path
+
+from command_blobs import BlobStore
+from command_bulk import export_bundle, import_bundle
+from command_frontmatter import (
+    DEFAULT_DESCRIPTION, command_filename, pack_command, read_body, read_command,
+    render_command, split_aliases)
+from command_index import CommandIndex
+from command_manifest import CommandManifest
+from command_storage import CommandStorage
+from command_watcher import POLL_INTERVAL, CommandWatcher
+
+
+def default_commands_dir():
+    """The commands directory: $AI_COMMANDS_DIR, or the framework default."""
+    configured = os.environ.get('AI_COMMANDS_DIR')
+    if configured:
+        return Path(configured).expanduser()
+    return Path.home() / "AI-Collaboration-Management" / ".claude" / "commands"
+
+
+# Where command files live unless a store is given another directory
+COMMANDS_DIR = default_commands_dir()
+
+
+class CommandStore:
+    """
+    Commands in one directory: read from a shared in-memory index, written
+    crash-safely, with batch operations.
+
+    Thread-safe; one store per directory is meant to be shared by the
+    whole process.
+    """
+
+    def __init__(self, directory=None, journal=False, executor=None, manifest=True,
+                 dedup=None):
+        self.directory = Path(directory) if directory is not None else COMMANDS_DIR
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if dedup is None:
+            dedup = os.environ.get('AI_COMMANDS_DEDUP', '') == '1'
+        # Deduplicated mode: every write moves the action body into the
+        # shared blob store. Files already on disk are read either way.
+        self.blobs = BlobStore(self.directory)
+        self.dedup = dedup
+        self.storage = CommandStorage(self.directory, journal=journal,
+                                      encode=self._pack if dedup else None)
+        self.index = CommandIndex(self.directory, executor=executor)
+        self.watcher = None
+        # Seed the index from the last run; the first refresh() only
+        # re-parses files that changed since
+        self.manifest = None
+        if manifest:
+            self.manifest = CommandManifest(self.directory)
+            self.manifest.attach(self.index)
+
+    def path(self, filename):
+        return self.storage.path(filename)
+
+    def _pack(self, content):
+        return pack_command(content, self.blobs)
+
+    # ------------------------------------------------------------------
+    # Reading (answered from the index)
+    # ------------------------------------------------------------------
+
+    def refresh(self, max_age=None, progress=None, cancel=None):
+        """Pick up outside edits; see CommandIndex.refresh()."""
+        return self.index.refresh(max_age, progress, cancel)
+
+    def commands(self, refresh=True):
+        """Every Command, sorted by filename."""
+        return self.index.commands(refresh)
+
+    def snapshot(self, refresh=True):
+        """(fingerprint, changed_at, commands) - see CommandIndex.snapshot()."""
+        return self.index.snapshot(refresh)
+
+    def get(self, filename):
+        """The cached Command for one file, or None."""
+        return self.index.get(filename)
+
+    def read(self, filename):
+        """Full text of a command file (shared body inline). Raises FileNotFoundError."""
+        return read_command(self.path(filename))
+
+    def body(self, filename):
+        """Just the action (everything after the frontmatter)."""
+        return read_body(self.path(filename))
+
+    def subscribe(self, listener):
+        """Call listener(index, changes) after every change; see CommandIndex."""
+        self.index.subscribe(listener)
+
+    def __len__(self):
+        return len(self.index)
+
+    # ------------------------------------------------------------------
+    # Changes (the index is updated for just the touched files)
+    # ------------------------------------------------------------------
+
+    def create(self, phrase, action, description=DEFAULT_DESCRIPTION, aliases=(),
+               overwrite=False):
+        """
+        Create a command from form fields; returns its filename.
+
+        Raises ValueError if the phrase has no letters or numbers, and
+        CommandExists if the command exists and overwrite is False.
+        """
+        filename = command_filename(phrase)
+        if not filename:
+            raise ValueError('phrase needs at least one letter or number')
+        content = render_command(description, split_aliases(phrase, aliases), action)
+        self.write(filename, content, overwrite=overwrite)
+        return filename
+
+    def write(self, filename, content, overwrite=True):
+        """Write one command file. Raises CommandExists (see CommandStorage.write)."""
+        self.write_many([(filename, content)], overwrite=overwrite)
+
+    def write_many(self, items, overwrite=True):
+        """Write many (filename, content) pairs; one index update for all of them."""
+        items = list(items)
+        self.storage.write_many(items, overwrite=overwrite)
+        return self.index.refresh_files([filename for filename, _ in items])
+
+    def delete(self, filename):
+        """Delete one command file. Returns False if it didn't exist."""
+        return bool(self.delete_many([filename]))
+
+    def delete_many(self, filenames):
+        """Delete many command files. Returns the filenames that existed."""
+        deleted = self.storage.delete_many(filenames)
+        if deleted:
+            self.index.refresh_files(deleted)
+        return deleted
+
+    def import_bundle(self, data, fmt, partial=False, overwrite=False):
+        """Import an upload (ndjson/json/tar/zip); see command_bulk.import_bundle()."""
+        return import_bundle(data, fmt, self.storage, index=self.index, partial=partial,
+                             overwrite=overwrite)
+
+    def export_bundle(self, commands=None, fmt='ndjson'):
+        """Export commands (default: all of them) as one bundle."""
+        if commands is None:
+            commands = self.commands()
+        return export_bundle(self.directory, commands, fmt)
+
+    # ------------------------------------------------------------------
+    # Live updates
+    # ------------------------------------------------------------------
+
+    def watch(self, poll_interval=POLL_INTERVAL):
+        """Start following edits made outside this process (idempotent)."""
+        if self.watcher is None:
+            self.watcher = CommandWatcher(self.index, poll_interval)
+            self.watcher.start()
+        return self.watcher
+
+    def close(self):
+        """Stop the watcher, if any, and close the manifest."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self.manifest is not None:
+            self.manifest.close()
@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Delta Sync Between Machines
+===================================================================================
+
+PURPOSE:
+    Keeps the commands directory of several machines (laptops, build hosts)
+    in step without copying it around by hand: two sides compare a hash
+    tree of their commands and send each other only the files that differ,
+    in one batch. Syncing 50,000 commands of which 10 changed moves a few
+    kilobytes, not the whole set.
+
+HOW IT WORKS:
+    1. Each side builds a Merkle tree of its commands: every file is
+       placed by a hash of its name into one of 16^3 buckets; a bucket's
+       hash covers its (filename, content hash) pairs, and every node above
+       hashes its 16 children. Content hashes come from the manifest
+       (command_manifest.py), so building the tree reads no command files
+    2. The side running `sync` walks the other side's tree from the top,
+       asking only for the children of nodes whose hashes differ (one
+       request per level, at most four). Small subtrees are answered with
+       their file list straight away
+    3. Each differing file is decided three-way, against the hash both
+       sides had at the previous sync (kept in .commands-sync.db):
+           only this side changed it   -> push
+           only the other side did     -> pull (a deletion is a change too)
+           both did, differently       -> conflict: with --conflicts newer
+                                          (the default) the newer file wins
+                                          (an edit beats a deletion); with
+                                          --conflicts report both are kept
+                                          and the file is listed
+    4. Files go over in one gzip'd ndjson stream each way. Every item
+       carries the hash the receiver is expected to have; if the file
+       changed there in the meantime it is left alone and reported as a
+       conflict, never overwritten blindly
+
+    The other side is a running command manager (http://host:5555 - the
+    /api/sync/* endpoints) or another commands directory on this machine.
+    Both sides should use the same AI_COMMANDS_DEDUP setting: hashes are
+    of the files as stored.
+
+USAGE:
+    python3 command_sync.py http://buildhost:5555          # Two-way sync
+    python3 command_sync.py ~/backup/commands --mode push  # One way only
+    python3 command_sync.py http://laptop:5555 --dry-run   # Only show what would happen
+    python3 command_sync.py http://teamhost:5555/api/design-team   # A namespace there
+    (--dir DIR picks this side's directory; default: the usual one)
+
+    python3 web_command_manager.py sync http://buildhost:5555   # Same thing
+===================================================================================
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from bisect import bisect_left
+from collections import namedtuple
+from pathlib import Path
+
+from command_manifest import file_hash
+
+# Levels of 16-way buckets under the root (16^3 = 4096 buckets)
+TREE_DEPTH = 3
+
+# A node with at most this many files is answered with the files themselves
+LEAF_ENTRIES = 64
+
+# Node hashes are 64 bit (they only have to tell two trees apart)
+NODE_HASH_SIZE = 8
+
+FANOUT = '0123456789abcdef'
+
+# Most prefixes one tree request may ask about (every bucket, plus room)
+MAX_PREFIXES = 16 ** TREE_DEPTH + 16 ** (TREE_DEPTH - 1) + 16 + 1
+
+# A peer's tree is rebuilt at most this often while the files don't change
+# (sync rounds follow each other within milliseconds)
+TREE_RESCAN_INTERVAL = 1.0
+
+# Last-synced hashes, inside the commands directory (like the manifest)
+STATE_NAME = '.commands-sync.db'
+
+# Content-Type of a batch of files (gzip'd ndjson)
+BATCH_CONTENT_TYPE = 'application/gzip'
+
+# Seconds to wait for a remote manager
+HTTP_TIMEOUT = 60
+
+MODES = ('both', 'push', 'pull')
+POLICIES = ('newer', 'report')
+
+
+class SyncError(Exception):
+    """The other side could not be reached or sent something unusable."""
+
+
+# ============================================================================
+# The hash tree
+# ============================================================================
+
+def _key(filename):
+    # Spreads files evenly over the buckets, whatever their names look like
+    return hashlib.blake2b(filename.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _node_hash(parts):
+    return hashlib.blake2b('\n'.join(parts).encode('utf-8'),
+                           digest_size=NODE_HASH_SIZE).hexdigest()
+
+
+class SyncTree:
+    """Merkle tree over {filename: (content hash, mtime_ns)} of one directory."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        keyed = sorted((_key(filename), filename) for filename in entries)
+        self._keys = [key for key, _ in keyed]
+        self._names = [filename for _, filename in keyed]
+        self._hashes = {}   # prefix -> hash, for non-empty nodes only
+
+        buckets = {}
+        for key, filename in keyed:
+            buckets.setdefault(key[:TREE_DEPTH], []).append(f"{filename}\0{entries[filename][0]}")
+        level = {prefix: _node_hash(sorted(lines)) for prefix, lines in buckets.items()}
+        self._hashes.update(level)
+        for depth in range(TREE_DEPTH - 1, -1, -1):
+            parents = {}
+            for prefix in sorted(level):
+                parents.setdefault(prefix[:depth], []).append(prefix[-1] + level[prefix])
+            level = {prefix: _node_hash(parts) for prefix, parts in parents.items()}
+            self._hashes.update(level)
+
+    def hash(self, prefix=''):
+        """Hash of the node at prefix (None if no file is under it)."""
+        return self._hashes.get(prefix)
+
+    def under(self, prefix):
+        """Filenames in the subtree at prefix."""
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + 'g')  # 'g' sorts after every hex digit
+        return self._names[start:end]
+
+    def describe(self, prefix):
+        """One node as sent to the other side: its hash plus children or files."""
+        digest = self._hashes.get(prefix)
+        if digest is None:
+            return {'hash': None}
+        names = self.under(prefix)
+        if len(names) <= LEAF_ENTRIES or len(prefix) >= TREE_DEPTH:
+            return {'hash': digest,
+                    'entries': {name: list(self.entries[name]) for name in names}}
+        return {'hash': digest,
+                'children': {c: self._hashes[prefix + c] for c in FANOUT
+                             if prefix + c in self._hashes}}
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def compare(local, peer):
+    """
+    Files whose content differs between the local tree and a peer's:
+    {filename: (local (hash, mtime_ns) or None, remote ... or None)}.
+    Returns (differences, requests made).
+    """
+    differing = {}
+    pending, rounds = [''], 0
+    while pending:
+        nodes = peer.nodes(pending)
+        rounds += 1
+        pending = []
+        for prefix, node in nodes.items():
+            if node.get('hash') == local.hash(prefix):
+                continue
+            if 'children' in node:
+                for c in FANOUT:
+                    child = prefix + c
+                    theirs = node['children'].get(c)
+                    if theirs == local.hash(child):
+                        continue
+                    if theirs is None:
+                        for name in local.under(child):
+                            differing[name] = (local.entries[name], None)
+                    else:
+                        pending.append(child)
+                continue
+            theirs = {name: tuple(entry) for name, entry in node.get('entries', {}).items()}
+            for name in set(local.under(prefix)) | theirs.keys():
+                mine, other = local.entries.get(name), theirs.get(name)
+                if (mine and mine[0]) != (other and other[0]):
+                    differing[name] = (mine, other)
+    return differing, rounds
+
+
+# ============================================================================
+# One side of a sync: a command store
+# ============================================================================
+
+def _safe_filename(filename):
+    # Looser than command_filename(): hand-named files sync too, but
+    # nothing may leave the directory or land on a hidden file
+    return (isinstance(filename, str) and filename and not filename.startswith('.')
+            and not any(c in filename for c in '/\\\0'))
+
+
+def encode_batch(items):
+    """A batch of file items as gzip'd ndjson."""
+    lines = ''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items)
+    return gzip.compress(lines.encode('utf-8'), compresslevel=6)
+
+
+def decode_batch(data):
+    """The items of a batch. Raises SyncError if it isn't one."""
+    try:
+        text = gzip.decompress(data).decode('utf-8')
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except (OSError, EOFError, UnicodeDecodeError, ValueError) as e:
+        raise SyncError(f"bad sync batch: {e}") from None
+    if not all(isinstance(item, dict) and _safe_filename(item.get('filename'))
+               for item in items):
+        raise SyncError("bad sync batch: every item needs a plain filename")
+    return items
+
+
+class SyncSource:
+    """
+    A command store as one side of a sync: its tree, plus reading and
+    applying batches of files. The web managers answer /api/sync/* with
+    one of these; LocalPeer wraps one for directory-to-directory syncs.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._tree = None
+        self._fingerprint = None
+
+    def entries(self):
+        """{filename: (content hash, mtime_ns)} for every command, current."""
+        index = self.store.index
+        stamps = index.stamps()
+        known = self.store.manifest.hashes() if self.store.manifest is not None else {}
+        entries = {}
+        for filename, stamp in stamps.items():
+            row = known.get(filename)
+            digest = row[1] if row is not None and tuple(row[0]) == stamp else None
+            if digest is None:
+                # Not in the manifest yet (or it was busy): hash the file
+                digest = file_hash(self.store.path(filename))
+            if digest is not None:
+                entries[filename] = (digest, stamp[0])
+        return entries
+
+    def tree(self, max_age=TREE_RESCAN_INTERVAL):
+        """The current tree (rebuilt only when the directory changed)."""
+        self.store.refresh(max_age=max_age)
+        with self._lock:
+            fingerprint = (self.store.index.fingerprint, len(self.store))
+            if self._tree is None or fingerprint != self._fingerprint:
+                self._tree = SyncTree(self.entries())
+                self._fingerprint = fingerprint
+            return self._tree
+
+    def nodes(self, prefixes):
+        """Describe tree nodes: {prefix: node}. Raises ValueError for a bad request."""
+        if not isinstance(prefixes, list) or len(prefixes) > MAX_PREFIXES:
+            raise ValueError(f'prefixes must be a list of at most {MAX_PREFIXES} strings')
+        if not all(isinstance(p, str) and len(p) <= TREE_DEPTH and set(p) <= set(FANOUT)
+                   for p in prefixes):
+            raise ValueError('prefixes are hex strings of up to '
+                             f'{TREE_DEPTH} characters')
+        tree = self.tree()
+        return {prefix: tree.describe(prefix) for prefix in prefixes}
+
+    def fetch(self, filenames):
+        """A batch with the current content of these files (deleted ones marked so)."""
+        if not isinstance(filenames, list):
+            raise ValueError('files must be a list of filenames')
+        items = []
+        for filename in filenames:
+            if not _safe_filename(filename):
+                raise ValueError(f'Invalid filename: {filename!r}')
+            try:
+                items.append({'filename': filename, 'content': self.store.read(filename)})
+            except FileNotFoundError:
+                items.append({'filename': filename, 'deleted': True})
+        return encode_batch(items)
+
+    def apply(self, data):
+        """
+        Write and delete the files of a batch. An item whose "base" (the
+        hash it expects here, null for "no such file") no longer matches is
+        skipped and reported as a conflict.
+        Returns {"written": [...], "deleted": [...], "conflicts": [...]}.
+        """
+        items = decode_batch(data)
+        writes, deletes, conflicts = [], [], []
+        for item in items:
+            filename = item['filename']
+            if file_hash(self.store.path(filename)) != item.get('base'):
+                conflicts.append(filename)
+            elif item.get('deleted'):
+                deletes.append(filename)
+            elif isinstance(item.get('content'), str):
+                writes.append((filename, item['content']))
+            else:
+                conflicts.append(filename)  # Neither content nor a deletion
+        if writes:
+            self.store.write_many(writes)
+        deleted = self.store.delete_many(deletes) if deletes else []
+        return {'written': [filename for filename, _ in writes], 'deleted': deleted,
+                'conflicts': conflicts}
+
+
+# ============================================================================
+# The other side: another directory or a running manager
+# ============================================================================
+
+class LocalPeer:
+    """Another commands directory on this machine."""
+
+    def __init__(self, store):
+        self.source = SyncSource(store)
+        self.name = str(store.directory.resolve())
+        self.bytes_sent = self.bytes_received = 0
+
+    def _count(self, sent, received):
+        # What the same exchange would move over HTTP
+        self.bytes_sent += len(sent)
+        self.bytes_received += len(received)
+
+    def nodes(self, prefixes):
+        nodes = self.source.nodes(prefixes)
+        self._count(json.dumps({'prefixes': prefixes}), json.dumps({'nodes': nodes}))
+        return nodes
+
+    def fetch(self, filenames):
+        data = self.source.fetch(filenames)
+        self._count(json.dumps({'files': filenames}), data)
+        return data
+
+    def apply(self, data):
+        result = self.source.apply(data)
+        self._count(data, json.dumps(result))
+        return result
+
+
+class HttpPeer:
+    """A command manager reached over HTTP (web_command_manager.py or the async one)."""
+
+    def __init__(self, url, timeout=HTTP_TIMEOUT):
+        self.url = url.rstrip('/')
+        self.name = self.url
+        self.timeout = timeout
+        # http://host:5555 is the server's default commands,
+        # http://host:5555/api/NAME one of its namespaces
+        if urllib.parse.urlsplit(self.url).path.startswith('/api/'):
+            self.api = self.url
+        else:
+            self.api = self.url + '/api'
+        self.bytes_sent = self.bytes_received = 0
+
+    def _post(self, path, body, content_type):
+        request = urllib.request.Request(self.api + path, data=body, method='POST',
+                                         headers={'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = response.read()
+        except urllib.error.HTTPError as e:
+            raise SyncError(f"{self.api}{path}: HTTP {e.code} {e.read()[:200]!r}") from None
+        except (urllib.error.URLError, OSError) as e:
+            raise SyncError(f"{self.url}: {getattr(e, 'reason', e)}") from None
+        self.bytes_sent += len(body)
+        self.bytes_received += len(data)
+        return data
+
+    def _post_json(self, path, payload):
+        data = self._post(path, json.dumps(payload).encode('utf-8'), 'application/json')
+        try:
+            return json.loads(data)
+        except ValueError:
+            raise SyncError(f"{self.api}{path}: not a JSON answer") from None
+
+    def nodes(self, prefixes):
+        return self._post_json('/sync/tree', {'prefixes': prefixes})['nodes']
+
+    def fetch(self, filenames):
+        return self._post('/sync/fetch', json.dumps({'files': filenames}).encode('utf-8'),
+                          'application/json')
+
+    def apply(self, data):
+        answer = self._post('/sync/apply', data, BATCH_CONTENT_TYPE)
+        try:
+            return json.loads(answer)
+        except ValueError:
+            raise SyncError(f"{self.api}/sync/apply: not a JSON answer") from None
+
+
+def open_peer(target):
+    """A peer for a URL or a directory path."""
+    if target.startswith(('http://', 'https://')):
+        return HttpPeer(target)
+    from command_store import CommandStore  # command_store doesn't import this module
+    return LocalPeer(CommandStore(Path(target).expanduser()))
+
+
+# ============================================================================
+# Last-synced hashes
+# ============================================================================
+
+class SyncState:
+    """
+    The hash each file had on both sides after the last sync with each
+    peer - what tells "changed here" from "changed there".
+    """
+
+    def __init__(self, directory):
+        self.path = Path(directory) / STATE_NAME
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path), isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS base (peer TEXT, filename TEXT,'
+                               ' hash TEXT, PRIMARY KEY (peer, filename)) WITHOUT ROWID')
+        return self._conn
+
+    def known(self, peer):
+        """Has this peer been synced with before?"""
+        row = self._connect().execute('SELECT 1 FROM base WHERE peer = ? LIMIT 1',
+                                      (peer,)).fetchone()
+        return row is not None
+
+    def get(self, peer, filenames):
+        conn = self._connect()
+        found = {}
+        for filename in filenames:
+            row = conn.execute('SELECT hash FROM base WHERE peer = ? AND filename = ?',
+                               (peer, filename)).fetchone()
+            if row is not None:
+                found[filename] = row[0]
+        return found
+
+    def update(self, peer, hashes, removed=()):
+        """Record {filename: hash} as in sync; forget removed files."""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR REPLACE INTO base VALUES (?, ?, ?)',
+                             [(peer, filename, digest) for filename, digest in hashes.items()])
+            conn.executemany('DELETE FROM base WHERE peer = ? AND filename = ?',
+                             [(peer, filename) for filename in removed])
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ============================================================================
+# Sync
+# ============================================================================
+
+SyncReport = namedtuple('SyncReport', [
+    'pulled', 'pushed', 'conflicts', 'skipped', 'rounds', 'bytes_sent', 'bytes_received'])
+
+
+def plan(differing, base, mode='both', policy='newer'):
+    """
+    Decide every differing file: returns (pulls, pushes, conflicts, skipped),
+    lists of filenames. skipped: changes the mode doesn't send.
+    """
+    pulls, pushes, conflicts, skipped = [], [], [], []
+    for filename, (mine, theirs) in sorted(differing.items()):
+        local, remote, was = mine and mine[0], theirs and theirs[0], base.get(filename)
+        if local == was:
+            direction = 'pull'
+        elif remote == was:
+            direction = 'push'
+        elif policy == 'report':
+            conflicts.append(filename)
+            continue
+        elif mine and theirs:
+            direction = 'push' if mine[1] > theirs[1] else 'pull'
+        else:
+            direction = 'push' if mine else 'pull'  # An edit beats a deletion
+        if mode not in ('both', direction):
+            skipped.append(filename)
+        else:
+            (pulls if direction == 'pull' else pushes).append(filename)
+    return pulls, pushes, conflicts, skipped
+
+
+def sync(store, peer, mode='both', policy='newer', dry_run=False):
+    """Sync a store with a peer (LocalPeer/HttpPeer). Returns a SyncReport."""
+    if mode not in MODES or policy not in POLICIES:
+        raise ValueError(f"mode is one of {MODES}, policy one of {POLICIES}")
+    source = SyncSource(store)
+    local = source.tree(max_age=None)
+    differing, rounds = compare(local, peer)
+
+    state = SyncState(store.directory)
+    try:
+        first = not state.known(peer.name)
+        base = state.get(peer.name, differing)
+        pulls, pushes, conflicts, skipped = plan(differing, base, mode, policy)
+        if dry_run:
+            return SyncReport(pulls, pushes, conflicts, skipped, rounds,
+                              peer.bytes_sent, peer.bytes_received)
+
+        synced, removed = {}, []
+        if pulls:
+            # Files to delete here need no content: only fetch the others
+            wanted = [f for f in pulls if differing[f][1] is not None]
+            items = {}
+            if wanted:
+                items = {item['filename']: item for item in decode_batch(peer.fetch(wanted))}
+            batch = []
+            for filename in pulls:
+                mine = differing[filename][0]
+                item = items.get(filename, {'filename': filename, 'deleted': True})
+                batch.append(dict(item, base=mine and mine[0]))
+            result = source.apply(encode_batch(batch))
+            conflicts += result['conflicts']
+            pulls = result['written'] + result['deleted']
+            for filename in pulls:
+                theirs = differing[filename][1]
+                if theirs is None:
+                    removed.append(filename)
+                else:
+                    synced[filename] = theirs[0]
+        if pushes:
+            batch = []
+            for item in decode_batch(source.fetch(pushes)):
+                theirs = differing[item['filename']][1]
+                batch.append(dict(item, base=theirs and theirs[0]))
+            result = peer.apply(encode_batch(batch))
+            conflicts += result['conflicts']
+            pushes = result['written'] + result['deleted']
+            for filename in pushes:
+                mine = differing[filename][0]
+                if mine is None:
+                    removed.append(filename)
+                else:
+                    synced[filename] = mine[0]
+        if first:
+            # Everything that was already the same on both sides is in sync
+            synced.update({name: entry[0] for name, entry in local.entries.items()
+                           if name not in differing})
+        state.update(peer.name, synced, removed)
+    finally:
+        state.close()
+    return SyncReport(pulls, pushes, conflicts, skipped, rounds,
+                      peer.bytes_sent, peer.bytes_received)
+
+
+def print_report(report, dry_run=False):
+    verb = 'Would pull' if dry_run else 'Pulled'
+    for filename in report.pulled:
+        print(f"⬇️  {filename}")
+    for filename in report.pushed:
+        print(f"⬆️  {filename}")
+    for filename in report.conflicts:
+        print(f"⚠️  {filename}: changed on both sides (kept both; resolve by hand)")
+    print(f"{'✅' if not report.conflicts else '⚠️ '} {verb} {len(report.pulled)}, "
+          f"{'would push' if dry_run else 'pushed'} {len(report.pushed)}, "
+          f"{len(report.conflicts)} conflict(s)"
+          + (f", {len(report.skipped)} left for the other direction" if report.skipped else '')
+          + f" - {report.rounds} tree request(s), {report.bytes_sent} bytes sent, "
+          f"{report.bytes_received} received")
+
+
+def sync_command(store, target, mode='both', policy='newer', dry_run=False):
+    """Command line sync of a store with a URL or directory; returns an exit code."""
+    try:
+        peer = open_peer(target)
+        report = sync(store, peer, mode, policy, dry_run)
+    except SyncError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    print_report(report, dry_run)
+    return 1 if report.conflicts else 0
+
+
+def add_arguments(parser):
+    """The sync options (shared with `web_command_manager.py sync`)."""
+    parser.add_argument('peer', help='http://host:port of a command manager, or a directory')
+    parser.add_argument('--mode', choices=MODES, default='both',
+                        help='both (default), push (only send) or pull (only receive)')
+    parser.add_argument('--conflicts', choices=POLICIES, default='newer',
+                        help='newer: the newer file wins (default); report: keep both, list them')
+    parser.add_argument('--dry-run', action='store_true', help='Only show what would change')
+
+
+def main(argv=None):
+    from command_store import COMMANDS_DIR, CommandStore  # command_store doesn't import this module
+
+    parser = argparse.ArgumentParser(description="Sync the commands directory with another.")
+    add_arguments(parser)
+    parser.add_argument('--dir', type=Path, default=COMMANDS_DIR,
+                        help=f"this side's commands directory (default: {COMMANDS_DIR})")
+    args = parser.parse_args(argv)
+
+    store = CommandStore(args.dir)
+    try:
+        return sync_command(store, args.peer, args.mode, args.conflicts, args.dry_run)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
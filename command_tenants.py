@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Namespaces (One Server for a Whole Team)
+===================================================================================
+
+PURPOSE:
+    Lets one command manager process serve many separate command sets -
+    one per person, team or project - each under its own URL:
+        /api/<namespace>/commands, /api/<namespace>/match, ...
+    Only the namespaces in use are kept in memory, within a fixed budget,
+    so a process can host thousands of them with a predictable footprint.
+
+HOW IT WORKS:
+    1. Every namespace is a directory of its own under the namespaces
+       directory (~/AI-Collaboration-Management/.claude/namespaces/<name>,
+       or $AI_COMMANDS_NAMESPACES_DIR), with everything a commands directory
+       has: .md files, manifest, sync state
+    2. A namespace is loaded on its first request: a CommandStore (seeded
+       from its manifest, so this is one sequential read), phrase matcher,
+       change feed and sync source. Its full-text index is only built on
+       its first search
+    3. Loaded namespaces are kept in least-recently-used order. Each one's
+       memory is estimated from its number of commands (and whether its
+       search index is built); when the total goes over the budget, or more
+       namespaces are loaded than allowed, the least recently used ones are
+       dropped. One in use - by a request being answered, or a page
+       streaming its live changes - is never dropped
+    4. Dropping a namespace only frees memory - its files stay, and the
+       next request loads it again from its manifest
+    5. Per-namespace counts (requests, loads, evictions, load time, memory)
+       are kept for GET /api/namespaces and /metrics
+
+    Namespace names are 1-64 lowercase letters, digits, "-" and "_",
+    starting with a letter or digit. Names the API itself uses (commands,
+    match, search, ...) are reserved.
+
+USAGE:
+    pool = TenantPool(NAMESPACES_DIR, memory_limit=256 * 1024 * 1024)
+    with pool.use('design-team', create=True) as tenant:   # Loaded (or created) on demand
+        tenant.store.create("shit's ready", "./verify_test.sh")
+    pool.stats()                                            # One dict per namespace
+
+    Settings (environment):
+        AI_COMMANDS_NAMESPACES_DIR       where namespace directories live
+        AI_COMMANDS_NAMESPACE_MEMORY_MB  memory budget for loaded namespaces (256)
+        AI_COMMANDS_MAX_NAMESPACES       most namespaces loaded at once (200)
+===================================================================================
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from command_events import ChangeFeed
+from command_matcher import PhraseMatcher
+from command_metrics import NAMESPACE_EVICTIONS, NAMESPACE_LOADS
+from command_search import CommandSearch
+from command_store import COMMANDS_DIR, CommandStore
+from command_sync import SyncSource
+
+NAMESPACE_PATTERN = re.compile(r'[a-z0-9][a-z0-9_-]{0,63}')
+
+# Path segments the API uses after /api/ - never namespace names
+RESERVED_NAMES = frozenset({'commands', 'match', 'search', 'sync', 'namespaces', 'metrics'})
+
+# Memory estimate per loaded namespace (bytes), measured with tracemalloc
+# on typical commands: index records plus phrase matcher tables per
+# command, the full-text index per command once built, and a fixed part
+# (store, manifest connection, change history)
+TENANT_BYTES = 64 * 1024
+COMMAND_BYTES = 4500
+SEARCH_BYTES = 3000
+
+
+def default_namespaces_dir():
+    """Namespaces directory: $AI_COMMANDS_NAMESPACES_DIR, or next to the commands directory."""
+    configured = os.environ.get('AI_COMMANDS_NAMESPACES_DIR')
+    if configured:
+        return Path(configured).expanduser()
+    return COMMANDS_DIR.parent / "namespaces"
+
+
+NAMESPACES_DIR = default_namespaces_dir()
+
+# Memory budget and count limit for loaded namespaces (per process)
+MEMORY_LIMIT = int(os.environ.get('AI_COMMANDS_NAMESPACE_MEMORY_MB', '256')) * 1024 * 1024
+MAX_LOADED = int(os.environ.get('AI_COMMANDS_MAX_NAMESPACES', '200'))
+
+
+class NamespaceError(ValueError):
+    """Not a valid namespace name."""
+
+
+class UnknownNamespace(LookupError):
+    """No such namespace (and it wasn't to be created)."""
+
+
+def check_namespace(name):
+    """Raise NamespaceError unless name is a usable namespace name."""
+    if not isinstance(name, str) or not NAMESPACE_PATTERN.fullmatch(name):
+        raise NamespaceError(f"Invalid namespace: {name!r} (use a-z, 0-9, - and _)")
+    if name in RESERVED_NAMES:
+        raise NamespaceError(f"Reserved namespace name: {name}")
+
+
+class Tenant:
+    """
+    One set of commands and the in-memory lookups the web API answers
+    from: store (with its index), phrase matcher, full-text search, change
+    feed and sync source.
+    """
+
+    def __init__(self, name, store):
+        self.name = name
+        self.store = store
+        self.index = store.index
+        self.index.refresh()
+        self.matcher = PhraseMatcher()
+        self.matcher.attach(self.index)
+        self.search = CommandSearch()   # Built on the first search
+        self.search.attach(self.index)
+        self.feed = ChangeFeed()
+        self.feed.attach(self.index)
+        self.sync = SyncSource(self.store)
+        self.users = 0   # Requests/streams using it (see TenantPool.get()), under the pool lock
+
+    def memory(self):
+        """Estimated bytes held in memory (see COMMAND_BYTES)."""
+        return TENANT_BYTES + len(self.index) * COMMAND_BYTES + len(self.search) * SEARCH_BYTES
+
+    def busy(self):
+        """True while a request or a live-changes stream is using this tenant."""
+        return self.users > 0
+
+    def close(self):
+        self.store.close()
+
+
+class TenantPool:
+    """
+    Namespaces loaded on demand, least recently used dropped first.
+
+    Thread-safe. Loading runs outside the pool lock (one load per
+    namespace at a time), so a big namespace loading doesn't hold up
+    requests for the others. Every get() must be paired with a release()
+    (or use use()): a tenant is only evicted when nothing is using it.
+    """
+
+    def __init__(self, root=None, memory_limit=MEMORY_LIMIT, max_loaded=MAX_LOADED, dedup=None):
+        self.root = Path(root) if root is not None else NAMESPACES_DIR
+        self.memory_limit = memory_limit
+        self.max_loaded = max(1, max_loaded)
+        self.dedup = dedup
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()   # name -> Tenant, least recently used first
+        self._memory = {}              # name -> last memory estimate
+        self._loading = {}             # name -> lock held while it loads
+        self._stats = {}               # name -> counters (kept after eviction)
+
+    def get(self, name, create=False):
+        """
+        The tenant for a namespace, loading it if needed, counted as in use
+        until release(tenant). Raises NamespaceError for a bad name, and
+        UnknownNamespace if its directory doesn't exist and create is False.
+        """
+        check_namespace(name)
+        with self._lock:
+            tenant = self._loaded.get(name)
+            if tenant is None:
+                loading = self._loading.setdefault(name, threading.Lock())
+            else:
+                tenant.users += 1
+        if tenant is None:
+            with loading:
+                tenant = self._load(name, create)
+        evicted = self._used(name, tenant)
+        for old in evicted:
+            old.close()
+        return tenant
+
+    def release(self, tenant):
+        """A request (or stream) from get() is done with this tenant."""
+        with self._lock:
+            tenant.users -= 1
+
+    @contextmanager
+    def use(self, name, create=False):
+        """get() for the length of a with block."""
+        tenant = self.get(name, create)
+        try:
+            yield tenant
+        finally:
+            self.release(tenant)
+
+    def _load(self, name, create):
+        try:
+            with self._lock:
+                tenant = self._loaded.get(name)
+                if tenant is not None:
+                    tenant.users += 1
+            if tenant is not None:
+                return tenant  # Loaded by another thread while this one waited
+            directory = self.root / name
+            if not create and not directory.is_dir():
+                raise UnknownNamespace(f"Unknown namespace: {name}")
+            started = time.monotonic()
+            tenant = Tenant(name, CommandStore(directory, dedup=self.dedup))
+            elapsed = time.monotonic() - started
+            NAMESPACE_LOADS.inc()
+            with self._lock:
+                tenant.users += 1
+                self._loaded[name] = tenant
+                stats = self._stat(name)
+                stats['loads'] += 1
+                stats['load_seconds'] = round(elapsed, 4)
+            return tenant
+        finally:
+            with self._lock:
+                self._loading.pop(name, None)
+
+    def _stat(self, name):
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {'requests': 0, 'loads': 0, 'evictions': 0,
+                                         'load_seconds': None, 'last_used': None}
+        return stats
+
+    def _used(self, name, tenant):
+        """Count a request, refresh its memory estimate and evict over the limits."""
+        memory = tenant.memory()
+        evicted = []
+        with self._lock:
+            stats = self._stat(name)
+            stats['requests'] += 1
+            stats['last_used'] = time.time()
+            if self._loaded.get(name) is not tenant:
+                return evicted  # Dropped while this request was starting
+            self._loaded.move_to_end(name)
+            self._memory[name] = memory
+            total = sum(self._memory.values())
+            for victim in list(self._loaded):
+                if total <= self.memory_limit and len(self._loaded) <= self.max_loaded:
+                    break
+                old = self._loaded[victim]
+                if victim == name or old.busy():
+                    continue
+                del self._loaded[victim]
+                total -= self._memory.pop(victim, 0)
+                self._stats[victim]['evictions'] += 1
+                NAMESPACE_EVICTIONS.inc()
+                evicted.append(old)
+        return evicted
+
+    def names(self):
+        """Every namespace on disk (loaded or not), sorted."""
+        try:
+            entries = os.scandir(self.root)
+        except FileNotFoundError:
+            return []
+        with entries:
+            return sorted(entry.name for entry in entries
+                          if entry.is_dir() and NAMESPACE_PATTERN.fullmatch(entry.name)
+                          and entry.name not in RESERVED_NAMES)
+
+    def loaded(self):
+        """Number of namespaces in memory."""
+        with self._lock:
+            return len(self._loaded)
+
+    def memory(self):
+        """Estimated bytes held by loaded namespaces (as of their last request)."""
+        with self._lock:
+            return sum(self._memory.values())
+
+    def stats(self):
+        """One dict per namespace on disk: counters, plus size if loaded."""
+        with self._lock:
+            loaded = dict(self._loaded)
+            counters = {name: dict(stats) for name, stats in self._stats.items()}
+        result = []
+        for name in sorted(set(self.names()) | loaded.keys()):
+            entry = {'namespace': name, 'loaded': name in loaded}
+            entry.update(counters.get(name) or {'requests': 0, 'loads': 0, 'evictions': 0,
+                                                'load_seconds': None, 'last_used': None})
+            tenant = loaded.get(name)
+            if tenant is not None:
+                entry['commands'] = len(tenant.index)
+                entry['memory_bytes'] = tenant.memory()
+            result.append(entry)
+        return result
+
+    def close(self):
+        with self._lock:
+            tenants = list(self._loaded.values())
+            self._loaded.clear()
+            self._memory.clear()
+        for tenant in tenants:
+            tenant.close()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Commands Directory Watcher
+===================================================================================
+
+PURPOSE:
+    Notices command files created, edited or deleted by anything - the web
+    manager, new-command.sh, add-phrase.sh, a text editor - and updates a
+    CommandIndex right away, so its listeners (e.g. the desktop GUI) get a
+    small added/updated/removed diff instead of rescanning everything.
+
+HOW IT WORKS:
+    1. LINUX: the kernel tells us (inotify) which files in the directory
+       changed. The thread sleeps until something happens - no CPU is
+       used while nothing changes - then re-checks just those files with
+       index.refresh_files()
+    2. ELSEWHERE (or if inotify is unavailable): the directory is re-checked
+       every POLL_INTERVAL seconds with index.refresh(), which only stats
+       files and re-parses the ones whose mtime/size changed
+    3. Bursts of events (a bulk import, an editor's save dance) are
+       collected for SETTLE_SECONDS and applied as one diff
+
+USAGE:
+    watcher = CommandWatcher(index)
+    index.subscribe(listener)   # listener(index, changes) - on the watcher thread!
+    watcher.start()
+    ...
+    watcher.stop()
+===================================================================================
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+
+# Polling fallback: re-check the directory this often (seconds)
+POLL_INTERVAL = 2.0
+
+# Collect events for this long after the first one before applying them
+SETTLE_SECONDS = 0.05
+
+# inotify event bits (from <sys/inotify.h>)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Everything that can change which command files exist or what's in them.
+# (Not IN_MODIFY: it fires for every write() - IN_CLOSE_WRITE covers it.)
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# The watched directory itself went away (or the kernel dropped the watch)
+DIRECTORY_GONE = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len - then len bytes of name
+
+
+def _load_inotify():
+    """libc's inotify functions, or None where there is no inotify."""
+    if not sys.platform.startswith('linux'):
+        return None
+    libc_name = ctypes.util.find_library('c')
+    if not libc_name:
+        return None
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    return libc
+
+
+class CommandWatcher:
+    """
+    Background thread that keeps a CommandIndex in step with its directory.
+
+    The index notifies its listeners as usual, from the watcher thread.
+    """
+
+    def __init__(self, index, poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.index = index
+        self.poll_interval = poll_interval
+        self.mode = None  # 'inotify' or 'polling' once running
+        self._libc = _load_inotify() if use_inotify else None
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()  # Wakes the inotify wait on stop()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='command-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        os.write(self._wake_w, b'x')
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            if self._thread.is_alive():
+                return  # Still busy (e.g. in a listener): it may yet read the pipe
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._libc is not None and self.index.directory.is_dir():
+                self.mode = 'inotify'
+                if self._watch_inotify():
+                    return
+            self.mode = 'polling'
+            # Poll until stopped - or until the directory exists again, so
+            # inotify can take over (it can't watch a missing directory)
+            missing = not self.index.directory.is_dir()
+            while not self._stop.wait(self.poll_interval):
+                self._refresh()
+                if missing and self._libc is not None and self.index.directory.is_dir():
+                    break
+
+    def _refresh(self, stems=None):
+        try:
+            if stems is None:
+                self.index.refresh()
+            else:
+                self.index.refresh_files(sorted(stems))
+        except OSError:
+            pass  # Directory briefly unreadable - the next change retries
+
+    def _watch_inotify(self):
+        """
+        Apply inotify events until stopped (returns True) or until the
+        watch is lost (returns False, to fall back to polling).
+        """
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            self._libc = None  # e.g. too many instances - poll instead
+            return False
+        try:
+            path = os.fsencode(self.index.directory)
+            if self._libc.inotify_add_watch(fd, path, WATCH_MASK) < 0:
+                return False
+            # Anything that changed before the watch existed
+            self._refresh()
+            while True:
+                ready, _, _ = select.select([fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    return True
+                stems, rescan, gone = self._read_events(fd)
+                # Let a burst finish, then apply it as one diff
+                while not self._stop.wait(SETTLE_SECONDS):
+                    if not select.select([fd], [], [], 0)[0]:
+                        break
+                    more, more_rescan, more_gone = self._read_events(fd)
+                    stems |= more
+                    rescan = rescan or more_rescan
+                    gone = gone or more_gone
+                if self._stop.is_set():
+                    return True
+                self._refresh(None if rescan or gone else stems)
+                if gone:
+                    return False
+        finally:
+            os.close(fd)
+
+    def _read_events(self, fd):
+        """(changed .md stems, full rescan needed?, directory gone?) from pending events."""
+        stems, rescan, gone = set(), False, False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True  # The kernel dropped events: check everything
+                elif mask & DIRECTORY_GONE:
+                    gone = True
+                elif name.endswith(b'.md'):
+                    stems.add(os.fsdecode(name[:-3]))
+        return stems, rescan, gone
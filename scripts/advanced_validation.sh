@@ -62,6 +62,7 @@ VIOLATIONS_FOUND=0
 CRITICAL_ISSUES=0
 WARNINGS=0
 ERRORS_LOG=()
+VALIDATOR_TIMINGS=()
 
 # Function to add error to log
 add_error() {
@@ -70,9 +71,10 @@ add_error() {
     ERRORS_LOG+=("[$severity] $message")
 
     case $severity in
-        "CRITICAL") ((CRITICAL_ISSUES++));;
-        "ERROR") ((VIOLATIONS_FOUND++));;
-        "WARNING") ((WARNINGS++));;
+        # var=$((var + 1)): ((var++)) returns 1 from 0, which set -e treats as failure
+        "CRITICAL") CRITICAL_ISSUES=$((CRITICAL_ISSUES + 1));;
+        "ERROR") VIOLATIONS_FOUND=$((VIOLATIONS_FOUND + 1));;
+        "WARNING") WARNINGS=$((WARNINGS + 1));;
     esac
 }
 
@@ -92,7 +94,7 @@ validate_framework_structure() {
         if [[ ! -f "$file" ]]; then
             add_error "CRITICAL" "Required framework file missing: $file"
             log_error "Missing framework file: $file"
-            ((missing_files++))
+            missing_files=$((missing_files + 1))
         fi
     done
 
@@ -145,7 +147,8 @@ detect_project_type() {
         ((confidence += 35))
     fi
 
-    log_info "Detected project type: $project_type (confidence: $confidence%)"
+    # Logged to stderr: stdout is the result, captured by main()
+    log_info "Detected project type: $project_type (confidence: $confidence%)" >&2
     echo "$project_type"
 }
 
@@ -163,6 +166,16 @@ validate_python_project() {
 
     log_info "Found $python_files Python files to validate"
 
+    # Incremental engine: validators run concurrently, unchanged files are
+    # skipped (see scripts/validation_engine.py). VALIDATION_ENGINE=0 runs
+    # the serial checks below instead.
+    local engine
+    engine="$(dirname "${BASH_SOURCE[0]}")/validation_engine.py"
+    if [[ "${VALIDATION_ENGINE:-1}" != "0" ]] && [[ -f "$engine" ]] && command -v python3 >/dev/null 2>&1; then
+        run_validation_engine "$engine"
+        return 0
+    fi
+
     # Black formatting validation
     if command -v black >/dev/null 2>&1; then
         log_info "Checking Black formatting..."
@@ -219,6 +232,48 @@ validate_python_project() {
     fi
 }
 
+# Run validation_engine.py and turn its tab-separated lines into the
+# usual log lines, errors and validator timings
+run_validation_engine() {
+    local engine="$1"
+    local engine_output
+    log_info "Running Python validators (incremental, in parallel)..."
+    if ! engine_output=$(python3 "$engine" --root . 2>&1); then
+        add_error "ERROR" "Python validation engine failed"
+        log_error "Validation engine failed:"
+        echo "$engine_output" | tail -10
+        return 0
+    fi
+
+    local kind field1 field2 field3 field4
+    while IFS=$'\t' read -r kind field1 field2 field3 field4; do
+        case "$kind" in
+            "warning")
+                add_error "WARNING" "$field1"
+                log_warning "$field1"
+                ;;
+            "fail")
+                add_error "$field2" "$field3"
+                if [[ "$field2" == "CRITICAL" ]]; then
+                    log_critical "$field3"
+                else
+                    log_error "$field3"
+                fi
+                ;;
+            "pass")
+                log_success "$field2"
+                ;;
+            "detail")
+                echo "    $field2"
+                ;;
+            "timing")
+                VALIDATOR_TIMINGS+=("| $field1 | ${field2}s | $field3 | $field4 |")
+                log_info "$field1: ${field2}s ($field3 files checked, $field4 unchanged)"
+                ;;
+        esac
+    done <<< "$engine_output"
+}
+
 # Enhanced JavaScript/TypeScript validation
 validate_javascript_project() {
     log_info "Running enhanced JavaScript/TypeScript validation..."
@@ -320,6 +375,19 @@ EOF
         echo "All validation checks passed successfully." >> "$REPORT_FILE"
     fi
 
+    if [[ ${#VALIDATOR_TIMINGS[@]} -gt 0 ]]; then
+        cat >> "$REPORT_FILE" << EOF
+
+---
+
+## ⏱️ **VALIDATOR TIMINGS**
+
+| Validator | Time | Files Checked | Unchanged (cached) |
+|-----------|------|---------------|--------------------|
+EOF
+        printf '%s\n' "${VALIDATOR_TIMINGS[@]}" >> "$REPORT_FILE"
+    fi
+
     cat >> "$REPORT_FILE" << EOF
 
 ---
@@ -495,6 +495,8 @@ cp "$SCRIPT_DIR/templates/.ai/TCC_QUICK_REFERENCE.md" "$REPO_ROOT/.ai/TCC_QUICK_
 cp "$SCRIPT_DIR/templates/.ai/CURRENT_TASK.md.TEMPLATE" "$REPO_ROOT/.ai/CURRENT_TASK.md.TEMPLATE"
 cp "$SCRIPT_DIR/templates/.ai/check-tasks.sh" "$REPO_ROOT/.ai/check-tasks.sh"
 chmod +x "$REPO_ROOT/.ai/check-tasks.sh"
+cp "$SCRIPT_DIR/templates/.ai/task_queue.py" "$REPO_ROOT/.ai/task_queue.py"
+chmod +x "$REPO_ROOT/.ai/task_queue.py"
 
 # Replace placeholders in AI collaboration files
 # Escape special characters for sed
@@ -608,9 +610,14 @@ else
         > "$REPO_ROOT/.ai-framework/session-recovery/CURRENT_SESSION_STATE.md"
 fi
 
+# Snapshot history used by both scripts (no placeholders to fill in)
+cp "$SCRIPT_DIR/templates/session-recovery/session_snapshots.py" \
+    "$REPO_ROOT/.ai-framework/session-recovery/session_snapshots.py"
+
 # Make scripts executable
 chmod +x "$REPO_ROOT/create_session_snapshot.sh"
 chmod +x "$REPO_ROOT/restore_session.sh"
+chmod +x "$REPO_ROOT/.ai-framework/session-recovery/session_snapshots.py"
 
 echo "✅ Session recovery system deployed!"
 echo "✅ Repository-based AI collaboration installed!"
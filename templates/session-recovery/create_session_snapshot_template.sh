@@ -2,15 +2,32 @@
 # SESSION EXIT SNAPSHOT CREATOR
 # Purpose: Capture EXACT work state when session ends
 # Usage: Run this when ending a session to capture exact state
+#        ./create_session_snapshot.sh ["short label"]
+#        Every snapshot is kept (see ./restore_session.sh --list)
 # Project: {{PROJECT_NAME}}
 # Auto-deployed by Avery's AI Collaboration Framework
 
 SNAPSHOT_FILE="SESSION_EXIT_SNAPSHOT.md"
+SNAPSHOTS=".ai-framework/session-recovery/session_snapshots.py"
 TIMESTAMP=$(date "+%Y-%m-%d %H:%M:%S %Z")
+LABEL="${1:-}"
 
 echo "📸 CREATING SESSION EXIT SNAPSHOT..."
 echo "📁 Project: {{PROJECT_NAME}}"
 
+# One git status for both git sections
+GIT_STATUS=$(git status --porcelain 2>/dev/null) || GIT_STATUS="❓ Git status unavailable"
+
+# Files changed since the previous snapshot, from the snapshot history's
+# stat index (no file is read); without python3, files edited recently
+if command -v python3 >/dev/null 2>&1 && [ -f "$SNAPSHOTS" ]; then
+    CHANGE_TITLE="Files Changed Since Previous Snapshot"
+    CHANGED_FILES=$(python3 "$SNAPSHOTS" scan)
+else
+    CHANGE_TITLE="Recent File Activity"
+    CHANGED_FILES=$(find . \( -name "*.py" -o -name "*.js" -o -name "*.jsx" -o -name "*.ts" -o -name "*.tsx" -o -name "*.java" -o -name "*.go" -o -name "*.rs" -o -name "*.cpp" -o -name "*.c" -o -name "*.md" -o -name "*.sh" \) -newermt "2 hours ago" -type f 2>/dev/null | grep -v ".git" | head -10)
+fi
+
 cat > "$SNAPSHOT_FILE" << EOF
 # 📸 SESSION EXIT SNAPSHOT
 **Project:** {{PROJECT_NAME}}
@@ -55,13 +72,13 @@ fi)
 {{PROJECT_TYPE}} ({{VALIDATION_TOOLS}})
 
 ### **Modified Files This Session:**
-$(git status --porcelain 2>/dev/null || echo "❓ Git status unavailable")
+$GIT_STATUS
 
 ### **Uncommitted Changes:**
-$(git diff --name-only 2>/dev/null | head -10 || echo "❓ No git repository or changes")
+$(echo "$GIT_STATUS" | grep -E '^.[MDT] ' | cut -c4- | head -10)
 
-### **Recent File Activity:**
-$(find . \( -name "*.py" -o -name "*.js" -o -name "*.jsx" -o -name "*.ts" -o -name "*.tsx" -o -name "*.java" -o -name "*.go" -o -name "*.rs" -o -name "*.cpp" -o -name "*.c" -o -name "*.md" -o -name "*.sh" \) -newermt "2 hours ago" -type f 2>/dev/null | grep -v ".git" | head -10)
+### **$CHANGE_TITLE:**
+$CHANGED_FILES
 
 ---
 
@@ -95,6 +112,13 @@ cd '$PWD'
 EOF
 
 echo "✅ SESSION EXIT SNAPSHOT CREATED: $SNAPSHOT_FILE"
+
+# Keep it in the history (compressed, as a delta against the last one)
+if command -v python3 >/dev/null 2>&1 && [ -f "$SNAPSHOTS" ]; then
+    if SAVED=$(python3 "$SNAPSHOTS" save "$SNAPSHOT_FILE" --label "$LABEL"); then
+        echo "🗂️  Saved as snapshot #${SAVED%%$'\t'*} (./restore_session.sh --list)"
+    fi
+fi
 echo
 echo "📋 SNAPSHOT SUMMARY:"
 echo "• Captured exact work state at session end"
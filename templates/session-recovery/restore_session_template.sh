@@ -1,10 +1,23 @@
 #!/bin/bash
 # EXACT SESSION RESTORATION
 # Purpose: Instantly restore exact work state from session snapshot
-# Usage: ./restore_session.sh
+# Usage: ./restore_session.sh             # Latest session state
+#        ./restore_session.sh --list      # Every saved snapshot
+#        ./restore_session.sh SNAPSHOT    # A saved snapshot: number, -2 (the one before last), or id
 # Project: {{PROJECT_NAME}}
 # Auto-deployed by Avery's AI Collaboration Framework
 
+SNAPSHOTS=".ai-framework/session-recovery/session_snapshots.py"
+
+if [ "${1:-}" = "--list" ]; then
+    if [ -f "$SNAPSHOTS" ] && command -v python3 >/dev/null 2>&1; then
+        python3 "$SNAPSHOTS" list
+    else
+        echo "❌ No snapshot history (needs python3 and $SNAPSHOTS)"
+    fi
+    exit 0
+fi
+
 echo "🔄 EXACT SESSION RESTORATION"
 echo "============================="
 echo "📁 Project: {{PROJECT_NAME}}"
@@ -31,7 +44,25 @@ if [ -n "$RULES_FILE" ]; then
 fi
 
 # Check for session snapshots
-if [ -f "SESSION_EXIT_SNAPSHOT.md" ]; then
+if [ -n "${1:-}" ]; then
+    # Jump to an earlier snapshot from the history
+    if ! SNAPSHOT_TEXT=$(python3 "$SNAPSHOTS" show "$1"); then
+        echo "💡 List the saved snapshots with: ./restore_session.sh --list"
+        exit 1
+    fi
+    echo "✅ FOUND SAVED SNAPSHOT $1"
+    echo
+    echo "🎯 EXACT WORK STATE AT THAT SNAPSHOT:"
+    echo "======================================"
+    echo "$SNAPSHOT_TEXT"
+    echo
+    echo "🔄 SESSION STATE SAVED WITH IT:"
+    echo "==============================="
+    python3 "$SNAPSHOTS" show "$1" --state
+    echo
+    echo "✅ SESSION CONTEXT RESTORED"
+
+elif [ -f "SESSION_EXIT_SNAPSHOT.md" ]; then
     echo "✅ FOUND SESSION EXIT SNAPSHOT"
     echo "📸 Restoring exact work state..."
     echo
@@ -99,6 +130,7 @@ echo
 echo "🛠️ RECOVERY TOOLS AVAILABLE:"
 echo "• ./session_recovery.sh                      # Auto-detect project type and status"
 echo "• ./create_session_snapshot.sh               # Create snapshot for next session"
+echo "• ./restore_session.sh --list                # Every saved snapshot (then ./restore_session.sh N)"
 echo "• cat .ai-framework/session-recovery/REBOOT_QUICK_START.md  # General project quick start"
 echo "• cat .ai-framework/session-recovery/CURRENT_SESSION_STATE.md  # Real-time session state (if exists)"
 echo
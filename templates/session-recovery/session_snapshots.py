@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+Session Snapshots - Compressed History of Session Exit States
+===================================================================================
+
+PURPOSE:
+    create_session_snapshot.sh used to overwrite SESSION_EXIT_SNAPSHOT.md
+    on every save and find recently edited files with a full-tree
+    `find -newermt "2 hours ago"`. This keeps every snapshot instead -
+    stored as small compressed deltas - so restore_session.sh can show
+    any earlier one, and works out which files changed since the previous
+    snapshot from a cached stat index. Saving and restoring stay fast
+    however many snapshots there are and however big the project is.
+
+HOW IT WORKS:
+    1. Everything lives in .ai-framework/session-recovery/snapshots/:
+           objects/3f/3fa9c0...   <- zlib-compressed JSON, named by its SHA-256
+           log                    <- one line per snapshot: id, time, label
+           stat-index             <- (mtime, size) of every project file
+    2. A snapshot object records its parent, time, label, the files
+       changed since the parent, and the two texts that make up a session
+       state: SESSION_EXIT_SNAPSHOT.md and CURRENT_SESSION_STATE.md
+    3. Each text is stored as a line delta against the same text in the
+       previous snapshot; every KEYFRAME_INTERVAL-th version is stored
+       whole, so reading any snapshot applies at most that many deltas.
+       Objects are named by content, so an unchanged text costs nothing
+    4. scan walks the project (skipping .git, node_modules, virtualenvs
+       ...) comparing each file's stat against the index - no file is
+       read - and lists what was added, modified or deleted. save commits
+       the scan together with the snapshot
+
+USAGE:
+    Called by create_session_snapshot.sh and restore_session.sh:
+    python3 .ai-framework/session-recovery/session_snapshots.py scan
+    python3 .ai-framework/session-recovery/session_snapshots.py save SESSION_EXIT_SNAPSHOT.md
+    python3 .ai-framework/session-recovery/session_snapshots.py list
+    python3 .ai-framework/session-recovery/session_snapshots.py show [SNAPSHOT] [--state]
+    python3 .ai-framework/session-recovery/session_snapshots.py changes [SNAPSHOT]
+
+    SNAPSHOT is a number from `list` (1 = oldest), -1 for the latest
+    (default), -2 for the one before it, or a snapshot id (prefix).
+===================================================================================
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import marshal
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+# The session-recovery directory this script lives in, and the project
+# it belongs to (two levels up: .ai-framework/session-recovery/)
+RECOVERY_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = RECOVERY_DIR.parent.parent
+SNAPSHOT_DIR = RECOVERY_DIR / 'snapshots'
+
+STATE_FILE = RECOVERY_DIR / 'CURRENT_SESSION_STATE.md'
+
+# Every this many versions a text is stored whole instead of as a delta
+KEYFRAME_INTERVAL = 16
+
+# Never descended into when scanning
+SKIP_DIRS = {'.git', '.hg', '.svn', 'node_modules', 'venv', '.venv', 'env', '__pycache__',
+             '.tox', '.nox', '.mypy_cache', '.pytest_cache', '.ruff_cache', 'dist', 'build',
+             'target', '.gradle', '.idea', '.next'}
+
+# Rewritten by every save, so never reported as a change
+SNAPSHOT_FILE = 'SESSION_EXIT_SNAPSHOT.md'
+
+# Changed files listed in a snapshot (the rest are counted)
+MAX_LISTED = 50
+
+
+class SnapshotError(Exception):
+    """No such snapshot, or a damaged snapshot store."""
+
+
+class SnapshotStore:
+    """The snapshots of one project."""
+
+    def __init__(self, directory=SNAPSHOT_DIR, root=PROJECT_ROOT):
+        self.directory = Path(directory)
+        self.root = Path(root).resolve()
+        self.objects = self.directory / 'objects'
+        self.log_path = self.directory / 'log'
+        self.index_path = self.directory / 'stat-index'
+        # Written by scan(), committed by save()
+        self.pending_index = self.directory / 'stat-index.pending'
+        self.pending_changes = self.directory / 'changes.pending.json'
+
+    # --- objects --------------------------------------------------------
+
+    def put(self, obj):
+        """Store a JSON-able object; returns its id. Storing it twice is free."""
+        data = json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        oid = hashlib.sha256(data).hexdigest()
+        path = self.objects / oid[:2] / oid
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, zlib.compress(data, 6))
+        return oid
+
+    def get(self, oid):
+        try:
+            data = (self.objects / oid[:2] / oid).read_bytes()
+        except FileNotFoundError:
+            raise SnapshotError(f"missing object {oid[:12]}") from None
+        return json.loads(zlib.decompress(data))
+
+    # --- texts as delta chains -------------------------------------------
+
+    def put_text(self, text, previous=None):
+        """Store text as a delta against the text object `previous`; returns its id."""
+        if previous is not None:
+            base = self.get(previous)
+            old = self.text(previous)
+            if old == text:
+                return previous  # Unchanged: no new object, no longer chain
+            if base['depth'] + 1 < KEYFRAME_INTERVAL:
+                ops = _delta(old.splitlines(keepends=True), text.splitlines(keepends=True))
+                return self.put({'type': 'delta', 'base': previous,
+                                 'depth': base['depth'] + 1, 'ops': ops})
+        return self.put({'type': 'text', 'depth': 0, 'text': text})
+
+    def text(self, oid):
+        """The text stored under oid (following at most KEYFRAME_INTERVAL deltas)."""
+        chain = []
+        obj = self.get(oid)
+        while obj['type'] == 'delta':
+            chain.append(obj['ops'])
+            obj = self.get(obj['base'])
+        lines = obj['text'].splitlines(keepends=True)
+        for ops in reversed(chain):
+            lines = _apply(lines, ops)
+        return ''.join(lines)
+
+    # --- snapshots --------------------------------------------------------
+
+    def log(self):
+        """Every snapshot as (id, time, label), oldest first."""
+        try:
+            lines = self.log_path.read_text(encoding='utf-8').splitlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            fields = line.split('\t', 2)
+            if len(fields) == 3:
+                entries.append((fields[0], float(fields[1]), fields[2]))
+        return entries
+
+    def resolve(self, ref='-1'):
+        """The id of a snapshot: list number, negative offset or id prefix."""
+        entries = self.log()
+        if not entries:
+            raise SnapshotError("no snapshots yet")
+        ref = str(ref)
+        if ref.lstrip('-').isdigit() and len(ref) < 8:
+            n = int(ref)
+            position = n - 1 if n > 0 else len(entries) + n
+            if not 0 <= position < len(entries) or n == 0:
+                raise SnapshotError(f"no snapshot {ref} (there are {len(entries)})")
+            return entries[position][0]
+        found = [oid for oid, _, _ in entries if oid.startswith(ref)]
+        if len(found) != 1:
+            raise SnapshotError(f"{'ambiguous' if found else 'unknown'} snapshot {ref}")
+        return found[0]
+
+    def snapshot(self, ref='-1'):
+        oid = self.resolve(ref)
+        return oid, self.get(oid)
+
+    def save(self, snapshot_text, state_text='', label=''):
+        """Store a snapshot (committing the last scan); returns its id."""
+        entries = self.log()
+        parent = self.get(entries[-1][0]) if entries else None
+        changes = _read_json(self.pending_changes)
+        obj = {
+            'type': 'snapshot',
+            'parent': entries[-1][0] if entries else None,
+            'time': time.time(),
+            'label': label,
+            'snapshot': self.put_text(snapshot_text, parent and parent['snapshot']),
+            'state': self.put_text(state_text, parent and parent['state']),
+            'changes': changes,
+        }
+        oid = self.put(obj)
+        if changes is not None:
+            os.replace(self.pending_index, self.index_path)
+            os.unlink(self.pending_changes)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(f"{oid}\t{obj['time']:.3f}\t{label.replace(chr(10), ' ')}\n")
+        return oid
+
+    # --- which files changed ----------------------------------------------
+
+    def scan(self):
+        """
+        Compare the project against the stat index of the last snapshot.
+        Returns {'added': [...], 'modified': [...], 'deleted': [...]}; the
+        result (and the new index) is kept for the next save().
+        """
+        old = _read_index(self.index_path)
+        new = {}
+        skip = str(self.directory.resolve())
+        prefix = len(str(self.root)) + 1  # Cheaper than os.path.relpath per file
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS and entry.path != skip:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            new[entry.path[prefix:]] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue  # Vanished while scanning
+        new.pop(SNAPSHOT_FILE, None)
+        if old is None:
+            # First snapshot: everything is new, which says nothing useful
+            changes = {'added': [], 'modified': [], 'deleted': [], 'baseline': len(new)}
+        else:
+            before = old.get
+            changes = {
+                'added': sorted(new.keys() - old.keys()),
+                'modified': sorted(p for p, stamp in new.items() if before(p, stamp) != stamp),
+                'deleted': sorted(old.keys() - new.keys()),
+            }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.pending_index, marshal.dumps(new))
+        _atomic_write(self.pending_changes, json.dumps(changes).encode('utf-8'))
+        return changes
+
+
+# ----------------------------------------------------------------------
+# Line deltas
+# ----------------------------------------------------------------------
+
+def _delta(old, new):
+    """Ops that turn the lines old into new: [start, end] copies, strings insert."""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new[j1:j2]))
+    return ops
+
+
+def _apply(old, ops):
+    lines = []
+    for op in ops:
+        if isinstance(op, list):
+            lines.extend(old[op[0]:op[1]])
+        else:
+            lines.extend(op.splitlines(keepends=True))
+    return lines
+
+
+# ----------------------------------------------------------------------
+# Files
+# ----------------------------------------------------------------------
+
+def _atomic_write(path, data):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read_index(path):
+    # marshal: a dict of a few hundred thousand tuples loads ~10x faster
+    # than JSON. The format can change between Python versions; a cache
+    # that no longer loads is just rebuilt
+    try:
+        with open(path, 'rb') as f:
+            return marshal.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def _read_json(path):
+    try:
+        with open(path, 'rb') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return None  # Damaged cache: treat as missing
+
+
+def format_changes(changes, limit=MAX_LISTED):
+    """Markdown list of changed files (at most limit lines)."""
+    if changes is None:
+        return "❓ Not scanned"
+    if 'baseline' in changes:
+        return f"📋 First snapshot: {changes['baseline']} files indexed for next time"
+    listed = ([f"- ➕ `{p}`" for p in changes['added']]
+              + [f"- ✏️ `{p}`" for p in changes['modified']]
+              + [f"- ➖ `{p}`" for p in changes['deleted']])
+    if not listed:
+        return "✅ No files changed since the previous snapshot"
+    more = len(listed) - limit
+    return '\n'.join(listed[:limit] + ([f"- ... and {more} more"] if more > 0 else []))
+
+
+def _when(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Session snapshot history.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('scan', help='List files changed since the last snapshot')
+    save = sub.add_parser('save', help='Store a snapshot (after scan)')
+    save.add_argument('file', type=Path, help='The snapshot markdown (SESSION_EXIT_SNAPSHOT.md)')
+    save.add_argument('--state', type=Path, default=STATE_FILE,
+                      help='Session state file stored alongside it')
+    save.add_argument('--label', default='', help='Short description')
+    listing = sub.add_parser('list', help='Snapshots, oldest first')
+    listing.add_argument('-n', type=int, default=0, help='Only the last N')
+    for name, text in (('show', 'Print a snapshot'), ('changes', 'Files changed in a snapshot')):
+        command = sub.add_parser(name, help=text)
+        command.add_argument('snapshot', nargs='?', default='-1')
+        if name == 'show':
+            command.add_argument('--state', action='store_true',
+                                 help='Print the session state saved with it instead')
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore()
+    try:
+        if args.command == 'scan':
+            print(format_changes(store.scan()))
+        elif args.command == 'save':
+            try:
+                state = args.state.read_text(encoding='utf-8')
+            except FileNotFoundError:
+                state = ''
+            oid = store.save(args.file.read_text(encoding='utf-8'), state, args.label)
+            print(f"{len(store.log())}\t{oid[:12]}")
+        elif args.command == 'list':
+            entries = store.log()
+            first = max(len(entries) - args.n, 0) if args.n else 0
+            for number, (oid, stamp, label) in enumerate(entries[first:], first + 1):
+                print(f"{number:4d}  {oid[:12]}  {_when(stamp)}  {label}".rstrip())
+        elif args.command == 'show':
+            oid, snapshot = store.snapshot(args.snapshot)
+            sys.stdout.write(store.text(snapshot['state' if args.state else 'snapshot']))
+        elif args.command == 'changes':
+            oid, snapshot = store.snapshot(args.snapshot)
+            print(format_changes(snapshot['changes'], limit=sys.maxsize))
+    except SnapshotError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
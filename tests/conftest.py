@@ -0,0 +1,59 @@
+"""
+Shared pytest setup for the command manager's Python modules.
+
+The modules live at the top of the repository (no package), so the
+repository root goes on sys.path. Every test works in its own tmp_path,
+and the default directories (picked when the modules are imported) point
+into a scratch directory, never at the real commands.
+
+    python3 -m pytest -q tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SCRATCH = Path(tempfile.mkdtemp(prefix='command-tests-'))
+os.environ['AI_COMMANDS_DIR'] = str(SCRATCH / "commands")
+os.environ['AI_COMMANDS_NAMESPACES_DIR'] = str(SCRATCH / "namespaces")
+os.environ.pop('AI_COMMANDS_DEDUP', None)
+
+from command_frontmatter import render_command  # noqa: E402
+
+
+def write_command(directory, filename, phrases, action='echo ok', description='Test command'):
+    """Write a command file by hand (as a text editor would); returns its path."""
+    path = Path(directory) / f"{filename}.md"
+    path.write_text(render_command(description, list(phrases), action), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def commands_dir(tmp_path):
+    directory = tmp_path / "commands"
+    directory.mkdir()
+    return directory
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def web_manager():
+    """web_command_manager, serving the scratch commands directory."""
+    pytest.importorskip('flask')
+    import web_command_manager
+    assert web_command_manager.COMMANDS_DIR == SCRATCH / "commands"
+    return web_command_manager
+
+
+@pytest.fixture
+def client(web_manager):
+    return web_manager.app.test_client()
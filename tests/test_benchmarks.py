@@ -0,0 +1,88 @@
+"""benchmarks/: the corpus generator and the HTTP benchmark's server handling."""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / 'benchmarks'
+sys.path.insert(0, str(BENCHMARKS))
+
+import bench_api  # noqa: E402
+from command_frontmatter import read_frontmatter  # noqa: E402
+from corpus import generate  # noqa: E402
+
+
+def http_args(**overrides):
+    args = dict(server='flask', threads=4, workers=None, requests=5, concurrency=2, seed=1)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def servers(pid):
+    """Pids of the web_command_manager.py processes started by pid (from /proc)."""
+    found = []
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            fields = stat.read_text().rsplit(')', 1)[1].split()
+            command = (stat.parent / 'cmdline').read_bytes()
+        except OSError:
+            continue
+        if int(fields[1]) == pid and b'web_command_manager.py' in command:
+            found.append(int(stat.parent.name))
+    return found
+
+
+def test_same_seed_same_corpus(tmp_path):
+    first = generate(tmp_path / 'a', 20, body_bytes=(50, 200), seed=7)
+    second = generate(tmp_path / 'b', 20, body_bytes=(50, 200), seed=7)
+    assert first == second and len(set(first)) == 20
+    for filename in first:
+        assert (tmp_path / 'a' / f'{filename}.md').read_bytes() == \
+            (tmp_path / 'b' / f'{filename}.md').read_bytes()
+    cmd = read_frontmatter(tmp_path / 'a' / f'{first[0]}.md')
+    assert cmd.phrase and cmd.description
+
+
+def test_run_http_against_a_real_server(tmp_path):
+    pytest.importorskip('flask')
+    generate(tmp_path, 30, body_bytes=(50, 200))
+    result = bench_api.run_http(http_args(), tmp_path)
+    operations = result['operations']
+    assert set(operations) == set(bench_api.OPERATIONS)
+    for op in ('index', 'list_page', 'list_all', 'list_304', 'search'):
+        assert operations[op]['requests'] and operations[op]['errors'] == 0, op
+
+
+def test_server_that_fails_to_start_shows_its_log(tmp_path):
+    with pytest.raises(RuntimeError, match='invalid int'):
+        bench_api.run_http(http_args(threads='many'), tmp_path)
+
+
+@pytest.mark.skipif(not Path('/proc/self/stat').exists(), reason='needs /proc')
+def test_sigterm_stops_the_server(tmp_path):
+    pytest.importorskip('flask')
+    bench = subprocess.Popen([sys.executable, str(BENCHMARKS / 'bench_api.py'),
+                              '--client', 'http', '--server', 'flask', '--sizes', '20',
+                              '--requests', '1000000', '--output', str(tmp_path / 'out.json')],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while not servers(bench.pid):
+            assert time.monotonic() < deadline and bench.poll() is None
+            time.sleep(0.05)
+        started = servers(bench.pid)
+        time.sleep(1)   # Let the benchmark get going
+        bench.send_signal(signal.SIGTERM)
+        assert bench.wait(timeout=30) == 128 + signal.SIGTERM
+        for pid in started:
+            with pytest.raises(ProcessLookupError):
+                os.kill(pid, 0)
+    finally:
+        bench.kill()
+        bench.wait()
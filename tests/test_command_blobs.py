@@ -0,0 +1,112 @@
+"""command_blobs: shared action bodies, deduplicated commands and gc."""
+
+import os
+import time
+
+import pytest
+
+from command_blobs import BLOB_DIR, BlobStore, MissingBlob, blob_path, body_ref, main, read_blob
+from command_frontmatter import frontmatter_body_ref, read_body
+from command_store import CommandStore
+from conftest import write_command
+
+BODY = './verify_test.sh\n'
+
+
+def age(path, seconds):
+    """Make a file look `seconds` old."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_put_stores_each_body_once(commands_dir):
+    blobs = BlobStore(commands_dir)
+    ref = blobs.put(BODY)
+    assert ref == body_ref(BODY) and ref.startswith('sha256:')
+    assert blobs.put(BODY) == ref
+    assert [r for r, _, _ in blobs.refs()] == [ref]
+    assert read_blob(commands_dir, ref) == BODY
+    with pytest.raises(MissingBlob):
+        read_blob(commands_dir, body_ref('never stored'))
+    with pytest.raises(MissingBlob):
+        read_blob(commands_dir, 'md5:abc')
+
+
+def test_put_makes_a_reused_blob_new_again(commands_dir):
+    blobs = BlobStore(commands_dir)
+    path = blob_path(commands_dir, blobs.put(BODY))
+    age(path, 7200)
+    blobs.put(BODY)
+    assert time.time() - path.stat().st_mtime < 60
+
+
+def test_dedup_store_shares_bodies(commands_dir):
+    store = CommandStore(commands_dir, dedup=True)
+    try:
+        store.create("shit's ready", BODY.strip())
+        store.create('check it', BODY.strip())
+        texts = [path.read_text() for path in sorted(commands_dir.glob('*.md'))]
+        refs = {frontmatter_body_ref(text) for text in texts}
+        assert len(refs) == 1 and None not in refs
+        assert read_body(commands_dir / 'check-it.md').strip() == BODY.strip()
+        assert store.body('shits-ready').strip() == BODY.strip()
+    finally:
+        store.close()
+
+
+def test_collect_spares_referenced_and_recent_blobs(commands_dir):
+    blobs = BlobStore(commands_dir)
+    kept, unused, recent = blobs.put('kept'), blobs.put('unused'), blobs.put('recent')
+    for ref in (kept, unused):
+        age(blob_path(commands_dir, ref), 7200)
+    assert blobs.collect([kept]) == (1, len('unused'))
+    assert sorted(r for r, _, _ in blobs.refs()) == sorted([kept, recent])
+    assert not blob_path(commands_dir, unused).exists()
+
+
+class ReusedDuringCollect(BlobStore):
+    """A writer stores `body` again right after collect() has listed the blobs."""
+
+    def __init__(self, directory, body):
+        super().__init__(directory)
+        self.body = body
+
+    def refs(self):
+        listed = list(super().refs())
+        BlobStore(self.directory).put(self.body)
+        return iter(listed)
+
+
+def test_collect_leaves_a_blob_reused_since_the_scan(commands_dir):
+    blobs = ReusedDuringCollect(commands_dir, BODY)
+    path = blob_path(commands_dir, blobs.put(BODY))
+    age(path, 7200)
+    assert blobs.collect([]) == (0, 0)
+    assert path.read_text() == BODY
+
+
+def test_pack_unpack_gc_command_line(commands_dir, capsys):
+    write_command(commands_dir, 'shits-ready', ["shit's ready"], action=BODY.strip())
+    write_command(commands_dir, 'check-it', ['check it'], action=BODY.strip())
+    original = {p.name: p.read_text() for p in commands_dir.glob('*.md')}
+
+    assert main(['pack', '--dir', str(commands_dir)]) == 0
+    assert 'Packed 2 commands' in capsys.readouterr().out
+    assert all(frontmatter_body_ref(p.read_text()) for p in commands_dir.glob('*.md'))
+    assert main(['stats', '--dir', str(commands_dir)]) == 0
+    assert '1 stored bodies, 1 in use' in capsys.readouterr().out
+
+    assert main(['unpack', '--dir', str(commands_dir)]) == 0
+    assert {p.name: p.read_text() for p in commands_dir.glob('*.md')} == original
+    assert main(['gc', '--dir', str(commands_dir), '--grace', '0']) == 0
+    assert 'Removed 1 unreferenced bodies' in capsys.readouterr().out.splitlines()[-1]
+    assert not any((commands_dir / BLOB_DIR).iterdir())
+
+
+def test_unpack_with_a_missing_blob_changes_nothing(commands_dir, capsys):
+    write_command(commands_dir, 'deploy', ['deploy'], action='make deploy')
+    main(['pack', '--dir', str(commands_dir)])
+    packed = (commands_dir / 'deploy.md').read_text()
+    blob_path(commands_dir, frontmatter_body_ref(packed)).unlink()
+    assert main(['unpack', '--dir', str(commands_dir)]) == 1
+    assert (commands_dir / 'deploy.md').read_text() == packed
@@ -0,0 +1,133 @@
+"""command_bulk: importing and exporting whole command sets."""
+
+import json
+
+import pytest
+
+from command_bulk import BulkError, import_bundle, parse_upload, write_items
+from command_storage import CommandExists, CommandStorage
+from command_store import CommandStore
+
+
+def ndjson(*commands):
+    return ''.join(json.dumps(c) + '\n' for c in commands).encode('utf-8')
+
+
+DEPLOY = {'phrase': 'deploy', 'action': 'make deploy', 'aliases': ['ship it']}
+BUILD = {'phrase': 'build', 'action': 'make build'}
+
+
+@pytest.fixture
+def store(commands_dir):
+    store = CommandStore(commands_dir)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize('fmt', ['ndjson', 'json', 'tar', 'zip'])
+def test_export_import_round_trip(tmp_path, store, fmt):
+    store.create('deploy', 'make deploy\nmake smoke-test', 'Ship it', aliases='ship it')
+    store.create("shit's ready", './verify_test.sh')
+    bundle = store.export_bundle(fmt=fmt)
+
+    other = CommandStore(tmp_path / "other")
+    try:
+        result = other.import_bundle(bundle, fmt)
+        assert result['success'] and result['created'] == 2
+        assert [c.filename for c in other.commands()] == ['deploy', 'shits-ready']
+        assert other.get('deploy').aliases == ('deploy', 'ship it')
+        assert other.body('deploy') == store.body('deploy')
+    finally:
+        other.close()
+
+
+def test_one_invalid_item_blocks_the_batch_unless_partial(store):
+    data = ndjson(DEPLOY, {'phrase': '', 'action': 'x'}, BUILD)
+    result = store.import_bundle(data, 'ndjson')
+    assert not result['success'] and result['created'] == 0
+    assert [r['success'] for r in result['results']] == [False, False, False]
+    assert store.commands() == []
+
+    result = store.import_bundle(data, 'ndjson', partial=True)
+    assert result['created'] == 2 and result['failed'] == 1
+    assert result['results'][1]['status'] == 400
+
+
+def test_duplicate_filenames_in_one_upload(store):
+    result = store.import_bundle(ndjson(DEPLOY, dict(DEPLOY, action='other')), 'ndjson')
+    assert result['created'] == 0
+    assert 'Duplicate' in result['results'][1]['error']
+
+
+def test_existing_commands_are_kept_unless_overwrite(store):
+    store.create('deploy', 'make old-deploy')
+    result = store.import_bundle(ndjson(DEPLOY, BUILD), 'ndjson')
+    assert (result['created'], result['updated'], result['failed']) == (1, 0, 1)
+    assert [r['status'] for r in result['results']] == [409, 201]
+    assert 'old-deploy' in store.body('deploy')
+
+    result = store.import_bundle(ndjson(DEPLOY, BUILD), 'ndjson', overwrite=True)
+    assert (result['created'], result['updated'], result['failed']) == (0, 2, 0)
+    assert [r['status'] for r in result['results']] == [200, 200]
+    assert store.body('deploy').strip() == 'make deploy'
+
+
+def test_unreadable_uploads():
+    with pytest.raises(BulkError):
+        parse_upload(b'[not json', 'json')
+    with pytest.raises(BulkError):
+        parse_upload(b'not a zip', 'zip')
+    with pytest.raises(BulkError):
+        parse_upload(b'', 'yaml')
+
+
+class RacingStorage(CommandStorage):
+    """
+    Storage that loses a create race: another process creates `racer` just
+    after it has been checked for the `checks`-th time (so the check still
+    says it's free).
+    """
+
+    def __init__(self, directory, racer, checks=1):
+        super().__init__(directory)
+        self.racer = racer
+        self.checks = checks
+
+    def exists(self, filename):
+        found = super().exists(filename)
+        if filename == self.racer and not found:
+            self.checks -= 1
+            if not self.checks:
+                self.path(filename).write_text('theirs')
+                self.racer = None
+        return found
+
+
+def test_write_many_takes_back_a_half_written_batch(commands_dir):
+    storage = RacingStorage(commands_dir, racer='b')
+    with pytest.raises(CommandExists):
+        storage.write_many([('a', 'A'), ('b', 'B'), ('c', 'C')], overwrite=False)
+    assert sorted(p.name for p in commands_dir.iterdir()) == ['b.md']
+    assert storage.path('b').read_text() == 'theirs'
+
+
+def test_bulk_create_race_reports_only_the_real_conflict(commands_dir):
+    storage = RacingStorage(commands_dir, racer='build', checks=2)   # write_items, write_many
+    items = parse_upload(ndjson(DEPLOY, BUILD, {'phrase': 'test', 'action': 'make test'}),
+                         'ndjson')
+    written = write_items(items, storage)
+    assert sorted(written) == ['deploy', 'test']
+    assert [item.status for item in items] == [201, 409, 201]
+    assert storage.path('build').read_text() == 'theirs'
+    assert 'make deploy' in storage.path('deploy').read_text()
+
+
+def test_import_bundle_refreshes_the_index_once(commands_dir):
+    store = CommandStore(commands_dir)
+    seen = []
+    store.subscribe(lambda index, changes: seen.append(changes))
+    try:
+        import_bundle(ndjson(DEPLOY, BUILD), 'ndjson', store.storage, index=store.index)
+        assert len(seen) == 1 and sorted(seen[0].added) == ['build', 'deploy']
+    finally:
+        store.close()
@@ -0,0 +1,135 @@
+"""CommandIndex: stamp-based refresh, fingerprints and listeners."""
+
+import os
+
+from command_frontmatter import read_frontmatter
+from command_index import CommandIndex
+from command_metrics import LISTENER_FAILURES
+from conftest import write_command
+
+
+def test_refresh_reports_added_updated_removed(commands_dir):
+    index = CommandIndex(commands_dir)
+    write_command(commands_dir, 'shits-ready', ["shit's ready"])
+    write_command(commands_dir, 'run-tests', ['run tests'])
+
+    changes = index.refresh()
+    assert sorted(changes.added) == ['run-tests', 'shits-ready']
+    assert index.get('shits-ready').phrase == "shit's ready"
+
+    write_command(commands_dir, 'run-tests', ['run tests', 'test it'], action='pytest -q')
+    (commands_dir / 'shits-ready.md').unlink()
+    changes = index.refresh()
+    assert changes.added == [] and changes.updated == ['run-tests']
+    assert changes.removed == ['shits-ready']
+    assert index.get('run-tests').aliases == ('run tests', 'test it')
+    assert len(index) == 1
+
+
+def test_unchanged_stamp_is_not_parsed_again(commands_dir):
+    parsed = []
+
+    def parser(path):
+        parsed.append(path.stem)
+        return read_frontmatter(path)
+
+    index = CommandIndex(commands_dir, parser=parser)
+    write_command(commands_dir, 'deploy', ['deploy'])
+    index.refresh()
+    assert index.refresh() == ([], [], [])
+    assert parsed == ['deploy']
+
+
+def test_same_size_edit_is_caught_by_mtime(commands_dir):
+    index = CommandIndex(commands_dir)
+    path = write_command(commands_dir, 'deploy', ['deploy'], action='echo aaa')
+    index.refresh()
+    stamp = index.stamps()['deploy']
+
+    write_command(commands_dir, 'deploy', ['deploy'], action='echo bbb')
+    os.utime(path, ns=(stamp[0] + 10 ** 9, stamp[0] + 10 ** 9))
+    assert path.stat().st_size == stamp[1]
+    assert index.refresh().updated == ['deploy']
+    assert index.stamps()['deploy'] == (stamp[0] + 10 ** 9, stamp[1])
+
+
+def test_refresh_max_age_skips_rescan(commands_dir):
+    index = CommandIndex(commands_dir)
+    index.refresh()
+    write_command(commands_dir, 'deploy', ['deploy'])
+    assert index.refresh(max_age=60) == ([], [], [])
+    assert index.refresh().added == ['deploy']
+
+
+def test_refresh_file_touches_one_file(commands_dir):
+    index = CommandIndex(commands_dir)
+    index.refresh()
+    write_command(commands_dir, 'deploy', ['deploy'])
+    write_command(commands_dir, 'other', ['other'])
+    assert index.refresh_file('deploy').added == ['deploy']
+    assert index.get('other') is None
+    (commands_dir / 'deploy.md').unlink()
+    assert index.refresh_files(['deploy']).removed == ['deploy']
+
+
+def test_fingerprint_follows_directory_state(commands_dir):
+    index = CommandIndex(commands_dir)
+    index.refresh()
+    empty = index.fingerprint
+
+    write_command(commands_dir, 'deploy', ['deploy'])
+    write_command(commands_dir, 'build', ['build'])
+    index.refresh()
+    both = index.fingerprint
+    assert both != empty
+
+    # Another index over the same files (e.g. another process) agrees
+    other = CommandIndex(commands_dir)
+    other.refresh()
+    assert other.fingerprint == both
+    assert other.snapshot(refresh=False)[0] == both
+
+    # Removing a file takes exactly its share back out
+    stamp = index.stamps()['build']
+    (commands_dir / 'build.md').unlink()
+    index.refresh()
+    assert index.fingerprint not in (empty, both)
+    write_command(commands_dir, 'build', ['build'])
+    os.utime(commands_dir / 'build.md', ns=(stamp[0], stamp[0]))
+    index.refresh()
+    assert index.fingerprint == both
+
+    for path in commands_dir.glob('*.md'):
+        path.unlink()
+    index.refresh()
+    assert index.fingerprint == empty
+
+
+def test_generation_only_moves_on_change(commands_dir):
+    index = CommandIndex(commands_dir)
+    write_command(commands_dir, 'deploy', ['deploy'])
+    index.refresh()
+    generation = index.generation
+    index.refresh()
+    assert index.generation == generation
+    write_command(commands_dir, 'deploy', ['deploy', 'ship it'])
+    index.refresh()
+    assert index.generation == generation + 1
+
+
+def test_failing_listener_does_not_stop_the_others(commands_dir):
+    index = CommandIndex(commands_dir)
+    seen = []
+
+    def broken(index, changes):
+        raise RuntimeError('listener bug')
+
+    index.subscribe(broken)
+    index.subscribe(lambda index, changes: seen.append(changes))
+    failures = LISTENER_FAILURES.value()
+
+    write_command(commands_dir, 'deploy', ['deploy'])
+    changes = index.refresh()
+    assert seen == [changes]
+    assert LISTENER_FAILURES.value() == failures + 1
+    assert index.get('deploy') is not None
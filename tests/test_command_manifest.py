@@ -0,0 +1,92 @@
+"""CommandManifest: the SQLite copy of the index that makes start-up cheap."""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+from command_frontmatter import read_frontmatter
+from command_index import CommandIndex
+from command_manifest import MANIFEST_NAME, CommandManifest, file_hash
+from command_store import CommandStore
+from conftest import write_command
+
+
+def counting_index(directory, parsed):
+    def parser(path):
+        parsed.append(path.stem)
+        return read_frontmatter(path)
+    return CommandIndex(directory, parser=parser)
+
+
+def test_restart_parses_only_what_changed(commands_dir):
+    for i in range(20):
+        write_command(commands_dir, f'cmd-{i}', [f'command {i}'])
+    store = CommandStore(commands_dir)
+    store.refresh()
+    store.close()
+
+    write_command(commands_dir, 'cmd-3', ['command three'], action='edited by hand')
+    (commands_dir / 'cmd-4.md').unlink()
+    parsed = []
+    index = counting_index(commands_dir, parsed)
+    manifest = CommandManifest(commands_dir)
+    manifest.attach(index)
+    changes = index.refresh()
+    assert parsed == ['cmd-3']
+    assert changes.updated == ['cmd-3'] and changes.removed == ['cmd-4']
+    assert index.get('cmd-3').phrase == 'command three'
+    assert len(index) == 19
+    manifest.close()
+
+
+def test_hashes_match_the_files(commands_dir):
+    store = CommandStore(commands_dir)
+    store.create('deploy', 'make deploy')
+    row = store.manifest.hashes()['deploy']
+    assert row[0] == store.index.stamps()['deploy']
+    assert row[1] == file_hash(commands_dir / 'deploy.md')
+    store.delete('deploy')
+    assert store.manifest.hashes() == {}
+    store.close()
+
+
+def test_corrupt_manifest_is_rebuilt(commands_dir):
+    write_command(commands_dir, 'deploy', ['deploy'])
+    (commands_dir / MANIFEST_NAME).write_bytes(b'this is not a database' * 100)
+    store = CommandStore(commands_dir)
+    assert [c.filename for c in store.commands()] == ['deploy']
+    assert list(store.manifest.hashes()) == ['deploy']
+    store.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork()')
+def test_forked_process_opens_its_own_connection(commands_dir):
+    store = CommandStore(commands_dir)
+    store.create('before-fork', 'echo')
+    parent_conn = store.manifest._conn
+    assert parent_conn is not None
+
+    pid = os.fork()
+    if pid == 0:   # Child: like a gunicorn worker forked from a preloaded app
+        code = 1
+        try:
+            store.create('in-child', 'echo')
+            manifest = store.manifest
+            if manifest._pid == os.getpid() and manifest._conn is not parent_conn:
+                store.close()   # Must not close the parent's connection
+                code = 0
+        finally:
+            sys.stdout.flush()
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    # The parent's connection still works and sees the child's row
+    assert sorted(store.manifest.hashes()) == ['before-fork', 'in-child']
+    assert store.manifest._conn is parent_conn
+    check = sqlite3.connect(str(commands_dir / MANIFEST_NAME))
+    assert check.execute('PRAGMA integrity_check').fetchone() == ('ok',)
+    check.close()
+    store.close()
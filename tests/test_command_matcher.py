@@ -0,0 +1,93 @@
+"""PhraseMatcher: exact, contains, prefix and fuzzy lookups."""
+
+from command_index import CommandIndex
+from command_matcher import PhraseMatcher, normalize_phrase
+from conftest import write_command
+
+
+def make_matcher():
+    matcher = PhraseMatcher()
+    matcher.add('shits-ready', ["shit's ready", 'ready to go'])
+    matcher.add('run-tests', ['run tests'])
+    matcher.add('tests', ['tests'])
+    matcher.add('deploy', ['deploy to production'])
+    return matcher
+
+
+def test_normalize_phrase():
+    assert normalize_phrase("  Shit's READY!! ") == 'shits ready'
+    assert normalize_phrase('deploy -- to/production') == 'deploy to production'
+
+
+def test_exact_ignores_case_and_punctuation():
+    matcher = make_matcher()
+    assert [m.filename for m in matcher.exact('Shits ready!')] == ['shits-ready']
+    assert matcher.exact('Ready to go')[0].alias == 'ready to go'
+    assert matcher.exact('shits') == []
+
+
+def test_contains_finds_aliases_in_a_sentence_longest_first():
+    matcher = make_matcher()
+    found = matcher.contains('ok now run tests please, then deploy to production')
+    assert [m.filename for m in found] == ['deploy', 'run-tests', 'tests']
+    assert all(m.kind == 'contains' for m in found)
+    assert matcher.contains('nothing to see here') == []
+
+
+def test_contains_sees_later_changes():
+    matcher = make_matcher()
+    assert matcher.contains('please build it') == []
+    matcher.add('build', ['build it'])
+    assert [m.filename for m in matcher.contains('please build it')] == ['build']
+    matcher.remove('build')
+    assert matcher.contains('please build it') == []
+
+
+def test_prefix():
+    matcher = make_matcher()
+    assert [m.filename for m in matcher.prefix('run')] == ['run-tests']
+    assert matcher.prefix('') == []
+
+
+def test_fuzzy_tolerates_transcription_errors():
+    matcher = make_matcher()
+    best = matcher.fuzzy('shits reddy')[0]
+    assert best.filename == 'shits-ready' and best.kind == 'fuzzy'
+    assert 0.4 <= best.score < 1.0
+    assert matcher.fuzzy('deploy to prodution')[0].filename == 'deploy'
+    assert matcher.fuzzy('xylophone') == []
+    assert matcher.fuzzy('shits ready')[0].score == 1.0
+
+
+def test_match_lists_each_command_once_best_kind_first():
+    matcher = make_matcher()
+    found = matcher.match('run tests')
+    assert [(m.filename, m.kind) for m in found] == [('run-tests', 'exact'), ('tests', 'contains')]
+
+
+def test_attached_matcher_follows_the_index(commands_dir):
+    write_command(commands_dir, 'shits-ready', ["shit's ready"])
+    index = CommandIndex(commands_dir)
+    index.refresh()
+    matcher = PhraseMatcher()
+    matcher.attach(index)
+    assert matcher.exact('shits ready')
+
+    write_command(commands_dir, 'shits-ready', ['all done'])
+    (commands_dir / 'deploy.md').write_text('---\ndescription: x\n---\n\necho\n')
+    index.refresh()
+    assert matcher.exact('shits ready') == []
+    assert matcher.exact('all done')[0].filename == 'shits-ready'
+    assert matcher.exact('deploy')[0].filename == 'deploy'   # Phrase from the filename
+
+    (commands_dir / 'shits-ready.md').unlink()
+    index.refresh()
+    assert matcher.exact('all done') == []
+
+
+def test_fuzzy_sees_removed_aliases_go():
+    matcher = make_matcher()
+    matcher.remove('shits-ready')
+    assert [m.filename for m in matcher.fuzzy('shits reddy')] == []
+    matcher.add('shits-ready', ['shits ready'])
+    assert matcher.fuzzy('shits reddy')[0].filename == 'shits-ready'
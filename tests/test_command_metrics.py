@@ -0,0 +1,109 @@
+"""command_metrics: counters, gauges, histograms and the Prometheus text format."""
+
+import pstats
+
+import pytest
+
+from command_metrics import (CONTENT_TYPE, HTTP_REQUESTS, Counter, Gauge, Histogram, Registry,
+                             RequestProfiler, request_finished, request_started)
+
+
+def test_counter_series_per_label():
+    requests = Counter('test_requests_total', 'Requests.', labels=('method', 'status'))
+    requests.inc(labels=('GET', 200))
+    requests.inc(2, labels=('GET', '200'))
+    requests.inc(labels=('POST', 201))
+    assert requests.value(('GET', 200)) == 3
+    assert requests.value(('DELETE', 200)) == 0
+    with pytest.raises(ValueError):
+        requests.inc(labels=('GET',))
+    assert requests.render().splitlines() == [
+        '# HELP test_requests_total Requests.',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{method="GET",status="200"} 3',
+        'test_requests_total{method="POST",status="201"} 1',
+    ]
+
+
+def test_unlabelled_metrics_start_at_zero():
+    assert Counter('test_bytes_total', 'Bytes.').render().endswith('\ntest_bytes_total 0')
+
+
+def test_gauge_up_down_and_function():
+    in_flight = Gauge('test_in_flight', 'In flight.')
+    in_flight.inc()
+    in_flight.inc(3)
+    in_flight.dec()
+    assert in_flight.value() == 3
+    in_flight.set(0.5)
+    assert in_flight.render().endswith('\ntest_in_flight 0.5')
+
+    items = [1, 2]
+    size = Gauge('test_items', 'Items.', function=lambda: len(items))
+    items.append(3)
+    assert size.render().endswith('\ntest_items 3')
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram('test_seconds', 'Latency.', labels=('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, labels=('/api',))
+    assert latency.render().splitlines()[2:] == [
+        'test_seconds_bucket{route="/api",le="0.1"} 2',
+        'test_seconds_bucket{route="/api",le="1"} 3',
+        'test_seconds_bucket{route="/api",le="+Inf"} 4',
+        'test_seconds_sum{route="/api"} 2.65',
+        'test_seconds_count{route="/api"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    errors = Counter('test_errors_total', 'Errors.', labels=('message',))
+    errors.inc(labels=('say "hi"\\\n',))
+    assert 'message="say \\"hi\\"\\\\\\n"' in errors.render()
+
+
+def test_registry_renders_in_order_and_rejects_duplicates():
+    registry = Registry()
+    registry.register(Counter('test_b_total', 'B.'))
+    registry.register(Gauge('test_a', 'A.'))
+    with pytest.raises(ValueError):
+        registry.register(Counter('test_a', 'Again.'))
+    text = registry.render()
+    assert text.index('test_b_total 0') < text.index('test_a 0') and text.endswith('\n')
+    assert registry.get('test_a').kind == 'gauge'
+
+
+def test_request_timing():
+    before = HTTP_REQUESTS.value(('GET', '/test', 200))
+    elapsed = request_finished(request_started(), 'GET', '/test', 200)
+    assert elapsed >= 0
+    assert HTTP_REQUESTS.value(('GET', '/test', 200)) == before + 1
+
+
+def test_profiler_keeps_only_slow_requests(tmp_path):
+    profiler = RequestProfiler(100, tmp_path / 'profiles')
+    assert profiler.finish(profiler.start(), 0.01, 'GET', '/api/commands') is None
+    path = profiler.finish(profiler.start(), 0.25, 'GET', '/api/commands/<filename>')
+    assert path.name.endswith('-GET-api-commands-filename-250ms.prof')
+    pstats.Stats(str(path))   # A readable profile
+    assert list((tmp_path / 'profiles').iterdir()) == [path]
+
+
+def test_profiler_is_off_unless_configured(monkeypatch, tmp_path):
+    monkeypatch.delenv('AI_COMMANDS_PROFILE_MS', raising=False)
+    assert RequestProfiler.from_environment() is None
+    monkeypatch.setenv('AI_COMMANDS_PROFILE_MS', '250')
+    monkeypatch.setenv('AI_COMMANDS_PROFILE_DIR', str(tmp_path / 'slow'))
+    profiler = RequestProfiler.from_environment()
+    assert profiler.threshold == 0.25 and profiler.directory.is_dir()
+
+
+def test_metrics_endpoint(client):
+    client.get('/api/commands')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    assert 'ai_commands_http_requests_total{method="GET",route="/api/commands",status="200"}' in text
+    assert '# TYPE ai_commands_http_request_duration_seconds histogram' in text
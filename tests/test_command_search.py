@@ -0,0 +1,114 @@
+"""CommandSearch: ranking, prefixes, snippets, incremental updates, fork safety."""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from command_index import CommandIndex
+from command_search import CommandSearch, parse_query
+from conftest import write_command
+
+
+@pytest.fixture
+def index(commands_dir):
+    write_command(commands_dir, 'shits-ready', ["shit's ready"], action='./verify_test.sh',
+                  description='Run the verification suite')
+    write_command(commands_dir, 'deploy', ['deploy', 'ship it'], action='make deploy',
+                  description='Deploy to production')
+    write_command(commands_dir, 'run-tests', ['run tests'], action='pytest -q',
+                  description='Run the unit tests')
+    index = CommandIndex(commands_dir)
+    index.refresh()
+    return index
+
+
+@pytest.fixture
+def search(index):
+    search = CommandSearch()
+    search.attach(index)
+    return search
+
+
+def test_parse_query_prefixes():
+    assert parse_query('verif*') == [('verif', True)]
+    assert parse_query('run tes') == [('run', False), ('tes', True)]
+    assert parse_query('run tes ') == [('run', False), ('tes', False)]
+    assert parse_query('run run', prefix_last=False) == [('run', False)]
+
+
+def test_phrase_words_rank_above_body_words(search):
+    total, hits = search.search('tests ', prefix_last=False)
+    assert total == 1 and hits[0].filename == 'run-tests'
+    total, hits = search.search('run ')
+    assert [hit.filename for hit in hits][0] == 'run-tests'
+    assert total == 2
+
+
+def test_body_and_prefix_matches_with_snippet(search):
+    total, hits = search.search('verify_test ')
+    assert [hit.filename for hit in hits] == ['shits-ready']
+    hit = hits[0]
+    assert hit.field == 'body'
+    assert [hit.snippet[s:e] for s, e in hit.highlights] == ['verify', 'test']
+    assert search.search('verif*')[1][0].filename == 'shits-ready'
+
+
+def test_follows_index_changes(commands_dir, index, search):
+    assert search.search('rollback ')[0] == 0
+    write_command(commands_dir, 'rollback', ['rollback'], action='make rollback')
+    (commands_dir / 'deploy.md').unlink()
+    index.refresh()
+    assert search.search('rollback ')[1][0].filename == 'rollback'
+    assert search.search('deploy ')[0] == 0
+    assert len(search) == 3
+
+
+def test_fork_while_another_thread_indexes(search):
+    if not hasattr(os, 'fork'):
+        pytest.skip('needs os.fork')
+    # Another thread is mid-update when the process forks (as a gunicorn
+    # worker forks while the build thread runs): in the child that thread
+    # is gone, and its lock would otherwise stay held for good
+    held, release = threading.Event(), threading.Event()
+
+    def indexer():
+        with search._update_lock:
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=indexer)
+    thread.start()
+    held.wait()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            done = []
+            worker = threading.Thread(target=lambda: done.append(search.search('deploy ')))
+            worker.start()
+            worker.join(10)
+            status = 0 if done and done[0][1][0].filename == 'deploy' else 1
+        finally:
+            os._exit(status)
+    release.set()
+    thread.join()
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+
+def test_importing_the_web_manager_starts_no_threads():
+    pytest.importorskip('flask')
+    # A fresh interpreter, recording every thread started by the import
+    code = ("import threading\n"
+            "started = []\n"
+            "start = threading.Thread.start\n"
+            "threading.Thread.start = lambda self: (started.append(self.name), start(self))\n"
+            "import web_command_manager\n"
+            "print(started)\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+                            text=True, timeout=60, check=True)
+    assert result.stdout.strip().splitlines()[-1] == '[]'
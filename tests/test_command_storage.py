@@ -0,0 +1,111 @@
+"""CommandStorage: atomic writes, no silent overwrites, the write journal."""
+
+import os
+import threading
+
+import pytest
+
+import command_storage
+from command_storage import JOURNAL_NAME, CommandExists, CommandStorage, WriteJournal
+
+
+def test_write_refuses_to_overwrite_unless_asked(commands_dir):
+    storage = CommandStorage(commands_dir)
+    storage.write('deploy', 'one')
+    with pytest.raises(CommandExists):
+        storage.write('deploy', 'two', overwrite=False)
+    assert storage.path('deploy').read_text() == 'one'
+    storage.write('deploy', 'two', overwrite=True)
+    assert storage.path('deploy').read_text() == 'two'
+
+
+def test_write_many_writes_nothing_if_one_exists(commands_dir):
+    storage = CommandStorage(commands_dir)
+    storage.write('b', 'old')
+    with pytest.raises(CommandExists):
+        storage.write_many([('a', 'new'), ('b', 'new')], overwrite=False)
+    assert not storage.exists('a')
+    assert storage.path('b').read_text() == 'old'
+
+
+def test_no_temp_files_left_behind(commands_dir):
+    storage = CommandStorage(commands_dir)
+    storage.write_many([(f'cmd-{i}', f'body {i}') for i in range(20)])
+    storage.delete_many(['cmd-0', 'cmd-1', 'missing'])
+    assert sorted(p.name for p in commands_dir.iterdir()) == \
+        sorted(f'cmd-{i}.md' for i in range(2, 20))
+
+
+def test_recover_replays_acknowledged_changes(commands_dir):
+    (commands_dir / 'stale.md').write_text('to be deleted')
+    journal = WriteJournal(commands_dir / JOURNAL_NAME)
+    journal.append('write', 'deploy', 'deploy body')
+    journal.append('write', 'build', 'first')
+    journal.append('write', 'build', 'second')
+    seq = journal.append('delete', 'stale')
+    journal.commit(seq)
+    journal.close()
+    # Crash before the files were touched; plus a torn, never-acknowledged append
+    with open(commands_dir / JOURNAL_NAME, 'ab') as f:
+        f.write(b'{"op": "write", "name": "torn", "da')
+
+    storage = CommandStorage(commands_dir, journal=True)   # Recovers on open
+    assert storage.path('deploy').read_text() == 'deploy body'
+    assert storage.path('build').read_text() == 'second'
+    assert not storage.exists('stale')
+    assert not storage.exists('torn')
+    assert (commands_dir / JOURNAL_NAME).stat().st_size == 0
+    assert storage.recover() == 0
+
+
+def test_journaled_changes_reach_the_files(commands_dir):
+    storage = CommandStorage(commands_dir, journal=True)
+    storage.write_many([('a', 'A'), ('b', 'B')])
+    assert storage.delete_many(['a', 'nope']) == ['a']
+    assert not storage.exists('a')
+    assert storage.path('b').read_text() == 'B'
+    storage.checkpoint()
+    assert (commands_dir / JOURNAL_NAME).stat().st_size == 0
+
+
+def test_group_commit_shares_fsyncs(commands_dir, monkeypatch):
+    storage = CommandStorage(commands_dir, journal=True)
+    journal_fd = storage._journal._file.fileno()
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        if fd == journal_fd:
+            fsyncs.append(fd)
+            threading.Event().wait(0.05)   # A slow disk: writers pile up meanwhile
+        real_fsync(fd)
+
+    monkeypatch.setattr(command_storage.os, 'fsync', slow_fsync)
+    writers = 16
+    start = threading.Barrier(writers)
+
+    def write(i):
+        start.wait()
+        storage.write(f'cmd-{i}', f'body {i}')
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(storage.exists(f'cmd-{i}') for i in range(writers))
+    assert 1 <= len(fsyncs) < writers
+
+
+def test_commit_covers_everything_appended_before(tmp_path, monkeypatch):
+    journal = WriteJournal(tmp_path / JOURNAL_NAME)
+    calls = []
+    monkeypatch.setattr(command_storage.os, 'fsync', lambda fd: calls.append(fd))
+    journal.append('write', 'a', 'A')
+    seq = journal.append('write', 'b', 'B')
+    journal.commit(seq)
+    journal.commit(1)   # Already durable: no second fsync
+    assert len(calls) == 1
+    assert [r['name'] for r in journal.records()] == ['a', 'b']
+    journal.close()
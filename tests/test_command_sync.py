@@ -0,0 +1,135 @@
+"""command_sync: three-way planning, tree comparison and directory-to-directory sync."""
+
+import pytest
+
+from command_store import CommandStore
+from command_sync import LocalPeer, SyncSource, compare, plan, sync
+
+
+# plan() takes {filename: (local (hash, mtime_ns) or None, remote ... or None)}
+# and {filename: hash both sides had at the last sync}
+
+def test_plan_one_side_changed():
+    differing = {
+        'edited-here': (('h2', 20), ('h1', 10)),
+        'edited-there': (('h1', 10), ('h2', 20)),
+        'new-here': (('h1', 10), None),
+        'new-there': (None, ('h1', 10)),
+    }
+    pulls, pushes, conflicts, skipped = plan(differing, {'edited-here': 'h1', 'edited-there': 'h1'})
+    assert pulls == ['edited-there', 'new-there']
+    assert pushes == ['edited-here', 'new-here']
+    assert conflicts == skipped == []
+
+
+def test_plan_deletions_travel_like_edits():
+    differing = {
+        'deleted-here': (None, ('h1', 10)),
+        'deleted-there': (('h1', 10), None),
+    }
+    base = {'deleted-here': 'h1', 'deleted-there': 'h1'}
+    pulls, pushes, conflicts, _ = plan(differing, base)
+    assert pushes == ['deleted-here']    # Delete it on the other side
+    assert pulls == ['deleted-there']    # Delete it here
+    assert conflicts == []
+
+
+def test_plan_conflict_newer_wins():
+    differing = {
+        'newer-here': (('mine', 30), ('theirs', 20)),
+        'newer-there': (('mine', 20), ('theirs', 30)),
+    }
+    base = {'newer-here': 'old', 'newer-there': 'old'}
+    pulls, pushes, conflicts, _ = plan(differing, base, policy='newer')
+    assert pushes == ['newer-here'] and pulls == ['newer-there'] and conflicts == []
+
+
+def test_plan_conflict_edit_beats_deletion():
+    differing = {
+        'edited-here-deleted-there': (('mine', 5), None),
+        'deleted-here-edited-there': (None, ('theirs', 5)),
+    }
+    base = {name: 'old' for name in differing}
+    pulls, pushes, conflicts, _ = plan(differing, base)
+    assert pushes == ['edited-here-deleted-there']
+    assert pulls == ['deleted-here-edited-there']
+    assert conflicts == []
+
+
+def test_plan_conflict_reported():
+    differing = {'both': (('mine', 30), ('theirs', 20)), 'gone': (('mine', 30), None)}
+    pulls, pushes, conflicts, _ = plan(differing, {'both': 'old', 'gone': 'old'}, policy='report')
+    assert conflicts == ['both', 'gone'] and pulls == pushes == []
+
+
+def test_plan_first_sync_without_base_is_a_conflict():
+    # Never synced and different on both sides: neither matches the (missing) base
+    differing = {'deploy': (('mine', 30), ('theirs', 20))}
+    assert plan(differing, {}, policy='report')[2] == ['deploy']
+    assert plan(differing, {})[1] == ['deploy']
+
+
+def test_plan_one_way_mode_skips_the_other_direction():
+    differing = {'edited-here': (('h2', 20), ('h1', 10)), 'edited-there': (('h1', 10), ('h2', 20))}
+    base = {'edited-here': 'h1', 'edited-there': 'h1'}
+    pulls, pushes, _, skipped = plan(differing, base, mode='push')
+    assert pushes == ['edited-here'] and pulls == [] and skipped == ['edited-there']
+
+
+@pytest.fixture
+def stores(tmp_path):
+    here = CommandStore(tmp_path / "here")
+    there = CommandStore(tmp_path / "there")
+    yield here, there
+    here.close()
+    there.close()
+
+
+def test_compare_finds_only_differing_files(stores):
+    here, there = stores
+    for i in range(300):
+        here.create(f'command {i}', f'echo {i}')
+        there.create(f'command {i}', f'echo {i}')
+    here.write('command-7', here.read('command-7') + 'changed\n')
+    there.delete('command-8')
+    here.refresh()
+    there.refresh()
+
+    differing, rounds = compare(SyncSource(here).tree(max_age=None), LocalPeer(there))
+    assert sorted(differing) == ['command-7', 'command-8']
+    assert differing['command-8'][1] is None
+    assert rounds <= 4
+
+
+def test_sync_two_directories(stores):
+    here, there = stores
+    here.create('deploy', 'make deploy')
+    here.create('build', 'make build')
+    there.create('test', 'make test')
+
+    report = sync(here, LocalPeer(there))
+    assert report.pushed == ['build', 'deploy'] and report.pulled == ['test']
+    assert sorted(c.filename for c in there.commands()) == ['build', 'deploy', 'test']
+    assert here.read('test') == there.read('test')
+
+    # Next round: a deletion there and an edit here travel; nothing else moves
+    there.delete('build')
+    here.create('deploy', 'make deploy-v2', overwrite=True)
+    report = sync(here, LocalPeer(there))
+    assert report.pulled == ['build'] and report.pushed == ['deploy']
+    assert here.get('build') is None
+    assert 'deploy-v2' in there.read('deploy')
+    assert sync(here, LocalPeer(there), dry_run=True)[:4] == ([], [], [], [])
+
+
+def test_sync_reports_conflicting_edits(stores):
+    here, there = stores
+    here.create('deploy', 'make deploy')
+    sync(here, LocalPeer(there))
+    here.create('deploy', 'make deploy-here', overwrite=True)
+    there.create('deploy', 'make deploy-there', overwrite=True)
+
+    report = sync(here, LocalPeer(there), policy='report')
+    assert report.conflicts == ['deploy']
+    assert 'deploy-here' in here.read('deploy')
+    assert 'deploy-there' in there.read('deploy')
@@ -0,0 +1,99 @@
+"""TenantPool: namespaces loaded on demand, evicted least recently used first."""
+
+import pytest
+
+from command_tenants import (
+    COMMAND_BYTES, TENANT_BYTES, NamespaceError, TenantPool, UnknownNamespace, check_namespace)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = TenantPool(tmp_path / "namespaces", max_loaded=2, dedup=False)
+    yield pool
+    pool.close()
+
+
+def load(pool, name, create=True):
+    with pool.use(name, create=create) as tenant:
+        return tenant
+
+
+def loaded_names(pool):
+    return [entry['namespace'] for entry in pool.stats() if entry['loaded']]
+
+
+def test_namespace_names():
+    check_namespace('design-team')
+    check_namespace('a_1')
+    for bad in ('', 'Design', '-team', 'a/b', 'x' * 65, 'commands', 'metrics', None):
+        with pytest.raises(NamespaceError):
+            check_namespace(bad)
+
+
+def test_unknown_namespace_unless_created(pool):
+    with pytest.raises(UnknownNamespace):
+        pool.get('nobody')
+    tenant = load(pool, 'team')
+    tenant.store.create('deploy', 'make deploy')
+    assert pool.names() == ['team']
+    assert load(pool, 'team', create=False) is tenant
+
+
+def test_least_recently_used_is_evicted(pool):
+    a = load(pool, 'a')
+    load(pool, 'b')
+    load(pool, 'a')        # a is now the most recently used
+    load(pool, 'c')
+    assert loaded_names(pool) == ['a', 'c']
+    assert pool.loaded() == 2
+    stats = {entry['namespace']: entry for entry in pool.stats()}
+    assert stats['b']['evictions'] == 1 and not stats['b']['loaded']
+    assert stats['a']['requests'] == 2
+    assert load(pool, 'a') is a
+
+
+def test_evicted_namespace_reloads_from_disk(pool):
+    load(pool, 'a').store.create('deploy', 'make deploy')
+    load(pool, 'b')
+    load(pool, 'c')
+    assert 'a' not in loaded_names(pool)
+    tenant = load(pool, 'a', create=False)
+    assert [c.filename for c in tenant.store.commands()] == ['deploy']
+    assert {e['namespace']: e for e in pool.stats()}['a']['loads'] == 2
+
+
+def test_namespace_in_use_is_not_evicted(pool):
+    held = pool.get('a', create=True)
+    assert held.busy()
+    load(pool, 'b')
+    load(pool, 'c')
+    assert 'a' in loaded_names(pool)
+    assert 'b' not in loaded_names(pool)
+
+    pool.release(held)
+    assert not held.busy()
+    load(pool, 'd')
+    assert 'a' not in loaded_names(pool)
+
+
+def test_nested_uses_keep_a_namespace_busy(pool):
+    with pool.use('a', create=True) as tenant:
+        with pool.use('a') as again:
+            assert again is tenant and tenant.users == 2
+        assert tenant.busy()
+    assert tenant.users == 0
+
+
+def test_memory_budget_evicts(tmp_path):
+    budget = 2 * TENANT_BYTES + 10 * COMMAND_BYTES - 1   # Just too small for both
+    pool = TenantPool(tmp_path / "namespaces", memory_limit=budget, max_loaded=100, dedup=False)
+    try:
+        with pool.use('big', create=True) as tenant:
+            for i in range(10):
+                tenant.store.create(f'command {i}', 'echo')
+        load(pool, 'big')        # Refresh its estimate
+        load(pool, 'small')
+        assert loaded_names(pool) == ['small']
+        assert pool.memory() <= budget
+    finally:
+        pool.close()
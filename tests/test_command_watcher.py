@@ -0,0 +1,73 @@
+"""CommandWatcher: outside edits reach the index without a manual refresh."""
+
+import queue
+import shutil
+
+import pytest
+
+from command_index import CommandIndex
+from command_watcher import CommandWatcher, _load_inotify
+from conftest import write_command
+
+MODES = ['polling'] + (['inotify'] if _load_inotify() is not None else [])
+
+
+@pytest.fixture(params=MODES)
+def watched(request, commands_dir):
+    index = CommandIndex(commands_dir)
+    index.refresh()
+    changes = queue.Queue()
+    index.subscribe(lambda index, diff: changes.put(diff))
+    watcher = CommandWatcher(index, poll_interval=0.05, use_inotify=request.param == 'inotify')
+    watcher.start()
+    yield index, changes, watcher
+    watcher.stop()
+
+
+def next_change(changes):
+    diff = changes.get(timeout=5)
+    while not (diff.added or diff.updated or diff.removed):
+        diff = changes.get(timeout=5)
+    return diff
+
+
+def test_outside_edits_are_picked_up(watched, commands_dir):
+    index, changes, watcher = watched
+    write_command(commands_dir, 'deploy', ['deploy'])
+    assert next_change(changes).added == ['deploy']
+    assert index.get('deploy') is not None
+
+    write_command(commands_dir, 'deploy', ['deploy', 'ship it'])
+    assert next_change(changes).updated == ['deploy']
+    (commands_dir / 'deploy.md').unlink()
+    assert next_change(changes).removed == ['deploy']
+    assert index.get('deploy') is None
+
+
+def test_a_burst_arrives_as_few_diffs(watched, commands_dir):
+    index, changes, watcher = watched
+    for i in range(50):
+        write_command(commands_dir, f'cmd-{i}', [f'command {i}'])
+    seen = set()
+    while len(seen) < 50:
+        seen.update(next_change(changes).added)
+    assert len(index) == 50
+
+
+def test_directory_removed_and_recreated(watched, commands_dir):
+    index, changes, watcher = watched
+    write_command(commands_dir, 'deploy', ['deploy'])
+    next_change(changes)
+    shutil.rmtree(commands_dir)
+    assert next_change(changes).removed == ['deploy']
+    commands_dir.mkdir()
+    write_command(commands_dir, 'build', ['build'])
+    assert 'build' in next_change(changes).added
+
+
+def test_stop_is_idempotent(commands_dir):
+    watcher = CommandWatcher(CommandIndex(commands_dir), poll_interval=0.05)
+    watcher.start()
+    watcher.stop()
+    watcher.stop()
+    assert not watcher._thread.is_alive()
@@ -0,0 +1,116 @@
+"""templates/session-recovery/session_snapshots.py: delta-stored snapshots and the stat scan."""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'templates' / 'session-recovery'))
+
+import session_snapshots as snapshots  # noqa: E402
+from session_snapshots import SnapshotError, SnapshotStore  # noqa: E402
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src').mkdir(parents=True)
+    (root / 'src' / 'app.py').write_text('print("hi")\n')
+    (root / 'README.md').write_text('# Project\n')
+    (root / 'node_modules' / 'left-pad').mkdir(parents=True)
+    (root / 'node_modules' / 'left-pad' / 'index.js').write_text('')
+    return root
+
+
+@pytest.fixture
+def store(project):
+    return SnapshotStore(project / '.ai-framework' / 'session-recovery' / 'snapshots', project)
+
+
+def test_deltas_rebuild_every_version(store):
+    rng = random.Random(3)
+    lines = [f'line {n}\n' for n in range(40)]
+    previous, versions = None, []
+    for _ in range(snapshots.KEYFRAME_INTERVAL * 2 + 3):
+        for _ in range(3):
+            i = rng.randrange(len(lines))
+            edit = rng.choice(('change', 'insert', 'delete'))
+            if edit == 'change':
+                lines[i] = f'changed {rng.random()}\n'
+            elif edit == 'insert':
+                lines.insert(i, f'new {rng.random()}\n')
+            elif len(lines) > 1:
+                del lines[i]
+        text = ''.join(lines) + ('no newline at the end' if rng.random() < 0.3 else '')
+        previous = store.put_text(text, previous)
+        versions.append((previous, text))
+    for oid, text in versions:
+        assert store.text(oid) == text
+        assert store.get(oid)['depth'] < snapshots.KEYFRAME_INTERVAL
+    assert store.put_text(versions[-1][1]) == store.put_text(versions[-1][1])
+
+
+def test_save_list_resolve(store):
+    first = store.save('# Exit 1\n', 'state 1\n', label='start')
+    second = store.save('# Exit 2\n', 'state 1\n', label='multi\nline')
+    assert [(oid, label) for oid, _, label in store.log()] == [(first, 'start'), (second, 'multi line')]
+    assert store.resolve('1') == store.resolve('-2') == store.resolve(first[:10]) == first
+    oid, snapshot = store.snapshot()
+    assert oid == second and snapshot['parent'] == first
+    assert store.text(snapshot['snapshot']) == '# Exit 2\n'
+    assert snapshot['state'] == store.snapshot(first)[1]['state']   # Unchanged: stored once
+    for ref in ('0', '3', '-3', 'nope'):
+        with pytest.raises(SnapshotError):
+            store.resolve(ref)
+
+
+def test_no_snapshots_yet(store):
+    with pytest.raises(SnapshotError, match='no snapshots'):
+        store.resolve()
+
+
+def test_scan_finds_changes_since_the_last_save(project, store):
+    changes = store.scan()
+    assert changes['baseline'] == 2   # node_modules skipped
+    store.save('# Exit\n')
+    assert store.scan() == {'added': [], 'modified': [], 'deleted': []}
+
+    (project / 'src' / 'app.py').write_text('print("hello")\n')
+    (project / 'src' / 'new.py').write_text('')
+    (project / 'README.md').unlink()
+    (project / snapshots.SNAPSHOT_FILE).write_text('# Exit\n')
+    changes = store.scan()
+    assert changes == {'added': ['src/new.py'], 'modified': ['src/app.py'], 'deleted': ['README.md']}
+
+    # A scan is only committed by save(): scanning again reports the same
+    assert store.scan() == changes
+    store.save('# Exit\n')
+    assert store.snapshot()[1]['changes'] == changes
+    assert store.scan() == {'added': [], 'modified': [], 'deleted': []}
+
+
+def test_same_size_edit_is_caught_by_mtime(project, store):
+    store.scan()
+    store.save('# Exit\n')
+    app = project / 'src' / 'app.py'
+    stat = app.stat()
+    app.write_text('print("ho")\n')
+    os.utime(app, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert store.scan()['modified'] == ['src/app.py']
+
+
+def test_damaged_index_is_rebuilt(store):
+    store.scan()
+    store.save('# Exit\n')
+    store.index_path.write_bytes(b'\x00garbage')
+    assert 'baseline' in store.scan()
+
+
+def test_format_changes():
+    assert snapshots.format_changes(None) == "❓ Not scanned"
+    assert 'No files changed' in snapshots.format_changes({'added': [], 'modified': [], 'deleted': []})
+    changes = {'added': ['a', 'b'], 'modified': ['c'], 'deleted': ['d']}
+    assert snapshots.format_changes(changes, limit=2).splitlines() == [
+        '- ➕ `a`', '- ➕ `b`', '- ... and 2 more']
@@ -0,0 +1,150 @@
+""".ai/task_queue.py: claims, leases, blocking waits and the .ai/STATUS mirror."""
+
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPT = ROOT / '.ai' / 'task_queue.py'
+
+# .ai is not a package: load the script by path
+_spec = importlib.util.spec_from_file_location('task_queue', SCRIPT)
+task_queue = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(task_queue)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = task_queue.TaskQueue(tmp_path)
+    yield queue
+    queue.close()
+
+
+def test_template_copy_is_the_same_script():
+    assert (ROOT / 'templates' / '.ai' / 'task_queue.py').read_bytes() == SCRIPT.read_bytes()
+
+
+def test_claim_takes_the_best_task_for_the_agent(queue):
+    low = queue.add('Tidy docs', priority=4)
+    mine = queue.add('Fix login bug', priority=1, assigned_to='TCC')
+    queue.add('Review API', priority=1, assigned_to='OCC')
+    old = queue.add('Write tests', priority=2)
+    queue.add('Write more tests', priority=2)
+
+    assert queue.claim('tcc').id == mine.id   # Assignment ignores case
+    task = queue.claim('TCC')
+    assert (task.id, task.state, task.claimed_by, task.attempts) == (old.id, 'IN_PROGRESS', 'TCC', 1)
+    assert queue.claim('OCC').summary == 'Review API'
+    queue.claim('TCC')
+    assert queue.claim('TCC').id == low.id
+    assert queue.claim('TCC') is None
+    with pytest.raises(ValueError):
+        queue.add('Nope', priority=5)
+
+
+def test_concurrent_agents_never_share_a_task(tmp_path):
+    setup = task_queue.TaskQueue(tmp_path)
+    for n in range(20):
+        setup.add(f'Task {n}')
+    setup.close()
+    claimed = []
+
+    def agent(name):
+        queue = task_queue.TaskQueue(tmp_path)
+        try:
+            while True:
+                task = queue.claim(name)
+                if task is None:
+                    return
+                claimed.append(task.id)
+        finally:
+            queue.close()
+
+    agents = [threading.Thread(target=agent, args=(f'agent-{n}',)) for n in range(4)]
+    for thread in agents:
+        thread.start()
+    for thread in agents:
+        thread.join()
+    assert sorted(claimed) == list(range(1, 21))
+
+
+def test_expired_lease_can_be_claimed_again(queue):
+    task = queue.add('Flaky job')
+    queue.claim('crashed', lease=0.05)
+    assert queue.claim('other') is None
+    time.sleep(0.1)
+    retry = queue.claim('other')
+    assert (retry.id, retry.claimed_by, retry.attempts) == (task.id, 'other', 2)
+    assert not queue.heartbeat(task.id, 'crashed')
+    assert queue.heartbeat(task.id, 'other', lease=60)
+
+
+def test_done_block_release(queue):
+    task = queue.add('Deploy')
+    queue.claim('TCC')
+    assert queue.block(task.id, 'waiting on API keys')
+    assert queue.claim('TCC') is None
+    assert queue.release(task.id)
+    assert queue.claim('TCC').id == task.id
+    assert queue.complete(task.id, 'shipped')
+    assert not queue.release(task.id)   # DONE is final
+    assert queue.tasks() == []
+    assert queue.tasks(task_queue.STATES)[0].note == 'shipped'
+
+
+def test_wait_for_task_wakes_on_add(tmp_path, queue):
+    def another_agent():
+        time.sleep(0.2)
+        other = task_queue.TaskQueue(tmp_path)
+        other.add('Urgent', priority=1)
+        other.close()
+
+    thread = threading.Thread(target=another_agent)
+    thread.start()
+    start = time.monotonic()
+    task = queue.wait_for_task('TCC', timeout=10)
+    thread.join()
+    assert task is not None and task.summary == 'Urgent'
+    assert time.monotonic() - start < 5
+    assert list(queue.waiters_dir.glob('*.sock')) == []
+
+
+def test_wait_for_task_wakes_when_a_lease_runs_out(queue):
+    queue.add('Abandoned')
+    queue.claim('crashed', lease=0.2)
+    task = queue.wait_for_task('TCC', timeout=10)
+    assert task is not None and task.claimed_by == 'TCC'
+
+
+def test_wait_for_task_times_out(queue):
+    start = time.monotonic()
+    assert queue.wait_for_task('TCC', timeout=0.2) is None
+    assert time.monotonic() - start < 5
+
+
+def test_status_mirrors_the_top_task(tmp_path, queue):
+    status = tmp_path / 'STATUS'
+    status.write_text('# Keep this comment\nTASK_STATE=IDLE\nCUSTOM=1\n')
+    queue.add('Fix "login" $bug', priority=2, assigned_to='TCC', effort_hours=1.5)
+    text = status.read_text()
+    assert text.startswith('# Keep this comment\nTASK_STATE=PENDING\nCUSTOM=1\n')
+    values = task_queue.read_status(status)
+    assert values['SUMMARY'] == 'Fix \\"login\\" \\$bug'
+    assert (values['PRIORITY'], values['EFFORT_HOURS'], values['PENDING_TASKS']) == ('2', '1.5', '1')
+
+    queue.complete(queue.claim('TCC').id)
+    assert task_queue.read_status(status)['TASK_STATE'] == 'IDLE'
+
+
+def test_import_status(tmp_path, queue):
+    task_queue.write_status(tmp_path / 'STATUS', {
+        'TASK_STATE': 'BLOCKED', 'PRIORITY': 1, 'ASSIGNED_TO': 'OCC', 'SUMMARY': 'Migrate db',
+        'EFFORT_HOURS': 'soon'})
+    task = queue.import_status()
+    assert (task.summary, task.priority, task.assigned_to) == ('Migrate db', 3, 'OCC')
+    assert queue.get(task.id).state == 'BLOCKED'
+    task_queue.write_status(tmp_path / 'STATUS', {'TASK_STATE': 'IDLE'})
+    assert queue.import_status() is None
@@ -0,0 +1,146 @@
+"""scripts/validation_engine.py: the file cache, the import graph and incremental runs."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import validation_engine as engine  # noqa: E402
+
+
+def write(root, path, text=''):
+    path = Path(root) / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def project(tmp_path):
+    write(tmp_path, 'app/__init__.py')
+    write(tmp_path, 'app/core.py', 'VALUE = 1\n')
+    write(tmp_path, 'app/api.py', 'from . import core\nfrom .core import VALUE\n')
+    write(tmp_path, 'cli.py', 'import app.api\n')
+    write(tmp_path, 'tests/test_core.py', 'from app.core import VALUE\n')
+    write(tmp_path, 'tests/test_cli.py', 'import cli\n')
+    write(tmp_path, 'tests/test_other.py', 'import helpers\n')
+    write(tmp_path, 'tests/helpers.py')
+    write(tmp_path, 'venv/lib/skipped.py')
+    write(tmp_path, 'node_modules/x/skipped.py')
+    return tmp_path
+
+
+def test_python_files_skip_tool_directories(project):
+    files = engine.python_files(project)
+    assert 'app/core.py' in files and 'tests/helpers.py' in files
+    assert not [f for f in files if 'skipped' in f]
+
+
+def test_refresh_files_reports_only_content_changes(project):
+    cache = engine.empty_cache()
+    paths, changed = engine.refresh_files(project, cache)
+    assert changed == paths
+
+    core = project / 'app' / 'core.py'
+    stat = core.stat()
+    os.utime(core, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))   # Touched only
+    assert engine.refresh_files(project, cache)[1] == []
+
+    write(project, 'app/core.py', 'VALUE = 2\n')
+    (project / 'tests' / 'helpers.py').unlink()
+    paths, changed = engine.refresh_files(project, cache)
+    assert changed == ['app/core.py']
+    assert 'tests/helpers.py' not in cache['files'] and 'tests/helpers.py' not in paths
+
+
+def test_imports_resolve_relative_imports(project):
+    assert engine.imports_of(project, 'app/api.py') == ['app', 'app.core', 'app.core.VALUE']
+    write(project, 'broken.py', 'def (:\n')
+    assert engine.imports_of(project, 'broken.py') == []
+
+
+def test_affected_tests_follow_imports_transitively(project):
+    cache = engine.empty_cache()
+    engine.refresh_files(project, cache)
+    entries = cache['files']
+    assert engine.affected_tests(entries, ['app/core.py']) == [
+        'tests/test_cli.py', 'tests/test_core.py']
+    # Imported as a sibling module, the way pytest puts tests/ on sys.path
+    assert engine.affected_tests(entries, ['tests/helpers.py']) == ['tests/test_other.py']
+    assert engine.affected_tests(entries, ['tests/test_cli.py']) == ['tests/test_cli.py']
+
+
+def test_chunks_split_work_across_jobs():
+    files = [f'f{n}.py' for n in range(10)]
+    assert [len(c) for c in engine.chunks(files, 4)] == [3, 3, 3, 1]
+    assert engine.chunks(files, 0) == [files]
+    assert sum(engine.chunks([f'f{n}' for n in range(1000)], 1), []) == [f'f{n}' for n in range(1000)]
+    assert max(len(c) for c in engine.chunks(files * 100, 1)) == engine.MAX_CHUNK
+
+
+def test_tool_fingerprint_follows_config(project):
+    before = engine.tool_fingerprint(project, 'flake8', None)
+    assert engine.tool_fingerprint(project, 'black', None) == \
+        engine.tool_fingerprint(project, 'black', None)
+    write(project, '.flake8', '[flake8]\n')
+    assert engine.tool_fingerprint(project, 'flake8', None) != before
+
+
+def test_check_tests_runs_only_affected_tests(project, monkeypatch):
+    runs = []
+
+    def fake_pytest(root, tests):
+        runs.append(tests)
+        measured = [p for p in engine.python_files(root) if not engine.is_test_file(p)]
+        return True, [], {p: [10, 10] for p in measured}, ['passed']
+
+    monkeypatch.setattr(engine, 'run_pytest', fake_pytest)
+    cache = engine.empty_cache()
+    paths, changed = engine.refresh_files(project, cache)
+    ok, details, ran, skipped = engine.check_tests(project, cache, paths, changed, False, None, False)
+    assert runs == [[]] and ok and ran == 3   # First run: everything
+
+    paths, changed = engine.refresh_files(project, cache)
+    assert engine.check_tests(project, cache, paths, changed, False, None, False)[2:] == (0, 3)
+    assert len(runs) == 1   # Nothing changed: the cached result
+
+    write(project, 'cli.py', 'import app.api\nimport os\n')
+    paths, changed = engine.refresh_files(project, cache)
+    engine.check_tests(project, cache, paths, changed, False, None, False)
+    assert runs[-1] == ['tests/test_cli.py']
+
+
+def test_main_only_checks_changed_files(project, monkeypatch, capsys):
+    checked = []
+
+    def fake_black(root, files):
+        checked.append(list(files))
+        return {f: ['would reformat ' + f] if '  ' in (Path(root) / f).read_text() else []
+                for f in files}
+
+    monkeypatch.setitem(engine.RUNNERS, 'black', fake_black)
+    monkeypatch.setattr(engine.shutil, 'which', lambda tool: '/bin/true' if tool == 'black' else None)
+
+    write(project, 'cli.py', 'import  app.api\n')
+    engine.main(['--root', str(project), '--jobs', '2'])
+    lines = [line.split('\t') for line in capsys.readouterr().out.splitlines()]
+    assert ['fail', 'black', 'ERROR', 'Black formatting violations detected'] in lines
+    assert ['detail', 'black', 'would reformat cli.py'] in lines
+    assert ['warning', 'Flake8 linter not installed'] in lines
+    assert sorted(sum(checked, [])) == engine.python_files(project)
+
+    checked.clear()
+    write(project, 'cli.py', 'import app.api\n')
+    engine.main(['--root', str(project)])
+    lines = [line.split('\t') for line in capsys.readouterr().out.splitlines()]
+    assert checked == [['cli.py']]
+    assert ['pass', 'black', 'Black formatting validation passed'] in lines
+    timing = next(line for line in lines if line[:2] == ['timing', 'black'])
+    assert timing[3:] == ['1', str(len(engine.python_files(project)) - 1)]
+
+    checked.clear()
+    engine.main(['--root', str(project), '--full'])
+    assert len(sum(checked, [])) == len(engine.python_files(project))
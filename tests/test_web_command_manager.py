@@ -0,0 +1,27 @@
+"""The Flask API (web_command_manager), through Flask's test client."""
+
+import pytest
+
+
+def test_create_command(client, web_manager):
+    response = client.post('/api/commands', json={'phrase': "Web test's ready",
+                                                  'action': './verify.sh'})
+    assert response.status_code == 200
+    assert response.json == {'success': True, 'filename': 'web-tests-ready'}
+    assert (web_manager.COMMANDS_DIR / 'web-tests-ready.md').exists()
+
+    response = client.post('/api/commands', json={'phrase': "Web test's ready", 'action': 'x'})
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize('body', [['x'], 'x', 42, None])
+def test_create_needs_a_json_object(client, body):
+    response = client.post('/api/commands', json=body)
+    assert response.status_code == 400
+    assert response.json['success'] is False
+
+
+def test_create_needs_phrase_and_action(client):
+    assert client.post('/api/commands', json={'phrase': 'only a phrase'}).status_code == 400
+    assert client.post('/api/commands', data='not json',
+                       content_type='application/json').status_code == 400
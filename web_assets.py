@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+===================================================================================
+AI Framework Command Manager - Static Web UI Assets
+===================================================================================
+
+PURPOSE:
+    Serves the web interface (web_ui/index.html, app.css, app.js) so that a
+    repeat visit costs one tiny conditional request: the page is checked
+    with its ETag (304 Not Modified), and the CSS and JS are never asked
+    for again until they actually change.
+
+HOW IT WORKS:
+    1. At startup every file in web_ui/ is read once and given a
+       content-hashed name: app.css -> app.3f2a91c0.css
+    2. index.html is rendered once, with its /static/app.css and
+       /static/app.js references rewritten to the hashed names
+    3. Every file is precompressed (gzip, plus brotli if the brotli module
+       is installed) and the smallest encoding the browser accepts is sent
+    4. Hashed files are cached by browsers "forever" (the name changes
+       when the content does); the page itself is revalidated on every
+       load with its ETag
+
+    Edits to web_ui/ are picked up on the next server start.
+
+USAGE:
+    assets = AssetBundle(Path(__file__).parent / 'web_ui')
+    status, headers, body = assets.respond('index.html', if_none_match, accept_encoding)
+===================================================================================
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+
+try:
+    import brotli  # Optional: pip3 install brotli
+except ImportError:
+    brotli = None
+
+# Where the page links its assets; rewritten to the hashed names
+STATIC_PREFIX = '/static/'
+
+# Hashed files never change, so browsers may keep them for a year
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+# The page and unhashed names can change at any time: cache, but revalidate
+REVALIDATE_CACHE = 'no-cache'
+
+# Files smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 256
+
+# Content types for UI files (mimetypes is patchy on some systems)
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.svg': 'image/svg+xml',
+    '.json': 'application/json',
+}
+
+
+def content_hash(data):
+    """Short hash of a file's bytes, used in its name and ETag."""
+    return hashlib.blake2b(data, digest_size=4).hexdigest()
+
+
+def hashed_name(name, digest):
+    """app.css -> app.<digest>.css"""
+    stem, dot, suffix = name.rpartition('.')
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def accepted_encodings(header):
+    """Encodings the browser accepts (q > 0) from an Accept-Encoding header."""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class Asset:
+    """One UI file, held in memory in every encoding worth sending."""
+
+    __slots__ = ('name', 'url_name', 'content_type', 'digest', 'variants')
+
+    def __init__(self, name, data, content_type, hashed=True):
+        self.name = name
+        self.digest = content_hash(data)
+        self.url_name = hashed_name(name, self.digest) if hashed else name
+        self.content_type = content_type
+        self.variants = {'identity': data}  # encoding -> bytes
+        if len(data) >= MIN_COMPRESS_BYTES:
+            compressed = {'gzip': gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(data, quality=11)
+            for encoding, body in compressed.items():
+                if len(body) < len(data):
+                    self.variants[encoding] = body
+
+    def etag(self, encoding):
+        # Each encoding is a different byte stream, so it gets its own ETag
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+    def pick(self, accept_encoding):
+        """(encoding, body): the smallest variant the browser accepts."""
+        accepted = accepted_encodings(accept_encoding)
+        best = 'identity'
+        for encoding, body in self.variants.items():
+            if encoding in accepted and len(body) < len(self.variants[best]):
+                best = encoding
+        return best, self.variants[best]
+
+    def matches(self, if_none_match):
+        """True if If-None-Match names any encoding of this content."""
+        for tag in (if_none_match or '').split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag == '*' or tag.split('-')[0] == self.digest:
+                return True
+        return False
+
+
+class AssetBundle:
+    """Every file of the web UI, hashed, rendered and compressed at startup."""
+
+    def __init__(self, directory, page='index.html'):
+        self.directory = Path(directory)
+        self.page_name = page
+        self._assets = {}  # url name (hashed and plain) -> (Asset, immutable?)
+        self.build()
+
+    def build(self):
+        """(Re)read every file in the directory."""
+        assets = {}
+        urls = {}
+        for path in sorted(self.directory.iterdir()):
+            if not path.is_file() or path.name == self.page_name or path.name.startswith('.'):
+                continue
+            content_type = (CONTENT_TYPES.get(path.suffix)
+                            or mimetypes.guess_type(path.name)[0]
+                            or 'application/octet-stream')
+            asset = Asset(path.name, path.read_bytes(), content_type)
+            assets[asset.url_name] = (asset, True)
+            assets[asset.name] = (asset, False)  # Old links keep working
+            urls[STATIC_PREFIX + asset.name] = STATIC_PREFIX + asset.url_name
+
+        # Render the page once: point it at the hashed names
+        html = (self.directory / self.page_name).read_text(encoding='utf-8')
+        if urls:
+            pattern = re.compile('|'.join(re.escape(url) for url in sorted(urls, key=len, reverse=True)))
+            html = pattern.sub(lambda m: urls[m.group(0)], html)
+        page = Asset(self.page_name, html.encode('utf-8'), CONTENT_TYPES['.html'], hashed=False)
+        assets[self.page_name] = (page, False)
+        self._assets = assets
+
+    def url(self, name):
+        """Public URL of a UI file, e.g. url('app.js') -> /static/app.1a2b3c4d.js"""
+        return STATIC_PREFIX + self._assets[name][0].url_name
+
+    def get(self, name):
+        """The Asset served under this name (hashed or plain), or None."""
+        entry = self._assets.get(name)
+        return entry[0] if entry else None
+
+    def respond(self, name, if_none_match=None, accept_encoding=None):
+        """
+        Framework-independent response for one asset.
+
+        Returns (status, headers, body): 404 for unknown names, 304 if the
+        browser's copy is current, else 200 with the best encoding.
+        """
+        entry = self._assets.get(name)
+        if entry is None:
+            return 404, {'Content-Type': 'text/plain; charset=utf-8'}, b'Not Found'
+        asset, immutable = entry
+        encoding, body = asset.pick(accept_encoding)
+        headers = {
+            'ETag': asset.etag(encoding),
+            'Cache-Control': IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            'Vary': 'Accept-Encoding',
+        }
+        if asset.matches(if_none_match):
+            return 304, headers, b''
+        headers['Content-Type'] = asset.content_type
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return 200, headers, body
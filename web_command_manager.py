@@ -12,15 +12,29 @@ USAGE:
     Run: python3 web_command_manager.py
     Then open browser to: http://localhost:5555
 
+    For many users at once, run it under a production server instead:
+    python3 web_command_manager.py serve --workers 4
+
+    Keep two machines' commands in step (only changed files are sent):
+    python3 web_command_manager.py sync http://other-machine:5555
+
+    One server for a whole team: every API path also works per namespace,
+    each with its own commands directory - e.g. /api/design-team/commands
+    (see command_tenants.py; GET /api/namespaces lists them)
+
+    Request counts, latencies and disk I/O (Prometheus format):
+    http://localhost:5555/metrics
+
 HOW IT WORKS:
     1. Runs a simple web server (Flask) on your computer
-    2. Serves an HTML page with forms for creating commands
+    2. Serves an HTML page with forms for creating commands (web_ui/)
     3. When you submit the form, it creates a .md file in .claude/commands/
     4. Claude reads these .md files and responds to the phrases you define
 
 REQUIREMENTS:
     - Python 3.6+
     - Flask (install with: pip3 install flask)
+    - brotli (optional, smaller page downloads: pip3 install brotli)
 
 CREATED BY: AI collaboration between OCC and TCC
 DATE: 2025-11-19
@@ -28,355 +42,209 @@ DATE: 2025-11-19
 """
 
 # Import required libraries
-from flask import Flask, render_template_string, request, jsonify  # Web framework
+from flask import Flask, g, has_request_context, request, jsonify  # Web framework
 from pathlib import Path  # Modern file path handling (better than os.path)
-import json  # For reading/writing JSON data
+from bisect import bisect_right  # Fast "first item after X" lookups in sorted lists
+from datetime import datetime, timezone  # Last-Modified header values
+import argparse  # Command line options (serve / import / export / sync)
+import os  # Environment variable settings
+import sys  # Exit codes and stdin/stdout for the command line tools
+from command_frontmatter import FIELDS, DEFAULT_FIELDS, command_filename  # Command format helpers
+from command_storage import CommandExists  # A create that would overwrite a command
+from command_store import CommandStore  # Commands on disk, cached in memory
+from command_bulk import CONTENT_TYPES, FORMATS, BulkError, detect_format  # Batch import/export formats
+from command_matcher import DEFAULT_MIN_SCORE, normalize_phrase  # Phrase -> command lookup
+from command_events import KEEPALIVE, RETRY_MS  # Live change stream for open pages
+from command_sync import (BATCH_CONTENT_TYPE, SyncError,  # Delta sync with other machines
+                          add_arguments as add_sync_arguments, sync_command)
+from command_tenants import (NAMESPACES_DIR, NamespaceError,  # Per-team namespaces
+                             Tenant, TenantPool, UnknownNamespace)
+import command_metrics  # Counters and timings served at /metrics
+from web_assets import AssetBundle  # Hashed, precompressed UI files
 
 # Create the Flask web application instance
 # Flask is a lightweight web framework - it handles HTTP requests and responses
-app = Flask(__name__)
+# (static_folder=None: /static/ is served from the asset bundle instead)
+app = Flask(__name__, static_folder=None)
 
 # ============================================================================
 # CONFIGURATION: Where command files are stored
 # ============================================================================
 
-# Define where command files live on the filesystem
-# Path.home() gets the user's home directory (e.g., /home/username or C:\Users\username)
-# We then append the subdirectories to create the full path
-COMMANDS_DIR = Path.home() / "AI-Collaboration-Management" / ".claude" / "commands"
+# The command store (command_store.py, shared with the desktop GUI) owns
+# the commands directory: ~/AI-Collaboration-Management/.claude/commands,
+# or $AI_COMMANDS_DIR. It is created if it doesn't exist yet.
+#
+# Every write and delete goes through it: files are written to a temp file
+# and renamed into place, so nobody ever sees half a file.
+# Set AI_COMMANDS_JOURNAL=1 to batch fsyncs through a write-ahead journal
+# (faster with many concurrent writers; replayed on startup after a crash).
+# Set AI_COMMANDS_DEDUP=1 to store each distinct action body only once
+# (command files then refer to it by hash; see command_blobs.py).
+USE_WRITE_JOURNAL = os.environ.get('AI_COMMANDS_JOURNAL', '') == '1'
+STORE = CommandStore(journal=USE_WRITE_JOURNAL)
+COMMANDS_DIR = STORE.directory
+STORAGE = STORE.storage
+
+# Everything kept in memory for these commands (see Tenant in command_tenants.py):
+DEFAULT_TENANT = Tenant(None, STORE)
+
+# Process-wide index of parsed commands, built once at startup.
+# Later requests only re-parse files whose mtime/size changed since the
+# last look, so listing commands is answered from memory.
+COMMAND_INDEX = DEFAULT_TENANT.index
+
+# Compiled alias lookup tables, kept in step with the index: when a command
+# is created, edited or deleted only that command's aliases are updated
+MATCHER = DEFAULT_TENANT.matcher
+
+# Full-text index over phrases, descriptions and actions for /api/search.
+# Command bodies are read once - by serve(), or else on the first search -
+# then only changed commands are re-indexed. Nothing is started at import:
+# gunicorn forks workers from the imported app
+SEARCH = DEFAULT_TENANT.search
+
+# Every change the index sees is pushed to open pages through
+# GET /api/commands/events, so they patch their list in place
+CHANGE_FEED = DEFAULT_TENANT.feed
+
+# Other machines sync with this one through /api/sync/* (see command_sync.py):
+# they compare hash trees and exchange only the commands that differ
+SYNC = DEFAULT_TENANT.sync
+
+# Separate command sets for a team, one per namespace: /api/<namespace>/commands,
+# /api/<namespace>/match, ... Each is a directory under NAMESPACES_DIR
+# ($AI_COMMANDS_NAMESPACES_DIR), loaded on its first request and dropped again,
+# least recently used first, beyond $AI_COMMANDS_NAMESPACE_MEMORY_MB (256) or
+# $AI_COMMANDS_MAX_NAMESPACES (200) loaded at once - per process. A namespace
+# is created by its first write. See command_tenants.py
+NAMESPACES = TenantPool(NAMESPACES_DIR, dedup=STORE.dedup)
+
+# Open event streams allowed at once (None = no limit). Each stream holds
+# a server thread, so serve() lowers this to leave threads for requests.
+EVENT_STREAM_LIMIT = None
+
+# While an event stream is idle, re-check the directory for outside edits
+# (other server workers, text editors) this often, in seconds
+EVENTS_RESCAN_INTERVAL = 1.0
+
+# Idle event streams get a keepalive comment this often, in seconds
+EVENTS_KEEPALIVE_INTERVAL = 15.0
+
+# Largest page GET /api/commands will return when paginating
+MAX_PAGE_SIZE = 1000
+
+# Largest page of /api/search results
+MAX_SEARCH_RESULTS = 100
+
+# /api/match and /api/search re-check the directory for outside edits at
+# most this often (in seconds) so lookups stay fast
+MATCH_RESCAN_INTERVAL = 1.0
+
+# ============================================================================
+# USER INTERFACE: The page, styles and script (what you see in browser)
+# ============================================================================
 
-# Create the directory if it doesn't exist yet
-# parents=True means "create parent directories if needed"
-# exist_ok=True means "don't error if directory already exists"
-COMMANDS_DIR.mkdir(parents=True, exist_ok=True)
+# The interface lives in web_ui/ (index.html, app.css, app.js). It is read,
+# content-hashed and compressed once at startup; see web_assets.py
+UI_DIR = Path(__file__).resolve().parent / "web_ui"
+ASSETS = AssetBundle(UI_DIR)
 
 # ============================================================================
-# HTML TEMPLATE: The user interface (what you see in browser)
+# INSTRUMENTATION: Request timings and counters, served at GET /metrics
 # ============================================================================
 
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>AI Command Manager</title>
-    <style>
-        /* CSS STYLING: Makes the page look pretty and professional */
-
-        /* Reset default browser styles for consistency */
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-
-        /* Body: Full-screen purple gradient background */
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;  /* Full viewport height */
-            padding: 20px;
-        }
+# Numbers read from the live objects whenever /metrics is scraped
+command_metrics.gauge('ai_commands_commands', 'Commands in the index.',
+                      function=lambda: len(COMMAND_INDEX))
+command_metrics.gauge('ai_commands_search_documents', 'Commands in the full-text search index.',
+                      function=lambda: len(SEARCH))
+command_metrics.gauge('ai_commands_event_streams', 'Open live-update streams.',
+                      function=lambda: CHANGE_FEED.streams)
+command_metrics.gauge('ai_commands_namespaces_loaded', 'Namespaces held in memory.',
+                      function=NAMESPACES.loaded)
+command_metrics.gauge('ai_commands_namespaces_memory_bytes',
+                      'Estimated memory held by loaded namespaces (see command_tenants.py).',
+                      function=NAMESPACES.memory)
+
+# Set AI_COMMANDS_PROFILE_MS=250 to profile every request and keep the
+# cProfile output of those taking 250 ms or more, in
+# $AI_COMMANDS_PROFILE_DIR (default ./command-profiles)
+PROFILER = command_metrics.RequestProfiler.from_environment()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = command_metrics.request_started()
+    g.profile = PROFILER.start() if PROFILER is not None else None
+
+
+@app.after_request
+def record_request(response):
+    """Time and count every request, by route pattern (not raw URL)."""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        elapsed = command_metrics.request_finished(started, request.method, route,
+                                                   response.status_code)
+        if PROFILER is not None:
+            PROFILER.finish(g.pop('profile', None), elapsed, request.method, route)
+    return response
+
+
+@app.teardown_request
+def release_request_timer(error=None):
+    # Only reached with the timer still set if the response was never
+    # built; keep the in-flight gauge honest
+    if g.pop('request_started', None) is not None:
+        command_metrics.HTTP_IN_FLIGHT.dec()
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.disable()
+
+
+@app.teardown_request
+def release_tenants(error=None):
+    # Namespaces this request used can be evicted again (see tenant_for())
+    for tenant in g.pop('tenants', ()):
+        NAMESPACES.release(tenant)
 
-        /* Main container: White card in center of screen */
-        .container {
-            max-width: 1200px;  /* Don't get too wide on large screens */
-            margin: 0 auto;  /* Center horizontally */
-            background: white;
-            border-radius: 20px;  /* Rounded corners */
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);  /* Drop shadow */
-            overflow: hidden;  /* Clip children to rounded corners */
-        }
 
-        /* Header: Purple bar at top */
-        .header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }
-        .header h1 { font-size: 2em; margin-bottom: 10px; }
-        .header p { opacity: 0.9; font-size: 1.1em; }
-
-        /* Content: Two-column layout (create form on left, command list on right) */
-        .content { display: grid; grid-template-columns: 1fr 1fr; gap: 30px; padding: 30px; }
-
-        /* Panel: Gray boxes containing form and list */
-        .panel {
-            background: #f8f9fa;
-            padding: 25px;
-            border-radius: 15px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }
-        .panel h2 {
-            color: #667eea;
-            margin-bottom: 20px;
-            font-size: 1.5em;
-        }
+# ============================================================================
+# API ROUTES: These functions handle HTTP requests from the browser
+# ============================================================================
 
-        /* Form elements: Input fields and text areas */
-        .form-group { margin-bottom: 20px; }
-        label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #333;
-        }
-        input, textarea {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #e0e0e0;
-            border-radius: 8px;
-            font-size: 1em;
-            transition: border-color 0.3s;  /* Smooth color change on focus */
-        }
-        input:focus, textarea:focus {
-            outline: none;  /* Remove default browser outline */
-            border-color: #667eea;  /* Purple border when focused */
-        }
-        textarea { resize: vertical; min-height: 120px; font-family: monospace; }
-
-        /* Button: Large purple gradient button */
-        button {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            padding: 15px 30px;
-            border-radius: 8px;
-            font-size: 1.1em;
-            font-weight: 600;
-            cursor: pointer;
-            width: 100%;
-            transition: transform 0.2s, box-shadow 0.2s;  /* Smooth hover animation */
-        }
-        button:hover {
-            transform: translateY(-2px);  /* Lift up slightly */
-            box-shadow: 0 6px 20px rgba(102, 126, 234, 0.4);  /* Add shadow */
-        }
-        button:active { transform: translateY(0); }  /* Press down when clicked */
-
-        /* Command list: Scrollable area showing existing commands */
-        .command-list {
-            max-height: 400px;
-            overflow-y: auto;  /* Scroll if list gets long */
-            border: 2px solid #e0e0e0;
-            border-radius: 8px;
-            padding: 10px;
-        }
+# Every /api/... route below also answers as /api/<namespace>/..., for that
+# namespace's commands instead of the default ones
 
-        /* Individual command items in the list */
-        .command-item {
-            padding: 15px;
-            margin-bottom: 10px;
-            background: white;
-            border-radius: 8px;
-            border-left: 4px solid #667eea;  /* Purple accent bar */
-            cursor: pointer;
-            transition: transform 0.2s, box-shadow 0.2s;
-        }
-        .command-item:hover {
-            transform: translateX(5px);  /* Slide right on hover */
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-        }
-        .command-item h3 { color: #667eea; margin-bottom: 5px; }
-        .command-item p { color: #666; font-size: 0.9em; }
-
-        /* Delete button: Red button inside command items */
-        .delete-btn {
-            background: #ef4444;
-            padding: 8px 15px;
-            font-size: 0.9em;
-            width: auto;
-            margin-top: 10px;
-        }
-        .delete-btn:hover { background: #dc2626; }
-
-        /* Success notification: Green popup in top-right corner */
-        .success {
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background: #10b981;
-            color: white;
-            padding: 15px 25px;
-            border-radius: 8px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.2);
-            display: none;  /* Hidden by default */
-            animation: slideIn 0.3s;  /* Slide in from right */
-        }
 
-        /* Animation: Slide notification in from right */
-        @keyframes slideIn {
-            from { transform: translateX(400px); opacity: 0; }
-            to { transform: translateX(0); opacity: 1; }
-        }
+def tenant_for(namespace, create=False):
+    """
+    The commands a request is about: the default ones (namespace None) or
+    a namespace's, loaded on demand. Writes pass create=True so a new
+    namespace starts with its first command; other requests for a namespace
+    that doesn't exist get 404 (see the error handlers below).
 
-        /* Responsive: Stack columns on small screens (phones/tablets) */
-        @media (max-width: 768px) {
-            .content { grid-template-columns: 1fr; }
-        }
-    </style>
-</head>
-<body>
-    <!-- MAIN CONTAINER -->
-    <div class="container">
-        <!-- HEADER: Title and description -->
-        <div class="header">
-            <h1>🎯 AI Command Manager</h1>
-            <p>Create voice commands - no code, no terminal required</p>
-        </div>
-
-        <!-- CONTENT: Two-panel layout -->
-        <div class="content">
-            <!-- LEFT PANEL: Form for creating new commands -->
-            <div class="panel">
-                <h2>Create New Command</h2>
-                <form id="commandForm">
-                    <!-- Field 1: The phrase you want to say -->
-                    <div class="form-group">
-                        <label>What phrase to say:</label>
-                        <input type="text" id="phrase" placeholder="e.g., shit's ready" required>
-                    </div>
-
-                    <!-- Field 2: What the command should do (script or instructions) -->
-                    <div class="form-group">
-                        <label>What it should do:</label>
-                        <textarea id="action" placeholder="e.g., ./verify_test.sh&#10;&#10;or&#10;&#10;Run all tests and report results" required></textarea>
-                    </div>
-
-                    <!-- Field 3: Description (optional) -->
-                    <div class="form-group">
-                        <label>Description (optional):</label>
-                        <input type="text" id="description" placeholder="e.g., Verify framework test">
-                    </div>
-
-                    <!-- Field 4: Alternative phrases that trigger same command -->
-                    <div class="form-group">
-                        <label>Additional phrases (comma separated):</label>
-                        <input type="text" id="aliases" placeholder="e.g., check it, verify this, test ready">
-                    </div>
-
-                    <!-- Submit button -->
-                    <button type="submit">CREATE COMMAND</button>
-                </form>
-            </div>
-
-            <!-- RIGHT PANEL: List of existing commands -->
-            <div class="panel">
-                <h2>Your Commands</h2>
-                <div class="command-list" id="commandList">
-                    <p style="text-align: center; color: #999;">Loading...</p>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <!-- SUCCESS NOTIFICATION: Appears in top-right when command created/deleted -->
-    <div class="success" id="successMsg"></div>
-
-    <script>
-        /* ===================================================================
-           JAVASCRIPT: Makes the page interactive
-           =================================================================== */
-
-        /**
-         * Show success notification in top-right corner
-         * @param {string} msg - Message to display
-         */
-        function showSuccess(msg) {
-            const el = document.getElementById('successMsg');
-            el.textContent = msg;
-            el.style.display = 'block';  // Make visible
-            // Auto-hide after 3 seconds
-            setTimeout(() => el.style.display = 'none', 3000);
-        }
+    A namespace stays in use (never evicted) until the request ends. The
+    command line has no request: it exits instead.
+    """
+    if namespace is None:
+        return DEFAULT_TENANT
+    tenant = NAMESPACES.get(namespace, create=create)
+    if has_request_context():
+        g.setdefault('tenants', []).append(tenant)
+    return tenant
 
-        /**
-         * Load all existing commands from server and display them
-         * This function:
-         * 1. Calls the /api/commands endpoint
-         * 2. Gets back a JSON array of commands
-         * 3. Builds HTML for each command
-         * 4. Inserts into the command list
-         */
-        function loadCommands() {
-            // Fetch data from server API endpoint
-            fetch('/api/commands')
-                .then(r => r.json())  // Parse JSON response
-                .then(commands => {
-                    const list = document.getElementById('commandList');
-
-                    // If no commands exist, show helpful message
-                    if (commands.length === 0) {
-                        list.innerHTML = '<p style="text-align: center; color: #999;">No commands yet. Create one!</p>';
-                        return;
-                    }
-
-                    // Build HTML for each command using template literals
-                    // .map() transforms array into HTML strings
-                    // .join('') combines into single HTML string
-                    list.innerHTML = commands.map(cmd => `
-                        <div class="command-item">
-                            <h3>"${cmd.phrase}"</h3>
-                            <p>${cmd.description}</p>
-                            <button class="delete-btn" onclick="deleteCommand('${cmd.filename}')">Delete</button>
-                        </div>
-                    `).join('');
-                });
-        }
 
-        /**
-         * Handle form submission (create new command)
-         * This prevents default form behavior and instead sends data via AJAX
-         */
-        document.getElementById('commandForm').addEventListener('submit', (e) => {
-            e.preventDefault();  // Stop form from reloading page
-
-            // Collect form data into object
-            const data = {
-                phrase: document.getElementById('phrase').value,
-                action: document.getElementById('action').value,
-                description: document.getElementById('description').value,
-                aliases: document.getElementById('aliases').value
-            };
-
-            // Send POST request to server with JSON data
-            fetch('/api/commands', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify(data)
-            })
-            .then(r => r.json())  // Parse response
-            .then(result => {
-                // Success! Show notification and refresh
-                showSuccess(`Command created! Say: "${data.phrase}"`);
-                document.getElementById('commandForm').reset();  // Clear form
-                loadCommands();  // Reload command list
-            })
-            .catch(err => alert('Error creating command'));
-        });
-
-        /**
-         * Delete a command
-         * @param {string} filename - Name of command file (without .md extension)
-         */
-        function deleteCommand(filename) {
-            // Confirm before deleting
-            if (!confirm('Delete this command?')) return;
-
-            // Send DELETE request to server
-            fetch(`/api/commands/${filename}`, {method: 'DELETE'})
-                .then(() => {
-                    showSuccess('Command deleted');
-                    loadCommands();  // Refresh list
-                });
-        }
+@app.errorhandler(NamespaceError)
+def bad_namespace(error):
+    return jsonify({'success': False, 'error': str(error)}), 400
 
-        // On page load, immediately load existing commands
-        loadCommands();
-    </script>
-</body>
-</html>
-"""
 
-# ============================================================================
-# API ROUTES: These functions handle HTTP requests from the browser
-# ============================================================================
+@app.errorhandler(UnknownNamespace)
+def unknown_namespace(error):
+    return jsonify({'success': False, 'error': str(error)}), 404
+
 
 @app.route('/')
 def index():
@@ -384,22 +252,91 @@ def index():
     HOME PAGE: Serves the main HTML interface
 
     When you visit http://localhost:5555, this function runs and returns
-    the HTML template defined above.
+    web_ui/index.html, pre-rendered at startup. A browser that already has
+    it gets an empty 304 reply.
     """
-    return render_template_string(HTML_TEMPLATE)
+    return asset_response(ASSETS.page_name)
+
+
+@app.route('/static/<name>')
+def static_asset(name):
+    """
+    STYLES AND SCRIPT: Serves the files the page links to
+
+    The page links content-hashed names (app.3f2a91c0.css), which browsers
+    cache for a year - a changed file gets a new name.
+    """
+    return asset_response(name)
+
+
+def asset_response(name):
+    """Flask response for one UI file (compressed and conditional)."""
+    status, headers, body = ASSETS.respond(name, request.headers.get('If-None-Match'),
+                                           request.headers.get('Accept-Encoding'))
+    return app.response_class(body, status=status, headers=headers)
+
+
+def index_etag(fingerprint):
+    """
+    ETag for anything derived from one state of the command index.
+
+    Built from the index fingerprint (a hash of every file's mtime/size),
+    so all server workers agree on it for the same directory contents.
+    """
+    return f"{fingerprint:016x}"
+
+
+def not_modified(etag, changed_at):
+    """
+    Answer a conditional GET without building the response body.
+
+    Returns an empty 304 response if the browser's cached copy (identified
+    by If-None-Match, or else If-Modified-Since) is still current, else None.
+    """
+    last_modified = datetime.fromtimestamp(int(changed_at), tz=timezone.utc)
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        fresh = (request.if_modified_since is not None
+                 and request.if_modified_since >= last_modified)
+    if not fresh:
+        return None
+    response = app.response_class(status=304)
+    return with_cache_headers(response, etag, changed_at)
+
+
+def with_cache_headers(response, etag, changed_at):
+    """Attach validators so the next poll can be a cheap conditional request."""
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(int(changed_at), tz=timezone.utc)
+    # Cache, but always revalidate - the list can change at any time
+    response.cache_control.no_cache = True
+    return response
 
 
 @app.route('/api/commands', methods=['GET'])
-def get_commands():
+@app.route('/api/<namespace>/commands', methods=['GET'])
+def get_commands(namespace=None):
     """
     GET ALL COMMANDS: Returns list of existing commands as JSON
 
     This function:
-    1. Reads all .md files from the commands directory
-    2. Parses each file to extract the phrase and description
-    3. Returns them as JSON array
-
-    RESPONSE FORMAT:
+    1. Asks the command index for the current commands
+       (only files changed since the last request are re-read)
+    2. Answers 304 Not Modified if the browser already has this version
+    3. Otherwise filters, pages and returns them, sorted by filename
+
+    Query parameters (all optional):
+        q: Only commands whose filename, phrase, description or aliases
+           contain this text (case-insensitive)
+        fields: Comma-separated fields to return
+                (filename, phrase, description, aliases)
+        limit: Page size - turns on pagination (max 1000)
+        cursor: Where the next page starts (next_cursor from the last page)
+        offset: Or: how many matching commands to skip (for jumping
+                straight to a scroll position; ignored with cursor)
+
+    RESPONSE FORMAT (no limit):
     [
         {
             "filename": "shits-ready",
@@ -408,121 +345,244 @@ def get_commands():
         },
         ...
     ]
+
+    RESPONSE FORMAT (with limit):
+    {
+        "commands": [...],
+        "total": 120,          <- matching commands across all pages
+        "next_cursor": "..."   <- null on the last page
+    }
+
+    Every response carries an ETag and Last-Modified header. Sending them
+    back (If-None-Match / If-Modified-Since) gets an empty 304 reply while
+    nothing has changed.
     """
-    commands = []
-
-    # Loop through all .md files in commands directory
-    # .glob("*.md") finds all files ending in .md
-    for filepath in COMMANDS_DIR.glob("*.md"):
-        # Read entire file contents as string
-        content = filepath.read_text()
-        lines = content.split('\n')  # Split into individual lines
-
-        # Default values if we can't parse the file
-        desc = "Custom command"
-        phrase = filepath.stem.replace('-', ' ')  # Convert filename to phrase
-
-        # Parse the YAML frontmatter (lines between --- and ---)
-        for line in lines:
-            # Look for description field
-            if line.startswith('description:'):
-                desc = line.split(':', 1)[1].strip()  # Get everything after ':'
-
-            # Look for aliases field (JSON array)
-            elif line.startswith('aliases:'):
-                try:
-                    # Extract JSON array and parse it
-                    aliases = json.loads(line.split(':', 1)[1].strip())
-                    # Use first alias as the main phrase
-                    if aliases:
-                        phrase = aliases[0]
-                except:
-                    # If parsing fails, just use filename
-                    pass
-
-        # Add this command to the list
-        commands.append({
-            'filename': filepath.stem,  # Filename without extension
-            'phrase': phrase,
-            'description': desc
-        })
+    # The index stats each file and only re-parses those that changed
+    # (including edits made outside this app); everything else comes
+    # straight from memory
+    fingerprint, changed_at, commands = tenant_for(namespace).index.snapshot()
+
+    etag = index_etag(fingerprint)
+    cached = not_modified(etag, changed_at)
+    if cached is not None:
+        return cached
+
+    payload, status = list_commands(commands, request.args)
+    return with_cache_headers(jsonify(payload), etag, changed_at), status
+
 
-    # Return as JSON (Flask converts Python dict/list to JSON automatically)
-    return jsonify(commands)
+def int_arg(args, name, default=None):
+    """Read an integer query parameter; default if missing or not a number."""
+    try:
+        return int(args.get(name))
+    except (TypeError, ValueError):
+        return default
+
+
+def list_commands(commands, args):
+    """
+    Filter, select fields and paginate for GET /api/commands.
+
+    Framework-independent so the async server can share it.
+    Returns (payload, HTTP status).
+    """
+    fields = DEFAULT_FIELDS
+    if args.get('fields'):
+        fields = tuple(f.strip() for f in args['fields'].split(',') if f.strip())
+        unknown = [f for f in fields if f not in FIELDS]
+        if unknown or not fields:
+            return {'success': False, 'error': f"Unknown fields: {', '.join(unknown)}"}, 400
+    limit = int_arg(args, 'limit')
+    cursor = args.get('cursor', '')
+    offset = max(int_arg(args, 'offset', 0), 0)
+    query = args.get('q', '').strip().lower()
+
+    if query:
+        commands = [cmd for cmd in commands if matches_filter(cmd, query)]
+
+    if limit is None:
+        return [cmd.to_dict(fields) for cmd in commands], 200
+
+    # Pages are cut from the filename-sorted list; the cursor is the last
+    # filename of the previous page, so pages stay stable when commands
+    # are added or deleted between requests. An offset can jump anywhere
+    # (the page's virtual list scrolls that way) but may shift on changes.
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    start = bisect_right([cmd.filename for cmd in commands], cursor) if cursor else offset
+    page = commands[start:start + limit]
+    more = start + limit < len(commands)
+    return {
+        'commands': [cmd.to_dict(fields) for cmd in page],
+        'total': len(commands),
+        'next_cursor': page[-1].filename if more else None,
+    }, 200
+
+
+def matches_filter(cmd, query):
+    """True if the lowercase query appears in any of the command's text fields."""
+    if query in cmd.filename or query in cmd.phrase.lower() or query in cmd.description.lower():
+        return True
+    return any(query in alias.lower() for alias in cmd.aliases)
 
 
 @app.route('/api/commands', methods=['POST'])
-def create_command():
+@app.route('/api/<namespace>/commands', methods=['POST'])
+def create_command(namespace=None):
     """
     CREATE COMMAND: Handles command creation requests
 
     This function:
     1. Receives JSON data from the form
     2. Validates and processes the data
-    3. Creates a .md file with the command definition
-    4. Returns success response
+    3. Creates a .md file with the command definition (crash-safe write)
+    4. Returns success response - or 409 Conflict if a command with the
+       same filename already exists and "overwrite" wasn't set, so two
+       people saving the same phrase can't silently replace each other
 
     REQUEST FORMAT:
     {
         "phrase": "shit's ready",
         "action": "./verify_test.sh",
         "description": "Verify framework test",
-        "aliases": "check it, verify this"
+        "aliases": "check it, verify this",
+        "overwrite": false
     }
     """
     # Get JSON data sent from browser
-    data = request.json
+    data = request.get_json(silent=True) or {}
+    payload, status = create_from_form(data, tenant_for(namespace, create=True))
+    return jsonify(payload), status
 
-    # Extract fields and remove whitespace
-    phrase = data['phrase'].strip()
-    action = data['action'].strip()
-    desc = data.get('description', 'Custom command').strip()
-    aliases = data.get('aliases', '').strip()
-
-    # Build list of all phrases (main phrase + additional aliases)
-    all_phrases = [phrase]
-    if aliases:
-        # Split by comma, strip whitespace, filter empty strings
-        all_phrases.extend([a.strip() for a in aliases.split(',') if a.strip()])
-
-    # Generate filename from phrase:
-    # 1. Convert to lowercase
-    # 2. Remove apostrophes
-    # 3. Replace spaces with hyphens
-    # 4. Keep only letters, numbers, and hyphens
-    filename = phrase.lower().replace("'", "").replace(" ", "-")
-    filename = ''.join(c for c in filename if c.isalnum() or c == '-')
-
-    # Build full filepath
-    filepath = COMMANDS_DIR / f"{filename}.md"
-
-    # Create command file contents in YAML frontmatter + markdown format
-    # This is the format Claude expects
-    content = f"""---
-description: {desc}
-aliases: {json.dumps(all_phrases)}
----
-
-{action}
-"""
 
-    # Write file to disk
-    filepath.write_text(content)
+def create_from_form(data, tenant=None):
+    """
+    Validate the create form and write the command file
+    (into tenant's commands; default: the default ones).
+
+    Framework-independent so the async server can share it.
+    Returns (payload, HTTP status).
+    """
+    tenant = tenant or DEFAULT_TENANT
+    if not isinstance(data, dict):
+        return {'success': False, 'error': 'Expected a JSON object'}, 400
+    # Extract fields and remove whitespace
+    phrase = str(data.get('phrase') or '').strip()
+    action = str(data.get('action') or '').strip()
+    desc = str(data.get('description') or 'Custom command').strip()
+    aliases = data.get('aliases') or ''
+    overwrite = bool(data.get('overwrite', False))
+
+    if not phrase or not action:
+        return {'success': False, 'error': 'phrase and action are required'}, 400
+
+    # The store builds the filename from the phrase ("Shit's ready" ->
+    # "shits-ready"), writes the file crash-safely and updates the index
+    # for just this file (no full directory rescan)
+    try:
+        filename = tenant.store.create(phrase, action, desc, aliases, overwrite=overwrite)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    except CommandExists:
+        return {'success': False, 'error': 'exists', 'filename': command_filename(phrase)}, 409
 
     # Return success response
-    return jsonify({'success': True, 'filename': filename})
+    return {'success': True, 'filename': filename}, 200
+
+
+@app.route('/api/commands/bulk', methods=['POST'])
+@app.route('/api/<namespace>/commands/bulk', methods=['POST'])
+def bulk_import(namespace=None):
+    """
+    BULK IMPORT: Creates many commands in one request
+
+    The request body is the whole batch, in one of these formats (picked
+    from the Content-Type header, or ?format=...):
+        application/x-ndjson - one JSON command per line (same fields as
+                               the create form)
+        application/json     - a JSON array of those commands
+        application/gzip     - a .tar.gz of .md command files (or plain tar)
+        application/zip      - a .zip of .md command files
+
+    The batch is validated before anything is written. If any item is
+    invalid nothing is written, unless ?partial=1 is given, in which case
+    the valid items are still imported. The command index is updated once
+    for the whole batch.
+
+    Commands that already exist are not replaced: those items fail with
+    "status": 409 and the rest are still imported (207 Multi-Status).
+    With ?overwrite=1 they are replaced and counted as "updated".
+
+    RESPONSE FORMAT:
+    {
+        "success": true,
+        "created": 2,
+        "updated": 0,
+        "failed": 0,
+        "results": [{"index": 0, "filename": "shits-ready", "success": true,
+                     "status": 201}, ...]
+    }
+    """
+    fmt = request.args.get('format') or detect_format(request.content_type)
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f'Unknown format: {fmt}'}), 400
+    partial = request.args.get('partial', '') in ('1', 'true', 'yes')
+    overwrite = request.args.get('overwrite', '') in ('1', 'true', 'yes')
+    tenant = tenant_for(namespace, create=True)
+
+    try:
+        result = tenant.store.import_bundle(request.get_data(), fmt, partial=partial,
+                                            overwrite=overwrite)
+    except BulkError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify(result), import_status(result)
+
+
+def import_status(result):
+    """HTTP status for a bulk import report: 207 Multi-Status if only some made it in."""
+    if result['success']:
+        return 200
+    if result['created'] or result['updated']:
+        return 207
+    return 400
+
+
+@app.route('/api/commands/export', methods=['GET'])
+@app.route('/api/<namespace>/commands/export', methods=['GET'])
+def bulk_export(namespace=None):
+    """
+    BULK EXPORT: Downloads every command (or those matching ?q=) at once
+
+    ?format= ndjson (default), json, tar or zip. The result can be fed
+    straight back into POST /api/commands/bulk on another machine.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f'Unknown format: {fmt}'}), 400
+    query = request.args.get('q', '').strip().lower()
+    tenant = tenant_for(namespace)
+
+    commands = tenant.index.commands()
+    if query:
+        commands = [cmd for cmd in commands if matches_filter(cmd, query)]
+
+    extension = 'tar.gz' if fmt == 'tar' else fmt
+    response = app.response_class(tenant.store.export_bundle(commands, fmt),
+                                  mimetype=CONTENT_TYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=commands.{extension}'
+    return response
 
 
 @app.route('/api/commands/<filename>', methods=['DELETE'])
-def delete_command(filename):
+@app.route('/api/<namespace>/commands/<filename>', methods=['DELETE'])
+def delete_command(filename, namespace=None):
     """
     DELETE COMMAND: Removes a command file
 
     This function:
     1. Receives filename from URL (e.g., /api/commands/shits-ready)
-    2. Checks if file exists
-    3. Deletes the file
-    4. Returns success/failure response
+    2. Deletes the file if it exists
+    3. Returns success/failure response
 
     Args:
         filename: Name of command file (without .md extension)
@@ -530,34 +590,366 @@ def delete_command(filename):
     Returns:
         JSON response indicating success or failure
     """
-    # Build filepath
-    filepath = COMMANDS_DIR / f"{filename}.md"
-
-    # Check if file exists
-    if filepath.exists():
-        # Delete the file
-        filepath.unlink()
+    # Delete the file if it exists (through the store, so it is ordered
+    # correctly with any concurrent write of the same command)
+    if tenant_for(namespace).store.delete(filename):
         return jsonify({'success': True})
 
     # File doesn't exist - return 404 error
     return jsonify({'success': False}), 404
 
 
+@app.route('/api/commands/events', methods=['GET'])
+@app.route('/api/<namespace>/commands/events', methods=['GET'])
+def command_events(namespace=None):
+    """
+    LIVE CHANGES: Streams command changes to the page (Server-Sent Events)
+
+    This function:
+    1. Sends a "sync" event with the ETag of the current list (or, when the
+       browser reconnects with Last-Event-ID, every change it missed)
+    2. Then sends one "change" event per create/edit/delete - from this
+       page, another browser, a bulk import or a text editor:
+       {"added": [...], "updated": [...], "removed": ["filename"], "etag": "..."}
+    3. Sends a keepalive comment when idle so the connection stays open
+
+    Answers 503 if too many streams are open (each holds a server thread);
+    the page then falls back to refetching the list after each action.
+    (A namespace stays loaded while any page streams its changes.)
+    """
+    tenant = tenant_for(namespace)
+    feed = tenant.feed
+    if not feed.open_stream(EVENT_STREAM_LIMIT):
+        response = jsonify({'success': False, 'error': 'Too many open event streams'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    if namespace is not None:
+        # The request ends before the stream does: hold the namespace until it closes
+        NAMESPACES.get(namespace)
+    seq = feed.resume(request.headers.get('Last-Event-ID'))
+
+    def stream(seq):
+        yield f"retry: {RETRY_MS}\n\n"
+        idle = 0.0
+        while True:
+            messages, seq = feed.messages(seq)
+            if messages:
+                idle = 0.0
+                yield ''.join(messages)
+            elif idle >= EVENTS_KEEPALIVE_INTERVAL:
+                idle = 0.0
+                yield KEEPALIVE  # Also how we notice the browser went away
+            # Pick up edits made outside this process, at most once per
+            # interval however many streams are open
+            tenant.index.refresh(max_age=EVENTS_RESCAN_INTERVAL)
+            if not feed.wait(seq, EVENTS_RESCAN_INTERVAL):
+                idle += EVENTS_RESCAN_INTERVAL
+
+    response = app.response_class(stream(seq), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let nginx hold events back
+    response.call_on_close(feed.close_stream)
+    if namespace is not None:
+        response.call_on_close(lambda: NAMESPACES.release(tenant))
+    return response
+
+
+@app.route('/api/match', methods=['GET'])
+@app.route('/api/<namespace>/match', methods=['GET'])
+def match_command(namespace=None):
+    """
+    MATCH PHRASE: Finds the command(s) a spoken phrase refers to
+
+    Query parameters:
+        q: The phrase to look up (e.g. "ok shit's ready now")
+        limit: Maximum number of matches (default 10)
+        mode: "phrase" (default) or "fuzzy"
+        min_score: Lowest fuzzy similarity to return, 0-1 (default 0.4)
+
+    In phrase mode, matches are ordered best first:
+        exact    - the phrase is one of the command's aliases
+        contains - one of the command's aliases appears inside the phrase
+        prefix   - the phrase is the start of one of the command's aliases
+
+    In fuzzy mode, aliases are ranked by how similar they look to the
+    phrase (for transcription slips like "shits reddy"), with a score.
+
+    RESPONSE FORMAT:
+    {
+        "query": "ok shit's ready now",
+        "normalized": "ok shits ready now",
+        "matches": [
+            {"filename": "shits-ready", "phrase": "shit's ready",
+             "alias": "shit's ready", "kind": "contains", "score": 1.0}
+        ]
+    }
+    """
+    payload, status = match_phrase(request.args, tenant_for(namespace))
+    return jsonify(payload), status
+
+
+def match_phrase(args, tenant=None):
+    """
+    Look up ?q= in the phrase matcher for GET /api/match
+    (tenant's matcher; default: the default commands').
+
+    Framework-independent so the async server can share it.
+    Returns (payload, HTTP status).
+    """
+    query = args.get('q', '').strip()
+    if not query:
+        return {'success': False, 'error': 'Missing q parameter'}, 400
+    limit = max(1, min(int_arg(args, 'limit', 10), 100))
+    mode = args.get('mode', 'phrase')
+    if mode not in ('phrase', 'fuzzy'):
+        return {'success': False, 'error': f'Unknown mode: {mode}'}, 400
+    tenant = tenant or DEFAULT_TENANT
+
+    # Pick up commands edited outside this app, but not on every keystroke
+    tenant.index.refresh(max_age=MATCH_RESCAN_INTERVAL)
+
+    if mode == 'fuzzy':
+        try:
+            min_score = float(args.get('min_score', DEFAULT_MIN_SCORE))
+        except ValueError:
+            min_score = DEFAULT_MIN_SCORE
+        found = tenant.matcher.fuzzy(query, limit=limit, min_score=min_score)
+    else:
+        found = tenant.matcher.match(query, limit=limit)
+
+    matches = []
+    for m in found:
+        cmd = tenant.index.get(m.filename)
+        matches.append({
+            'filename': m.filename,
+            'phrase': cmd.phrase if cmd else m.alias,
+            'alias': m.alias,
+            'kind': m.kind,
+            'score': m.score,
+        })
+
+    return {
+        'query': query,
+        'normalized': normalize_phrase(query),
+        'matches': matches,
+    }, 200
+
+
+@app.route('/api/search', methods=['GET'])
+@app.route('/api/<namespace>/search', methods=['GET'])
+def search_command(namespace=None):
+    """
+    SEARCH: Finds commands by their phrases, description or action
+
+    Query parameters:
+        q: Words to look for (e.g. "runs verify_test.sh"). A word ending in
+           * - and the last word, unless q ends in a space - also matches
+           longer words starting with it ("verif" finds "verify")
+        limit: Results per page (default 20, at most 100)
+        offset: Results to skip, for paging
+
+    Results are ranked best first (BM25: rare words and matches in short
+    commands count more). Each has a snippet of the field that matched,
+    with highlights as [start, end] character offsets into the snippet.
+
+    RESPONSE FORMAT:
+    {
+        "query": "verify_test",
+        "total": 1,
+        "results": [
+            {"filename": "shits-ready", "phrase": "shit's ready",
+             "description": "Verify framework test", "score": 7.12,
+             "field": "body", "snippet": "./verify_test.sh",
+             "highlights": [[2, 8], [9, 13]]}
+        ]
+    }
+    """
+    payload, status = search_commands(request.args, tenant_for(namespace))
+    return jsonify(payload), status
+
+
+def search_commands(args, tenant=None):
+    """
+    Run ?q= through the full-text index for GET /api/search
+    (tenant's index; default: the default commands').
+
+    Framework-independent so the async server can share it.
+    Returns (payload, HTTP status).
+    """
+    query = args.get('q', '')
+    if not query.strip():
+        return {'success': False, 'error': 'Missing q parameter'}, 400
+    limit = max(1, min(int_arg(args, 'limit', 20), MAX_SEARCH_RESULTS))
+    offset = max(0, int_arg(args, 'offset', 0))
+    tenant = tenant or DEFAULT_TENANT
+
+    # Pick up commands edited outside this app, but not on every keystroke
+    tenant.index.refresh(max_age=MATCH_RESCAN_INTERVAL)
+
+    total, hits = tenant.search.search(query, limit=limit, offset=offset)
+    results = []
+    for hit in hits:
+        cmd = tenant.index.get(hit.filename)
+        if cmd is None:
+            continue  # Deleted a moment ago
+        results.append({
+            'filename': hit.filename,
+            'phrase': cmd.phrase,
+            'description': cmd.description,
+            'score': hit.score,
+            'field': hit.field,
+            'snippet': hit.snippet,
+            'highlights': [list(span) for span in hit.highlights],
+        })
+    return {'query': query, 'total': total, 'results': results}, 200
+
+
+@app.route('/api/sync/tree', methods=['POST'])
+@app.route('/api/<namespace>/sync/tree', methods=['POST'])
+def sync_tree(namespace=None):
+    """
+    SYNC TREE: Hashes of part of the command tree, for another machine's sync
+
+    The request names tree nodes by prefix ("" is the root):
+        {"prefixes": ["", "3f", ...]}
+    Each node comes back with its hash and either its children's hashes or,
+    for small nodes, its files with their content hashes and mtimes. The
+    syncing side only asks further down where hashes differ, so this is
+    called a few times per sync with small answers.
+
+    RESPONSE FORMAT:
+    {
+        "nodes": {
+            "": {"hash": "9a1c...", "children": {"0": "51be...", ...}},
+            "3f": {"hash": "e07d...", "entries": {"shits-ready": ["<hash>", <mtime_ns>]}}
+        }
+    }
+    """
+    payload, status = sync_nodes(request.get_json(silent=True), tenant_for(namespace, create=True))
+    return jsonify(payload), status
+
+
+def sync_nodes(data, tenant=None):
+    """Tree nodes for a /api/sync/tree request body; returns (payload, status)."""
+    prefixes = data.get('prefixes') if isinstance(data, dict) else None
+    try:
+        return {'nodes': (tenant or DEFAULT_TENANT).sync.nodes(prefixes)}, 200
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+
+
+@app.route('/api/sync/fetch', methods=['POST'])
+@app.route('/api/<namespace>/sync/fetch', methods=['POST'])
+def sync_fetch(namespace=None):
+    """
+    SYNC FETCH: Downloads the commands another machine's sync is missing
+
+    Request: {"files": ["shits-ready", ...]}. The answer is one gzip'd
+    ndjson stream, one line per file: {"filename": ..., "content": ...}, or
+    {"filename": ..., "deleted": true} if the file is gone.
+    """
+    data = request.get_json(silent=True)
+    try:
+        body = tenant_for(namespace).sync.fetch(data.get('files') if isinstance(data, dict) else None)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return app.response_class(body, mimetype=BATCH_CONTENT_TYPE)
+
+
+@app.route('/api/sync/apply', methods=['POST'])
+@app.route('/api/<namespace>/sync/apply', methods=['POST'])
+def sync_apply(namespace=None):
+    """
+    SYNC APPLY: Receives the commands another machine's sync sends here
+
+    The body is a batch as sent by /api/sync/fetch, each line also carrying
+    "base": the hash the sender expects this file to have here (null if
+    it should not exist). Files that changed here in the meantime are left
+    alone and listed as conflicts. All writes are one batch.
+
+    RESPONSE FORMAT:
+    {"success": true, "written": [...], "deleted": [...], "conflicts": [...]}
+    """
+    payload, status = apply_sync_batch(request.get_data(), tenant_for(namespace, create=True))
+    return jsonify(payload), status
+
+
+def apply_sync_batch(data, tenant=None):
+    """Apply a /api/sync/apply body; returns (payload, status)."""
+    try:
+        return dict((tenant or DEFAULT_TENANT).sync.apply(data), success=True), 200
+    except SyncError as e:
+        return {'success': False, 'error': str(e)}, 400
+
+
+@app.route('/api/namespaces', methods=['GET'])
+def list_namespaces():
+    """
+    NAMESPACES: Lists every namespace, with how this process uses it
+
+    Namespaces in memory also show their size. Counts are since this
+    process started (under gunicorn each worker has its own).
+
+    RESPONSE FORMAT:
+    {
+        "namespaces": [
+            {"namespace": "design-team", "loaded": true, "commands": 120,
+             "memory_bytes": 606208, "requests": 42, "loads": 1, "evictions": 0,
+             "load_seconds": 0.0123, "last_used": 1763550000.5}
+        ],
+        "loaded": 1,
+        "memory_bytes": 606208,     <- estimated, for loaded namespaces
+        "memory_limit": 268435456,
+        "max_loaded": 200
+    }
+    """
+    return jsonify(namespace_stats())
+
+
+def namespace_stats():
+    """Payload of GET /api/namespaces (reads the namespaces directory)."""
+    return {
+        'namespaces': NAMESPACES.stats(),
+        'loaded': NAMESPACES.loaded(),
+        'memory_bytes': NAMESPACES.memory(),
+        'memory_limit': NAMESPACES.memory_limit,
+        'max_loaded': NAMESPACES.max_loaded,
+    }
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    METRICS: Counters and timings in Prometheus text format
+
+    Point a Prometheus scrape job (or curl) at http://localhost:5555/metrics:
+        ai_commands_http_requests_total{method,route,status}
+        ai_commands_http_request_duration_seconds{route}   (histogram)
+        ai_commands_http_requests_in_flight
+        ai_commands_index_files_scanned                    (per listing)
+        ai_commands_index_cache_total{result="hit"|"miss"}
+        ai_commands_parse_failures_total
+        ai_commands_disk_read_bytes_total / ..._written_bytes_total
+    and more; see command_metrics.py. Numbers are per process, so under
+    gunicorn each worker reports its own.
+    """
+    return app.response_class(command_metrics.REGISTRY.render(),
+                              content_type=command_metrics.CONTENT_TYPE)
+
+
 # ============================================================================
 # MAIN: Start the web server
 # ============================================================================
 
-if __name__ == '__main__':
+def run_server(host='0.0.0.0', port=5555):
     """
-    This runs when you execute: python3 web_command_manager.py
-
-    It starts the Flask web server on port 5555 and makes it accessible
-    from your browser at http://localhost:5555
+    Start the web server and make it accessible from your browser at
+    http://localhost:5555
     """
     # Print startup message
     print("\n🎯 AI Command Manager")
     print("=" * 50)
-    print("Open your browser to: http://localhost:5555")
+    print(f"Open your browser to: http://localhost:{port}")
     print("=" * 50)
     print("\nPress Ctrl+C to stop\n")
 
@@ -565,4 +957,222 @@ if __name__ == '__main__':
     # host='0.0.0.0' means accessible from other devices on network
     # port=5555 is the port number
     # debug=False turns off debug mode (safer for production)
-    app.run(host='0.0.0.0', port=5555, debug=False)
+    app.run(host=host, port=port, debug=False)
+
+
+def serve(host='0.0.0.0', port=5555, workers=None, threads=4, server='auto'):
+    """
+    PRODUCTION SERVE MODE: Runs the app under a real WSGI server
+
+    Servers, best first (server='auto' picks the first one installed):
+        gunicorn - several worker processes, each with `threads` threads.
+                   Send the master process SIGHUP for a graceful reload
+                   (new workers start before the old ones finish).
+                   Install with: pip3 install gunicorn   (macOS/Linux)
+        waitress - one process, `threads` threads (works on Windows too).
+                   Install with: pip3 install waitress
+        flask    - Flask's built-in server with one thread per request
+                   (fallback only - not meant for production)
+        aiohttp  - the asyncio server in async_command_manager.py (never
+                   picked by 'auto'; best for many long-polling clients)
+
+    Every worker process keeps its own command index. Each listing re-checks
+    file stamps, so a command written through one worker is visible from
+    all of them, and the index fingerprint makes their ETags agree.
+
+    Every open page keeps one live-update stream (/api/commands/events)
+    and, under gunicorn and waitress, each stream holds a thread; at most
+    threads - 1 streams per process are allowed so requests always get a
+    thread. For many open pages use the aiohttp server.
+    """
+    global EVENT_STREAM_LIMIT
+    if STORAGE.journaled and (workers or 1) > 1:
+        # Each process would keep its own journal state for the same file
+        print("❌ AI_COMMANDS_JOURNAL=1 needs a single worker process; "
+              "use --workers 1 with more --threads instead", file=sys.stderr)
+        return 2
+
+    if server == 'auto':
+        server = 'flask'
+        for candidate in ('gunicorn', 'waitress'):
+            if candidate == 'gunicorn' and os.name == 'nt':
+                continue  # gunicorn needs fork()
+            try:
+                __import__(candidate)
+            except ImportError:
+                continue
+            server = candidate
+            break
+
+    if server == 'aiohttp':
+        import async_command_manager
+        return async_command_manager.serve(host, port)
+    if server in ('gunicorn', 'waitress'):
+        EVENT_STREAM_LIMIT = max(threads - 1, 0)
+
+    print("\n🎯 AI Command Manager")
+    print("=" * 50)
+    print(f"Open your browser to: http://localhost:{port}")
+    print("=" * 50)
+
+    if server == 'gunicorn':
+        from gunicorn.app.base import BaseApplication
+
+        if workers is None:
+            workers = 1 if STORAGE.journaled else min(2 * (os.cpu_count() or 1) + 1, 8)
+
+        class CommandManagerServer(BaseApplication):
+            """Runs this Flask app inside gunicorn without a config file."""
+
+            def load_config(self):
+                self.cfg.set('bind', f"{host}:{port}")
+                self.cfg.set('workers', workers)
+                self.cfg.set('threads', threads)
+                self.cfg.set('worker_class', 'gthread' if threads > 1 else 'sync')
+                self.cfg.set('graceful_timeout', 30)
+                # The indexes are built before forking, so workers share
+                # them copy-on-write instead of each re-reading every file
+                self.cfg.set('preload_app', True)
+
+            def load(self):
+                return app
+
+        print(f"gunicorn: {workers} workers x {threads} threads "
+              f"(kill -HUP {os.getpid()} to reload gracefully)")
+        # On this thread, before the fork: no worker may inherit a half-built
+        # index or a lock held by a thread that doesn't exist in it
+        SEARCH.build()
+        print("\nPress Ctrl+C to stop\n")
+        CommandManagerServer().run()
+        return 0
+
+    # One process from here on: index command bodies while serving
+    SEARCH.build_in_background()
+    if server == 'waitress':
+        import waitress
+        print(f"waitress: 1 process x {threads} threads"
+              + (" (waitress has no worker processes; --workers ignored)" if workers else ""))
+        print("\nPress Ctrl+C to stop\n")
+        waitress.serve(app, host=host, port=port, threads=threads)
+    else:
+        print("⚠️  No production server installed (pip3 install gunicorn or waitress);"
+              " using Flask's built-in server")
+        print("\nPress Ctrl+C to stop\n")
+        app.run(host=host, port=port, debug=False, threaded=True)
+    return 0
+
+
+def import_file(path, fmt=None, partial=False, namespace=None, overwrite=False):
+    """
+    COMMAND LINE IMPORT: Same as POST /api/commands/bulk, from a file.
+
+    path may be "-" to read from stdin. Prints the per-item report and
+    returns an exit code (0 = everything imported).
+    """
+    store = tenant_for(namespace, create=True).store
+    if path == '-':
+        data = sys.stdin.buffer.read()
+    else:
+        data = Path(path).read_bytes()
+    fmt = fmt or detect_format(name=path)
+    try:
+        result = store.import_bundle(data, fmt, partial=partial, overwrite=overwrite)
+    except BulkError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    for item in result['results']:
+        if not item['success']:
+            print(f"❌ #{item['index']} {item['filename'] or ''}: {item['error']}", file=sys.stderr)
+    mark = "✅" if result['success'] else "⚠️ "
+    print(f"{mark} Imported {result['created']} command(s), updated {result['updated']}, "
+          f"{result['failed']} failed")
+    return 0 if result['success'] else 1
+
+
+def export_file(path, fmt=None, namespace=None):
+    """
+    COMMAND LINE EXPORT: Same as GET /api/commands/export, to a file.
+
+    path may be "-" to write to stdout.
+    """
+    tenant = tenant_for(namespace)
+    fmt = fmt or (detect_format(name=path) if path != '-' else 'ndjson')
+    data = tenant.store.export_bundle(fmt=fmt)
+    if path == '-':
+        sys.stdout.buffer.write(data)
+    else:
+        Path(path).write_bytes(data)
+        print(f"✅ Exported {len(tenant.index)} command(s) to {path}")
+    return 0
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+        python3 web_command_manager.py                  # Start the web server
+        python3 web_command_manager.py serve --workers 4 # Production server
+        python3 web_command_manager.py import team.ndjson [--partial] [--overwrite]
+        python3 web_command_manager.py export backup.zip
+        python3 web_command_manager.py sync http://laptop:5555 [--mode push]
+
+    import, export and sync take --namespace NAME to work on a namespace's
+    commands (http://host:5555/api/NAME syncs with one on another server).
+    """
+    parser = argparse.ArgumentParser(description="AI Command Manager - web interface and tools")
+    sub = parser.add_subparsers(dest='action')
+
+    importer = sub.add_parser('import', help='Import many commands from a file')
+    importer.add_argument('path', help='ndjson/json/tar/zip file, or - for stdin')
+    importer.add_argument('--format', choices=FORMATS, help='Override format detection')
+    importer.add_argument('--partial', action='store_true',
+                          help='Import the valid commands even if some are invalid')
+    importer.add_argument('--overwrite', action='store_true',
+                          help='Replace commands that already exist')
+    importer.add_argument('--namespace', help='Import into this namespace (created if new)')
+
+    server = sub.add_parser('serve', help='Run under a production server (gunicorn/waitress)')
+    server.add_argument('--host', default='0.0.0.0')
+    server.add_argument('--port', type=int, default=5555)
+    server.add_argument('--workers', type=int,
+                        help='Worker processes (gunicorn only; default: based on CPU count)')
+    server.add_argument('--threads', type=int, default=4, help='Threads per worker')
+    server.add_argument('--server', choices=('auto', 'gunicorn', 'waitress', 'flask', 'aiohttp'),
+                        default='auto')
+
+    exporter = sub.add_parser('export', help='Export every command to a file')
+    exporter.add_argument('path', help='Output file (.ndjson/.json/.tar.gz/.zip), or - for stdout')
+    exporter.add_argument('--format', choices=FORMATS, help='Override format detection')
+    exporter.add_argument('--namespace', help="Export this namespace's commands")
+
+    syncer = sub.add_parser('sync', help='Sync commands with another machine or directory')
+    add_sync_arguments(syncer)
+    syncer.add_argument('--namespace', help="Sync this namespace's commands (created if new)")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.action == 'import':
+            return import_file(args.path, args.format, args.partial, args.namespace,
+                               args.overwrite)
+        if args.action == 'export':
+            return export_file(args.path, args.format, args.namespace)
+        if args.action == 'sync':
+            store = tenant_for(args.namespace, create=True).store
+            return sync_command(store, args.peer, args.mode, args.conflicts, args.dry_run)
+    except (NamespaceError, UnknownNamespace) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    if args.action == 'serve':
+        return serve(args.host, args.port, args.workers, args.threads, args.server)
+    run_server()
+    return 0
+
+
+if __name__ == '__main__':
+    """
+    This runs when you execute: python3 web_command_manager.py
+
+    With no arguments it starts the web server; see main() for the
+    import/export tools.
+    """
+    sys.exit(main())
@@ -0,0 +1,439 @@
+/* ===================================================================
+   JAVASCRIPT: Makes the page interactive
+   =================================================================== */
+
+/**
+ * Show success notification in top-right corner
+ * @param {string} msg - Message to display
+ */
+function showSuccess(msg) {
+    const el = document.getElementById('successMsg');
+    el.textContent = msg;
+    el.style.display = 'block';  // Make visible
+    // Auto-hide after 3 seconds
+    setTimeout(() => el.style.display = 'none', 3000);
+}
+
+// ETag of the list currently on screen (see loadCommands)
+let commandsEtag = null;
+
+// True while the live-update stream is connected: changes then
+// arrive by themselves and the list is never refetched after an action
+let liveUpdates = false;
+
+/* -------------------------------------------------------------------
+   VIRTUAL LIST: only the rows in view exist in the page. Commands are
+   fetched from the server a page at a time, as they scroll into view,
+   so a library of 10,000 commands costs the same as one of 10.
+   ------------------------------------------------------------------- */
+
+// Height of one row: .command-item height + gap (keep in step with app.css)
+const ROW_HEIGHT = 130;
+
+// Commands fetched per request, and extra rows rendered above/below view
+const PAGE_SIZE = 100;
+const OVERSCAN = 4;
+
+// Lists (or search results) up to this size are fetched whole, so typing
+// more of a search narrows them right here without asking the server
+const FETCH_ALL_BELOW = 1000;
+
+// Fields fetched per command (aliases too, so searches can be narrowed here)
+const LIST_FIELDS = 'filename,phrase,description,aliases';
+
+const view = {
+    query: '',          // Current search text (lowercase)
+    total: null,        // Commands matching it (null until the first page)
+    rows: [],           // Sparse: row number -> command
+    loaded: new Set(),  // Page numbers whose rows are current
+    pending: new Set(), // Page numbers being fetched
+    generation: 0,      // Bumped whenever loaded rows go stale
+    nodes: new Map(),   // Rendered rows: key -> element
+};
+
+/**
+ * Build the list entry for one command
+ * Text goes in with textContent, so phrases can't inject HTML
+ * @param {object} cmd - {filename, phrase, description}
+ */
+function commandNode(cmd) {
+    const item = document.createElement('div');
+    item.className = 'command-item';
+    item.dataset.filename = cmd.filename;
+    const title = document.createElement('h3');
+    title.textContent = `"${cmd.phrase}"`;
+    const desc = document.createElement('p');
+    desc.textContent = cmd.description;
+    const button = document.createElement('button');
+    button.className = 'delete-btn';
+    button.textContent = 'Delete';
+    button.onclick = () => deleteCommand(cmd.filename);
+    item.append(title, desc, button);
+    return item;
+}
+
+/**
+ * Placeholder row for a command whose page hasn't arrived yet
+ */
+function loadingNode() {
+    const item = document.createElement('div');
+    item.className = 'command-item loading';
+    item.textContent = 'Loading...';
+    return item;
+}
+
+/**
+ * Same test as the server's ?q= filter (matches_filter), so a search can
+ * be narrowed without asking the server again
+ */
+function matchesQuery(cmd, query) {
+    if (!query) return true;
+    return cmd.filename.includes(query)
+        || cmd.phrase.toLowerCase().includes(query)
+        || cmd.description.toLowerCase().includes(query)
+        || (cmd.aliases || []).some(a => a.toLowerCase().includes(query));
+}
+
+function pageCount() {
+    return Math.ceil((view.total || 0) / PAGE_SIZE);
+}
+
+/**
+ * True if every matching command is loaded (then searches and changes
+ * can be handled right here)
+ */
+function isComplete() {
+    return view.total !== null && view.loaded.size >= pageCount();
+}
+
+function markAllLoaded() {
+    view.total = view.rows.length;
+    view.loaded = new Set(Array.from({length: pageCount()}, (_, i) => i));
+}
+
+/**
+ * Forget which pages are current; rows stay on screen until fresh ones
+ * arrive, so the list doesn't flash
+ */
+function invalidate() {
+    view.generation++;
+    view.loaded.clear();
+    view.pending.clear();
+}
+
+/**
+ * Fetch one page of the (filtered) list
+ * @param {number} page - Page number
+ * @param {boolean} conditional - Send our ETag: null comes back if
+ *                                nothing changed at all (304)
+ */
+function fetchPage(page, conditional) {
+    const params = new URLSearchParams({
+        limit: PAGE_SIZE, offset: page * PAGE_SIZE, fields: LIST_FIELDS});
+    if (view.query) params.set('q', view.query);
+    const headers = conditional && commandsEtag ? {'If-None-Match': commandsEtag} : {};
+    // cache: 'no-store' lets us see the 304 ourselves instead of the
+    // browser hiding it
+    return fetch('/api/commands?' + params, {headers: headers, cache: 'no-store'})
+        .then(r => {
+            if (r.status === 304) return null;  // Unchanged
+            if (!r.ok) throw new Error('list failed');
+            const etag = r.headers.get('ETag');
+            return r.json().then(body => ({etag: etag, body: body}));
+        });
+}
+
+/**
+ * Put a fetched page into the rows
+ */
+function storePage(page, result) {
+    if (result.etag !== commandsEtag || view.loaded.size === 0) {
+        // The list changed since our other pages were fetched (or they
+        // are stale anyway): start over from this page
+        view.rows = [];
+        view.loaded.clear();
+        commandsEtag = result.etag;
+    }
+    view.total = result.body.total;
+    result.body.commands.forEach((cmd, i) => { view.rows[page * PAGE_SIZE + i] = cmd; });
+    view.loaded.add(page);
+}
+
+/**
+ * Fetch a page in the background unless it's current or on its way
+ */
+function requestPage(page) {
+    if (view.loaded.has(page) || view.pending.has(page)) return;
+    const generation = view.generation;
+    view.pending.add(page);
+    fetchPage(page, false)
+        .then(result => {
+            if (generation !== view.generation) return;  // Stale by now
+            view.pending.delete(page);
+            storePage(page, result);
+            render();
+        })
+        .catch(() => view.pending.delete(page));
+}
+
+/**
+ * Load all existing commands from server and display them
+ * This function:
+ * 1. Asks the server for the page in view, sending the ETag of the
+ *    list we already show
+ * 2. If the server answers 304 (nothing changed), keeps what we have
+ * 3. Otherwise starts over from that page; the rest of the list is
+ *    fetched as it scrolls into view
+ */
+function loadCommands() {
+    const list = document.getElementById('commandList');
+    const page = Math.floor(list.scrollTop / ROW_HEIGHT / PAGE_SIZE);
+    const conditional = view.total !== null && view.loaded.size > 0;
+    const wasLoaded = new Set(view.loaded);
+    invalidate();
+    const generation = view.generation;
+    view.pending.add(page);
+    fetchPage(page, conditional)
+        .then(result => {
+            if (generation !== view.generation) return;
+            view.pending.delete(page);
+            if (result === null) {
+                // Nothing changed: everything we had is still current
+                view.loaded = wasLoaded;
+            } else {
+                view.loaded.clear();
+                storePage(page, result);
+            }
+            render();
+        })
+        .catch(() => view.pending.delete(page));
+}
+
+/**
+ * Draw the rows in view (plus a few either side), reusing the elements
+ * of rows that were already on screen
+ */
+function render() {
+    const list = document.getElementById('commandList');
+    const spacer = document.getElementById('listSpacer');
+    const status = document.getElementById('listStatus');
+
+    if (view.total === 0) {
+        spacer.style.height = '0px';
+        spacer.replaceChildren();
+        view.nodes.clear();
+        status.textContent = view.query
+            ? `No commands match "${view.query}"`
+            : 'No commands yet. Create one!';
+        return;
+    }
+    if (view.total === null) return;
+    status.textContent = view.query
+        ? `${view.total.toLocaleString()} matching "${view.query}"`
+        : `${view.total.toLocaleString()} commands`;
+    spacer.style.height = `${view.total * ROW_HEIGHT}px`;
+
+    const first = Math.max(0, Math.floor(list.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(view.total - 1,
+        Math.ceil((list.scrollTop + list.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+
+    if (view.total <= FETCH_ALL_BELOW) {
+        for (let page = 0; page < pageCount(); page++) requestPage(page);
+    }
+
+    const nodes = new Map();
+    for (let i = first; i <= last; i++) {
+        const page = Math.floor(i / PAGE_SIZE);
+        if (!view.loaded.has(page)) requestPage(page);
+        const cmd = view.rows[i];
+        // Keyed by row and content, so unchanged rows keep their element
+        const key = cmd ? `${i}:${cmd.filename}:${cmd.phrase}:${cmd.description}` : `${i}:`;
+        let node = view.nodes.get(key);
+        if (!node) {
+            node = cmd ? commandNode(cmd) : loadingNode();
+            node.style.top = `${i * ROW_HEIGHT}px`;
+        }
+        nodes.set(key, node);
+    }
+    spacer.replaceChildren(...nodes.values());
+    view.nodes = nodes;
+}
+
+// Re-render at most once per frame while scrolling
+let renderQueued = false;
+function scheduleRender() {
+    if (renderQueued) return;
+    renderQueued = true;
+    requestAnimationFrame(() => { renderQueued = false; render(); });
+}
+
+/**
+ * Incremental search: narrowing a fully loaded result is done right
+ * here; anything else asks the server for the first page of matches
+ * @param {string} text - What's in the search box
+ */
+function setQuery(text) {
+    const query = text.trim().toLowerCase();
+    if (query === view.query) return;
+    const list = document.getElementById('commandList');
+    list.scrollTop = 0;
+    if (isComplete() && query.startsWith(view.query)) {
+        view.query = query;
+        view.rows = view.rows.filter(cmd => cmd && matchesQuery(cmd, query));
+        markAllLoaded();
+        render();
+        return;
+    }
+    view.query = query;
+    view.total = null;
+    view.rows = [];
+    loadCommands();
+}
+
+/**
+ * Patch the rows with one change pushed by the server
+ * If every matching command is loaded, the change is applied right here
+ * (only the affected rows re-render). Otherwise rows may have moved, so
+ * the pages in view are fetched again.
+ * @param {object} change - {added, updated, removed, etag}
+ */
+function applyChange(change) {
+    const changed = change.added.concat(change.updated);
+    const gone = new Set(change.removed.concat(changed.map(cmd => cmd.filename)));
+
+    if (isComplete()) {
+        const rows = view.rows.filter(cmd => cmd && !gone.has(cmd.filename));
+        changed.filter(cmd => matchesQuery(cmd, view.query)).forEach(cmd => {
+            // Keep the list sorted by filename, like the server does
+            let lo = 0, hi = rows.length;
+            while (lo < hi) {
+                const mid = (lo + hi) >> 1;
+                if (rows[mid].filename < cmd.filename) lo = mid + 1; else hi = mid;
+            }
+            rows.splice(lo, 0, cmd);
+        });
+        view.rows = rows;
+        markAllLoaded();
+        commandsEtag = `"${change.etag}"`;
+        render();
+        return;
+    }
+
+    // Edits that don't add, remove or re-filter a row can still be patched
+    const inPlace = !change.added.length && !change.removed.length
+        && change.updated.every(cmd => {
+            const i = view.rows.findIndex(row => row && row.filename === cmd.filename);
+            const matches = matchesQuery(cmd, view.query);
+            if (i >= 0 && matches) view.rows[i] = cmd;
+            return i >= 0 ? matches : !matches || !view.query;
+        });
+    commandsEtag = `"${change.etag}"`;
+    if (!inPlace) invalidate();
+    render();
+}
+
+/**
+ * Listen for changes pushed by the server (from this page, other
+ * browsers or edited files)
+ * The stream starts with a "sync" event carrying the current ETag;
+ * the list is only (re)loaded if ours differs - on first load,
+ * and after a reconnect that missed too much
+ */
+function listenForChanges() {
+    if (!window.EventSource) {
+        loadCommands();  // Very old browser: refetch after each action
+        return;
+    }
+    const events = new EventSource('/api/commands/events');
+    events.onopen = () => { liveUpdates = true; };
+    events.addEventListener('sync', e => {
+        if (`"${JSON.parse(e.data).etag}"` !== commandsEtag) loadCommands();
+    });
+    events.addEventListener('change', e => applyChange(JSON.parse(e.data)));
+    events.onerror = () => {
+        // The browser reconnects by itself after a dropped connection;
+        // CLOSED means the server refused the stream (too busy)
+        liveUpdates = false;
+        if (events.readyState === EventSource.CLOSED) loadCommands();
+    };
+}
+
+document.getElementById('commandList').addEventListener('scroll', scheduleRender);
+
+// Search as you type (short pause so fast typing sends one request)
+let searchTimer = null;
+document.getElementById('commandSearch').addEventListener('input', e => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => setQuery(e.target.value), 120);
+});
+
+/**
+ * Handle form submission (create new command)
+ * This prevents default form behavior and instead sends data via AJAX
+ */
+document.getElementById('commandForm').addEventListener('submit', (e) => {
+    e.preventDefault();  // Stop form from reloading page
+
+    // Collect form data into object
+    const data = {
+        phrase: document.getElementById('phrase').value,
+        action: document.getElementById('action').value,
+        description: document.getElementById('description').value,
+        aliases: document.getElementById('aliases').value
+    };
+
+    // Send POST request to server with JSON data
+    saveCommand(data);
+});
+
+/**
+ * Send a new command to the server
+ * If a command with the same phrase already exists, the server
+ * answers 409 - ask before replacing it
+ * @param {object} data - Form fields (plus overwrite: true to replace)
+ */
+function saveCommand(data) {
+    fetch('/api/commands', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(data)
+    })
+    .then(r => {
+        if (r.status === 409) {
+            if (confirm(`A command for "${data.phrase}" already exists. Replace it?`)) {
+                saveCommand(Object.assign({}, data, {overwrite: true}));
+            }
+            return null;
+        }
+        if (!r.ok) throw new Error('create failed');
+        return r.json();  // Parse response
+    })
+    .then(result => {
+        if (result === null) return;
+        // Success! Show notification and refresh
+        showSuccess(`Command created! Say: "${data.phrase}"`);
+        document.getElementById('commandForm').reset();  // Clear form
+        if (!liveUpdates) loadCommands();  // Else the change is pushed to us
+    })
+    .catch(err => alert('Error creating command'));
+}
+
+/**
+ * Delete a command
+ * @param {string} filename - Name of command file (without .md extension)
+ */
+function deleteCommand(filename) {
+    // Confirm before deleting
+    if (!confirm('Delete this command?')) return;
+
+    // Send DELETE request to server
+    fetch(`/api/commands/${filename}`, {method: 'DELETE'})
+        .then(() => {
+            showSuccess('Command deleted');
+            if (!liveUpdates) loadCommands();  // Else the change is pushed to us
+        });
+}
+
+// On page load, connect the live-update stream; its first event
+// makes us load the existing commands
+listenForChanges();